@@ -0,0 +1,6 @@
+"""Reproducible load tests for the emp app.
+
+Run with ``python -m benchmarks --help``. Every run builds a throw-away test
+database, seeds it with deterministic synthetic data and drives the main
+endpoints in-process through the WSGI or ASGI handler.
+"""
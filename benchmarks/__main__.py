@@ -0,0 +1,114 @@
+import argparse
+import logging
+import os
+import sys
+import tempfile
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument("--scenario", action="append", dest="scenarios",
+                        help="Scenario to run (repeatable, default: all). See benchmarks/scenarios.py.")
+    parser.add_argument("--driver", choices=["wsgi", "asgi", "both"], default="wsgi",
+                        help="\"both\" also prints a WSGI vs ASGI throughput comparison.")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--users", type=int, default=1000, help="Synthetic users/employees to seed.")
+    parser.add_argument("--tickets-per-user", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", default=None,
+                        help="Baseline name under benchmarks/baselines/ (default: the driver name).")
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Allowed latency/throughput drift before a run counts as a regression.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myapp.settings")
+    os.environ.setdefault("EMAIL_HOST_USER", "benchmark@example.com")
+    os.environ.setdefault("EMAIL_HOST_PASSWORD", "")
+
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import override_settings
+
+    from . import data, report
+    from .drivers import DRIVERS
+    from .scenarios import BY_NAME, SCENARIOS
+
+    scenarios = [BY_NAME[name] for name in args.scenarios] if args.scenarios else SCENARIOS
+    drivers = list(DRIVERS) if args.driver == "both" else [args.driver]
+    # Failed requests are counted in the report; keep their tracebacks quiet.
+    logging.getLogger("emp.profiling").setLevel(logging.ERROR)
+    logging.getLogger("django.request").setLevel(logging.CRITICAL)
+
+    profiled = override_settings(
+        MIDDLEWARE=["emp.middleware.QueryProfilingMiddleware"] + [
+            m for m in settings.MIDDLEWARE if m != "emp.middleware.QueryProfilingMiddleware"
+        ],
+        EMP_QUERY_BUDGETS_STRICT=False,
+        EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+        ALLOWED_HOSTS=["testserver"],
+        # Scenarios give each simulated client its own address via X-Forwarded-For.
+        EMP_THROTTLE_PROXY_COUNT=1,
+        # One process, so the locmem cache is shared by every simulated client
+        EMP_CONDITIONAL_GET=True,
+    )
+
+    old_name = connection.settings_dict["NAME"]
+    if connection.vendor == "sqlite":
+        # Threads can't share an in-memory SQLite test DB without table locks.
+        connection.settings_dict["TEST"]["NAME"] = os.path.join(tempfile.mkdtemp(), "benchmark.sqlite3")
+    connection.creation.create_test_db(verbosity=0)
+    failed = False
+    results = {}
+    try:
+        with profiled:
+            data.seed(users=args.users, tickets_per_user=args.tickets_per_user, seed=args.seed)
+            meta = {"users": args.users, "requests": args.requests,
+                    "concurrency": args.concurrency, "seed": args.seed}
+
+            for driver_name in drivers:
+                driver = DRIVERS[driver_name]()
+                summaries = {}
+                for scenario in scenarios:
+                    result = driver.run(scenario, args.requests, args.concurrency, args.users)
+                    summaries[scenario.name] = report.summarize(result)
+                results[driver_name] = summaries
+
+                print(f"\n== {driver_name.upper()} ({args.requests} requests x {args.concurrency} concurrent, "
+                      f"{args.users} users) ==")
+                print(report.format_table(summaries))
+
+                baseline_name = args.baseline or driver_name
+                baseline = report.load_baseline(baseline_name)
+                if baseline is not None:
+                    if baseline.get("meta") != meta:
+                        print(f"Note: baseline '{baseline_name}' was recorded with {baseline.get('meta')}.")
+                    regressions = report.compare(baseline, summaries, args.tolerance)
+                    for line in regressions:
+                        print(f"REGRESSION {line}")
+                    if not regressions:
+                        print(f"No regressions against baseline '{baseline_name}'.")
+                    failed = failed or bool(regressions)
+                if args.save_baseline:
+                    path = report.save_baseline(baseline_name, {"meta": meta, "scenarios": summaries})
+                    print(f"Saved baseline to {path}")
+
+            if len(results) > 1:
+                print(f"\n== {' vs '.join(name.upper() for name in results)} "
+                      f"at concurrency {args.concurrency} ==")
+                print(report.format_comparison(results))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    return 1 if failed and not args.save_baseline else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from emp.analytics import rebuild_rollups
+from emp.cache import invalidate_emp_cache
+from emp.lookups import DEPARTMENTS, DESIGNATIONS
+from emp.models import Emp, Profile, Ticket
+from emp.search import rebuild_index
+from emp.tickets import rebuild_counters
+from emp.sequences import allocate_emp_codes
+from emp.versions import ALL_TICKETS, DIRECTORY, bump
+
+
+PASSWORD = "Bench!mark1"
+
+DEPARTMENT_NAMES = ["Engineering", "Finance", "HR", "Sales", "Support", "Marketing", "Legal", "Operations"]
+DESIGNATION_NAMES = ["Intern", "Associate", "Engineer", "Senior Engineer", "Manager", "Director"]
+FIRST_NAMES = ["Asha", "Ravi", "Meera", "Arjun", "Kiran", "Neha", "Vikram", "Pooja", "Sanjay", "Divya"]
+LAST_NAMES = ["Patel", "Shah", "Mehta", "Gohel", "Desai", "Joshi", "Rao", "Iyer", "Nair", "Kapoor"]
+SUBJECTS = ["Payroll mismatch", "Laptop request", "Leave balance", "VPN access", "Login issue", "Address change"]
+
+
+def ticket_times(rng, now):
+    """Status, created_at and resolved_at for a synthetic ticket from the past year."""
+    created_at = now - timedelta(minutes=rng.randint(60, 365 * 24 * 60))
+    if rng.random() < 0.6:
+        return {"status": Ticket.RESOLVED, "created_at": created_at,
+                "resolved_at": min(now, created_at + timedelta(minutes=rng.randint(10, 7 * 24 * 60)))}
+    return {"status": Ticket.OPEN, "created_at": created_at}
+
+
+def user_email(n):
+    return f"bench{n}@example.com"
+
+
+def seed(users=1000, tickets_per_user=3, guest_tickets=200, seed=42, batch_size=1000):
+    """Create ``users`` approved users, each with an Emp row and some tickets.
+
+    The same ``seed`` always produces the same data. All users share
+    ``PASSWORD`` (hashed once) so login scenarios can use any of them.
+    """
+    rng = random.Random(seed)
+    password_hash = make_password(PASSWORD)
+    now = timezone.now()
+    departments = list(DEPARTMENTS.ensure(DEPARTMENT_NAMES).values())
+    designations = list(DESIGNATIONS.ensure(DESIGNATION_NAMES).values())
+
+    for start in range(0, users, batch_size):
+        numbers = range(start, min(start + batch_size, users))
+        with transaction.atomic():
+            accounts = User.objects.bulk_create([
+                User(username=user_email(n), email=user_email(n), password=password_hash)
+                for n in numbers
+            ])
+            if any(user.pk is None for user in accounts):  # e.g. MySQL returns no ids
+                ids = dict(User.objects.filter(username__in=[u.username for u in accounts])
+                           .values_list("username", "pk"))
+                for user in accounts:
+                    user.pk = ids[user.username]
+            Profile.objects.bulk_create([Profile(user=user, is_approved=True) for user in accounts])
+            codes = allocate_emp_codes(len(accounts))
+            Emp.objects.bulk_create([
+                Emp(
+                    user=user,
+                    emp_code=code,
+                    f_name=rng.choice(FIRST_NAMES),
+                    l_name=rng.choice(LAST_NAMES),
+                    gender=rng.choice(["Male", "Female"]),
+                    phone=f"9{n:09d}",
+                    email=f"emp{n}@example.com",
+                    address=f"{rng.randint(1, 999)} Ring Road",
+                    department=rng.choice(departments),
+                    designation=rng.choice(designations),
+                    joining_date=date(2015, 1, 1) + timedelta(days=rng.randint(0, 3650)),
+                )
+                for n, user, code in zip(numbers, accounts, codes)
+            ])
+            Ticket.objects.bulk_create([
+                Ticket(
+                    user=user,
+                    email=user.email,
+                    subject=rng.choice(SUBJECTS),
+                    message="Synthetic benchmark ticket.",
+                    **ticket_times(rng, now),
+                )
+                for user in accounts
+                for _ in range(tickets_per_user)
+            ])
+
+    Ticket.objects.bulk_create([
+        Ticket(
+            email=f"guest{n}@example.com",
+            subject=rng.choice(SUBJECTS),
+            message="Synthetic guest ticket.",
+            **ticket_times(rng, now),
+        )
+        for n in range(guest_tickets)
+    ])
+
+    rebuild_index()
+    rebuild_counters()
+    rebuild_rollups()
+    invalidate_emp_cache()
+    bump(DIRECTORY, ALL_TICKETS)
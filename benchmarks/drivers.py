@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import AsyncClient, Client
+
+from .data import user_email
+
+
+class Result:
+    def __init__(self, latencies, queries, errors, elapsed, cpu):
+        self.latencies = latencies
+        self.queries = queries
+        self.errors = errors
+        self.elapsed = elapsed
+        self.cpu = cpu  # process CPU seconds (all threads) spent on the run
+
+
+def _queries(response):
+    # Filled in by emp.middleware.QueryProfilingMiddleware
+    return int(response.headers.get("X-DB-Queries", 0))
+
+
+def _headers(scenario, client, n):
+    headers = scenario.headers(n)
+    if scenario.revalidate and getattr(client, "etag", None):
+        headers["If-None-Match"] = client.etag
+    return headers
+
+
+def _remember(scenario, client, response):
+    if scenario.revalidate and "ETag" in response:
+        client.etag = response["ETag"]
+
+
+def _failed(scenario, response):
+    return response.status_code >= 400 and response.status_code not in scenario.allowed_statuses
+
+
+class WSGIDriver:
+    """Threads, each with its own ``django.test.Client`` (WSGI handler)."""
+
+    name = "wsgi"
+
+    def run(self, scenario, requests, concurrency, users):
+        local = threading.local()
+
+        def client_for(n):
+            if not hasattr(local, "client"):
+                local.client = Client(raise_request_exception=False)
+                if scenario.authenticated:
+                    local.client.force_login(User.objects.get(username=user_email(n % users)))
+            return local.client
+
+        def one(n):
+            client = client_for(n)
+            started = time.perf_counter()
+            response = getattr(client, scenario.method)(
+                scenario.path, scenario.request_data(n % users), headers=_headers(scenario, client, n)
+            )
+            _remember(scenario, client, response)
+            return time.perf_counter() - started, _queries(response), _failed(scenario, response)
+
+        cpu_started = time.process_time()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(one, range(requests)))
+            # Worker threads opened their own DB connections; close them.
+            list(pool.map(lambda _: connections.close_all(), range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        return Result(
+            [latency for latency, _, _ in samples],
+            [queries for _, queries, _ in samples],
+            sum(failed for _, _, failed in samples),
+            elapsed,
+            time.process_time() - cpu_started,
+        )
+
+
+class ASGIDriver:
+    """Coroutines on one event loop, each with an ``AsyncClient`` (ASGI handler)."""
+
+    name = "asgi"
+
+    def run(self, scenario, requests, concurrency, users):
+        return asyncio.run(self._run(scenario, requests, concurrency, users))
+
+    async def _run(self, scenario, requests, concurrency, users):
+        get_user = sync_to_async(lambda n: User.objects.get(username=user_email(n % users)))
+        clients = []
+        for n in range(concurrency):
+            client = AsyncClient(raise_request_exception=False)
+            if scenario.authenticated:
+                await client.aforce_login(await get_user(n))
+            clients.append(client)
+
+        queue = asyncio.Queue()
+        for n in range(requests):
+            queue.put_nowait(n)
+        samples = []
+
+        async def worker(client):
+            while not queue.empty():
+                n = queue.get_nowait()
+                started = time.perf_counter()
+                response = await getattr(client, scenario.method)(
+                    scenario.path, scenario.request_data(n % users), headers=_headers(scenario, client, n)
+                )
+                _remember(scenario, client, response)
+                samples.append((time.perf_counter() - started, _queries(response), _failed(scenario, response)))
+
+        cpu_started = time.process_time()
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for client in clients))
+        elapsed = time.perf_counter() - started
+
+        return Result(
+            [latency for latency, _, _ in samples],
+            [queries for _, queries, _ in samples],
+            sum(failed for _, _, failed in samples),
+            elapsed,
+            time.process_time() - cpu_started,
+        )
+
+
+DRIVERS = {driver.name: driver for driver in (WSGIDriver, ASGIDriver)}
@@ -0,0 +1,86 @@
+"""Microbenchmarks for the password policy (emp/validators.py).
+
+Run with ``python -m benchmarks.passwords``. Compares the single-pass
+character-class scan with the previous three ``re.search`` calls, and the
+shared common-password index with Django's per-instance list loading.
+"""
+import argparse
+import os
+import re
+import sys
+import timeit
+
+
+SAMPLES = ["abc", "password", "Password1!", "correcthorsebattery", "G00d-Horse-Battery", "x" * 64 + "A1!"]
+
+
+def legacy_character_check(password):
+    # emp.validators.CustomPasswordValidator before the single-pass scanner
+    errors = []
+    if not re.search(r'[A-Z]', password):
+        errors.append("upper")
+    if not re.search(r'[0-9]', password):
+        errors.append("number")
+    if not re.search(r'[^A-Za-z0-9]', password):
+        errors.append("special")
+    return errors
+
+
+def bench(label, func, number):
+    per_call = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"{label:<52}{per_call * 1e6:>12.2f} us")
+    return per_call
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.passwords", description=__doc__)
+    parser.add_argument("--number", type=int, default=20000, help="Calls per timing loop.")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myapp.settings")
+    os.environ.setdefault("EMAIL_HOST_USER", "benchmark@example.com")
+    os.environ.setdefault("EMAIL_HOST_PASSWORD", "")
+    import django
+    django.setup()
+
+    from django.contrib.auth.password_validation import CommonPasswordValidator, validate_password
+    from django.core.exceptions import ValidationError
+
+    from emp.validators import CommonPasswordIndexValidator, character_classes, common_passwords
+
+    number = args.number
+    print(f"{'benchmark':<52}{'per call':>15}")
+    print("-" * 67)
+
+    bench("character classes: 3x re.search (all samples)",
+          lambda: [legacy_character_check(pw) for pw in SAMPLES], number)
+    bench("character classes: single pass (all samples)",
+          lambda: [character_classes(pw) for pw in SAMPLES], number)
+
+    bench("common list: CommonPasswordValidator() load", CommonPasswordValidator, 20)
+    common_passwords.cache_clear()
+    bench("common list: shared index, cold load", lambda: common_passwords.cache_clear() or common_passwords(), 20)
+    bench("common list: CommonPasswordIndexValidator()", CommonPasswordIndexValidator, number)
+
+    index = CommonPasswordIndexValidator()
+
+    def lookups():
+        for pw in SAMPLES:
+            try:
+                index.validate(pw)
+            except ValidationError:
+                pass
+    bench("common list: lookup (all samples)", lookups, number)
+
+    def full_policy():
+        for pw in SAMPLES:
+            try:
+                validate_password(pw)
+            except ValidationError:
+                pass
+    bench("validate_password, all validators (all samples)", full_policy, number // 10)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
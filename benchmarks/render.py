@@ -0,0 +1,100 @@
+"""Render-time benchmark for the employee directory (templates/emp/view_emp.html).
+
+Run with ``python -m benchmarks.render``. Renders one page of ``--rows``
+in-memory employees (no database) with the template re-read and compiled
+on every render, with the cached loader, and with the cached loader plus
+the per-row fragment cache, cold and warm.
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import date, timedelta
+
+
+def bench(label, func, number):
+    per_call = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"{label:<52}{per_call * 1e3:>12.2f} ms")
+    return per_call
+
+
+def make_emps(rows):
+    from emp.lookups import _set_cached
+    from emp.models import Department, Designation, Emp
+
+    departments = [Department(pk=i, name=name) for i, name in enumerate(["Engineering", "Finance", "HR", "Sales"], 1)]
+    designations = [Designation(pk=i, name=name) for i, name in enumerate(["Associate", "Engineer", "Manager"], 1)]
+    emps = []
+    for n in range(rows):
+        department, designation = departments[n % len(departments)], designations[n % len(designations)]
+        emp = Emp(
+            emp_id=n + 1, emp_code=f"EMP{n + 1:03d}", f_name="Asha", l_name=f"Patel{n}", gender="Female",
+            department_id=department.pk, designation_id=designation.pk,
+            joining_date=date(2015, 1, 1) + timedelta(days=n % 3650),
+        )
+        _set_cached(emp, "department", department)
+        _set_cached(emp, "designation", designation)
+        emps.append(emp)
+    return emps, departments, designations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.render", description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000, help="Employees on the rendered page.")
+    parser.add_argument("--number", type=int, default=3, help="Renders per timing loop.")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myapp.settings")
+    os.environ.setdefault("EMAIL_HOST_USER", "benchmark@example.com")
+    os.environ.setdefault("EMAIL_HOST_PASSWORD", "")
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.contrib.auth.models import AnonymousUser
+    from django.core.cache import cache
+    from django.template.backends.django import DjangoTemplates
+    from django.test import RequestFactory
+    from django.test.utils import override_settings
+
+    from emp.forms import EmpFilterForm
+
+    emps, departments, designations = make_emps(args.rows)
+    request = RequestFactory().get("/emp/view-emp/")
+    request.user = AnonymousUser()
+    context = {
+        "emps": emps, "page": None, "filter_form": EmpFilterForm({}),
+        "departments": departments, "designations": designations,
+    }
+
+    def engine(cached):
+        loaders = ["django.template.loaders.filesystem.Loader",
+                   "django.template.loaders.app_directories.Loader"]
+        options = {**settings.TEMPLATES[0]["OPTIONS"],
+                   "loaders": [("django.template.loaders.cached.Loader", loaders)] if cached else loaders}
+        return DjangoTemplates({"NAME": "bench", "DIRS": settings.TEMPLATES[0]["DIRS"], "APP_DIRS": False,
+                                "OPTIONS": options})
+
+    uncached, cached = engine(cached=False), engine(cached=True)
+
+    def render(backend):
+        return lambda: backend.get_template("emp/view_emp.html").render(context, request)
+
+    print(f"view_emp.html, {args.rows} rows")
+    print(f"{'benchmark':<52}{'per render':>15}")
+    print("-" * 67)
+    with override_settings(EMP_FRAGMENT_CACHE_TIMEOUT=0):
+        bench("uncached loader, no fragment cache", render(uncached), args.number)
+        bench("cached loader, no fragment cache", render(cached), args.number)
+    # A cache that holds the whole page (locmem keeps 300 entries by default)
+    fragments = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                 "LOCATION": "benchmark-fragments", "OPTIONS": {"MAX_ENTRIES": args.rows * 2}}
+    with override_settings(EMP_FRAGMENT_CACHE_TIMEOUT=3600, CACHES={**settings.CACHES, "default": fragments}):
+        bench("cached loader, row cache cold", lambda: cache.clear() or render(cached)(), args.number)
+        render(cached)()
+        bench("cached loader, row cache warm", render(cached), args.number)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+import json
+import statistics
+from pathlib import Path
+
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+
+def summarize(result):
+    latencies = sorted(result.latencies)
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = latencies[0] if latencies else 0.0
+    return {
+        "requests": len(latencies),
+        "errors": result.errors,
+        "p50_ms": round(p50 * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "p99_ms": round(p99 * 1000, 3),
+        "throughput_rps": round(len(latencies) / result.elapsed, 1) if result.elapsed else 0.0,
+        "queries_per_request": round(statistics.fmean(result.queries), 2) if result.queries else 0.0,
+        "cpu_ms_per_request": round(result.cpu * 1000 / len(latencies), 3) if latencies else 0.0,
+    }
+
+
+def format_table(summaries):
+    header = f"{'scenario':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'queries':>9}{'cpu ms':>9}{'errors':>8}"
+    lines = [header, "-" * len(header)]
+    for name, row in summaries.items():
+        lines.append(
+            f"{name:<28}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+            f"{row['throughput_rps']:>10.1f}{row['queries_per_request']:>9.2f}"
+            f"{row.get('cpu_ms_per_request', 0.0):>9.2f}{row['errors']:>8}"
+        )
+    return "\n".join(lines)
+
+
+def baseline_path(name):
+    return BASELINE_DIR / f"{name}.json"
+
+
+def save_baseline(name, run):
+    BASELINE_DIR.mkdir(exist_ok=True)
+    path = baseline_path(name)
+    path.write_text(json.dumps(run, indent=2, sort_keys=True) + "\n")
+    return path
+
+
+def load_baseline(name):
+    path = baseline_path(name)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def compare(baseline, summaries, tolerance=0.10):
+    """Return human-readable regressions of ``summaries`` against ``baseline``.
+
+    Latency and throughput may drift by ``tolerance`` (a fraction) before
+    they count; any increase in queries per request is a regression.
+    """
+    regressions = []
+    for name, row in summaries.items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        if row["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']:.2f}ms -> {row['p95_ms']:.2f}ms")
+        if row["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {before['throughput_rps']:.1f} -> {row['throughput_rps']:.1f} req/s"
+            )
+        if row["queries_per_request"] > before["queries_per_request"]:
+            regressions.append(
+                f"{name}: queries/request {before['queries_per_request']} -> {row['queries_per_request']}"
+            )
+    return regressions
+
+
+def format_comparison(results):
+    """Side-by-side throughput/p95 of each driver (e.g. WSGI vs ASGI)."""
+    names = list(results)
+    first = names[0]
+    header = f"{'scenario':<28}" + "".join(f"{name + ' req/s':>14}{name + ' p95':>12}" for name in names)
+    if len(names) > 1:
+        header += "".join(f"{name + '/' + first:>14}" for name in names[1:])
+    lines = [header, "-" * len(header)]
+    for scenario in results[first]:
+        row = f"{scenario:<28}"
+        for name in names:
+            summary = results[name][scenario]
+            row += f"{summary['throughput_rps']:>14.1f}{summary['p95_ms']:>12.2f}"
+        for name in names[1:]:
+            base = results[first][scenario]["throughput_rps"]
+            ratio = results[name][scenario]["throughput_rps"] / base if base else 0.0
+            row += f"{ratio:>13.2f}x"
+        lines.append(row)
+    return "\n".join(lines)
@@ -0,0 +1,57 @@
+from .data import PASSWORD, user_email
+
+
+class Scenario:
+    """One endpoint under load: a request template plus who makes it."""
+
+    def __init__(self, name, path, method="get", data=None, authenticated=True,
+                 client_ip=None, allowed_statuses=(), revalidate=False):
+        self.name = name
+        self.path = path
+        self.method = method
+        self.data = data
+        self.authenticated = authenticated
+        # Sent as X-Forwarded-For (the runner trusts one proxy); None: 127.0.0.1
+        self.client_ip = client_ip
+        # Error statuses the scenario expects, not counted as errors (e.g. 429)
+        self.allowed_statuses = allowed_statuses
+        # Poll like a browser: send each client's last ETag as If-None-Match
+        self.revalidate = revalidate
+
+    def request_data(self, n):
+        return self.data(n) if callable(self.data) else self.data
+
+    def headers(self, n):
+        ip = self.client_ip(n) if callable(self.client_ip) else self.client_ip
+        return {"X-Forwarded-For": ip} if ip else {}
+
+
+def _ip(n):
+    return f"10.{n // 65536 % 256}.{n // 256 % 256}.{n % 256}"
+
+
+SCENARIOS = [
+    Scenario("home_guest", "/emp/home/", authenticated=False),
+    Scenario("home", "/emp/home/"),
+    Scenario("view_emp", "/emp/view-emp/"),
+    Scenario("view_emp_filtered", "/emp/view-emp/?department=Engineering&joined_from=2018-01-01"),
+    Scenario("view_emp_deep_page", "/emp/view-emp/?after=900"),
+    Scenario("help_support", "/emp/help_support/"),
+    # Unchanged pages polled with their ETag: 304s from the data versions, no queries
+    Scenario("view_emp_poll", "/emp/view-emp/", revalidate=True),
+    Scenario("help_support_poll", "/emp/help_support/", revalidate=True),
+    Scenario("help_support_submit", "/emp/help_support/", method="post",
+             data={"subject": "Benchmark", "message": "Load test ticket."}),
+    Scenario("guest_help_support_submit", "/emp/guest-help-support/", method="post", authenticated=False,
+             data=lambda n: {"email": f"guest{n}@example.com", "subject": "Benchmark", "message": "Load test."}),
+    Scenario("search", "/emp/search/?q=payroll&type=ticket"),
+    Scenario("login", "/emp/login/", method="post", authenticated=False, client_ip=_ip,
+             data=lambda n: {"email": user_email(n), "password": PASSWORD}),
+    # Credential-stuffing burst from one address: after the first few attempts
+    # the throttle answers 429 before hashing, so CPU per request stays low.
+    Scenario("login_attack", "/emp/login/", method="post", authenticated=False,
+             client_ip="203.0.113.9", allowed_statuses=(429,),
+             data=lambda n: {"email": user_email(n), "password": f"guess-{n}"}),
+]
+
+BY_NAME = {scenario.name: scenario for scenario in SCENARIOS}
@@ -1,31 +1,105 @@
-from django.contrib import admin
-from .models import Profile, Emp, SupportTicket, GuestSupportTicket
+from django.contrib import admin, messages
+from django.forms import Script
+from django.urls import reverse_lazy
+from .approvals import approve_profiles
+from .models import Profile, Department, Designation, Emp, Ticket, OutboundEmail
+from .search import search_ids
+from .tickets import resolve_tickets, set_status
+
+
+class FullTextSearchMixin:
+    """Answer the changelist search box from the full-text index instead of
+    ``ILIKE '%term%'`` over every ``search_fields`` column.
+
+    Only the ``search_limit`` best matches are listed (in the changelist's
+    own order); a warning says so when there are more.
+    """
+    search_limit = 1000
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        ids = search_ids(self.model, search_term, limit=self.search_limit + 1)
+        if len(ids) > self.search_limit:
+            ids = ids[:self.search_limit]
+            self.message_user(
+                request,
+                f"Only the {self.search_limit} best matches for “{search_term}” are listed; "
+                f"refine the search to find others.",
+                messages.WARNING,
+            )
+        return queryset.filter(pk__in=ids), False
 
 
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'is_approved')
     list_editable = ('is_approved',)
+    list_filter = ('is_approved',)
+    list_select_related = ('user',)
+    actions = ['approve_selected']
+
+    @admin.action(description="Approve selected profiles")
+    def approve_selected(self, request, queryset):
+        approved = approve_profiles(queryset)
+        self.message_user(request, f"Approved {approved} profile(s); approval emails queued.")
 
 
 @admin.register(Emp)
-class EmpAdmin(admin.ModelAdmin):
+class EmpAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('emp_id', 'f_name', 'l_name', 'email', 'department', 'designation')
-    search_fields = ('f_name', 'l_name', 'email', 'department', 'designation')
+    search_fields = ('f_name', 'l_name', 'email', 'department__name', 'designation__name')
     list_filter = ('department', 'designation')
+    list_select_related = ('department', 'designation')
+
+
+@admin.register(Department)
+class DepartmentAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('name',)
 
 
-@admin.register(SupportTicket)
-class SupportTicketAdmin(admin.ModelAdmin):
-    list_display = ("subject", "user", "created_at", "is_resolved")
-    list_editable = ("is_resolved",)
-    list_filter = ("is_resolved", "created_at")
-    search_fields = ("subject", "message", "user__username", "user__email")
+@admin.register(Designation)
+class DesignationAdmin(admin.ModelAdmin):
+    list_display = ('name', 'department')
+    list_filter = ('department',)
+    list_select_related = ('department',)
+    search_fields = ('name',)
 
 
-@admin.register(GuestSupportTicket)
-class GuestSupportTicketAdmin(admin.ModelAdmin):
-    list_display = ("subject", "email", "created_at", "is_resolved")
-    list_editable = ("is_resolved",)
-    list_filter = ("is_resolved", "created_at")
+@admin.register(Ticket)
+class TicketAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    list_display = ("subject", "email", "user", "status", "created_at", "resolved_at")
+    list_filter = ("status", ("user", admin.EmptyFieldListFilter), "created_at")
+    list_select_related = ("user",)
     search_fields = ("subject", "message", "email")
+    readonly_fields = ("created_at", "updated_at", "resolved_at")
+    actions = ["resolve_selected", "mark_in_progress", "reopen_selected"]
+
+    class Media:
+        # Live "new tickets / reload" notice on the changelist (emp/events.py)
+        js = [Script("emp/ticket_events.js", **{"data-url": reverse_lazy("ticket_events")})]
+
+    # Status changes go through emp.tickets.set_status: one UPDATE and one
+    # batch of queued notifications for the whole selection.
+    @admin.action(description="Resolve selected tickets")
+    def resolve_selected(self, request, queryset):
+        resolved = resolve_tickets(queryset)
+        self.message_user(request, f"Resolved {resolved} ticket(s); notifications queued.")
+
+    @admin.action(description="Mark selected tickets in progress")
+    def mark_in_progress(self, request, queryset):
+        changed = set_status(queryset, Ticket.IN_PROGRESS)
+        self.message_user(request, f"Marked {changed} ticket(s) in progress.")
+
+    @admin.action(description="Reopen selected tickets")
+    def reopen_selected(self, request, queryset):
+        changed = set_status(queryset, Ticket.OPEN)
+        self.message_user(request, f"Reopened {changed} ticket(s).")
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ("subject", "status", "attempts", "created_at", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("subject",)
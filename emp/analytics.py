@@ -0,0 +1,287 @@
+from collections import Counter, defaultdict
+from datetime import date, datetime
+
+from django.db import connections, router, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .lookups import DEPARTMENTS, DESIGNATIONS
+from .models import Emp, HeadcountRollup, MonthlyRollup, Ticket
+
+
+DASHBOARD_MONTHS = 12
+MAX_MONTHS = 120
+
+
+def month_of(value):
+    """First day of the (local) month of a date, datetime or ISO date string."""
+    if isinstance(value, str):
+        value = Emp._meta.get_field("joining_date").to_python(value)
+    if isinstance(value, datetime):
+        value = timezone.localtime(value).date() if timezone.is_aware(value) else value.date()
+    return value.replace(day=1)
+
+
+def _seconds(start, end):
+    return int((end - start).total_seconds())
+
+
+# ================== Incremental updates ==================
+
+class Rollups:
+    """Changes to the rollup tables, collected and then written together.
+
+    ``apply()`` costs at most one upsert per table, however many employees
+    or tickets were recorded.
+    """
+
+    def __init__(self):
+        self.headcount = Counter()               # (department_id, designation_id) -> delta
+        self.monthly = defaultdict(lambda: [0, 0])  # (metric, month) -> [count, seconds]
+
+    def emp(self, department_id, designation_id, joining_date, sign=1):
+        self.headcount[department_id, designation_id] += sign
+        self.monthly[MonthlyRollup.JOINERS, month_of(joining_date)][0] += sign
+
+    def ticket_opened(self, created_at, sign=1):
+        self.monthly[MonthlyRollup.TICKETS_OPENED, month_of(created_at)][0] += sign
+
+    def ticket_resolved(self, created_at, resolved_at, sign=1):
+        totals = self.monthly[MonthlyRollup.TICKETS_RESOLVED, month_of(resolved_at)]
+        totals[0] += sign
+        totals[1] += sign * _seconds(created_at, resolved_at)
+
+    def apply(self):
+        headcount = {key: delta for key, delta in self.headcount.items() if delta}
+        if headcount:
+            increment(HeadcountRollup, ("department_id", "designation_id"),
+                  {key: {"headcount": delta} for key, delta in headcount.items()})
+        monthly = {key: totals for key, totals in self.monthly.items() if totals != [0, 0]}
+        if monthly:
+            increment(MonthlyRollup, ("metric", "month"),
+                  {key: {"count": count, "total_seconds": seconds} for key, (count, seconds) in monthly.items()})
+        self.headcount.clear()
+        self.monthly.clear()
+
+
+def increment(model, key_fields, deltas):
+    """Add ``{key: {column: delta}}`` to the rows of ``model`` whose
+    ``key_fields`` match each key, creating missing rows, in one statement:
+    INSERT ... ON CONFLICT DO UPDATE (ON DUPLICATE KEY UPDATE on MySQL)."""
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = sorted({column for changes in deltas.values() for column in changes})
+    fields = [model._meta.get_field(name) for name in (*key_fields, *columns)]
+    params = []
+    for key, changes in deltas.items():
+        values = (*key, *(changes.get(column, 0) for column in columns))
+        params += [field.get_db_prep_save(value, connection) for field, value in zip(fields, values)]
+
+    row = "(" + ", ".join(["%s"] * len(fields)) + ")"
+    sql = (f"INSERT INTO {table} ({', '.join(quote(field.column) for field in fields)}) "
+           f"VALUES {', '.join([row] * len(deltas))} ")
+    added = [quote(field.column) for field in fields[len(key_fields):]]
+    if connection.vendor == "mysql":
+        sql += "ON DUPLICATE KEY UPDATE " + ", ".join(f"{c} = {c} + VALUES({c})" for c in added)
+    else:
+        conflict = ", ".join(quote(field.column) for field in fields[:len(key_fields)])
+        sql += (f"ON CONFLICT ({conflict}) DO UPDATE SET "
+                + ", ".join(f"{c} = {table}.{c} + EXCLUDED.{c}" for c in added))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+_DEFERRED = object()
+_EMP_FIELDS = ("department_id", "designation_id", "joining_date")
+_TICKET_FIELDS = ("created_at", "resolved_at")
+
+
+def _fields(instance):
+    # Read straight from __dict__ so deferred fields are never loaded
+    names = _EMP_FIELDS if isinstance(instance, Emp) else _TICKET_FIELDS
+    return tuple(instance.__dict__.get(name, _DEFERRED) for name in names)
+
+
+def remember(instance):
+    """Note the values an Emp/Ticket is counted under, to undo them when it changes (post_init)."""
+    instance._rollup_was = _fields(instance) if instance.pk else None
+
+
+def _changed(instance):
+    # (old, new) values, or None if some were deferred: a partial load
+    # saves only its loaded fields, so those rollups cannot have moved.
+    was, now = instance._rollup_was, _fields(instance)
+    if was is None or _DEFERRED in was or _DEFERRED in now:
+        return None
+    return was, now
+
+
+def emp_saved(emp, created):
+    rollups = Rollups()
+    if created:
+        rollups.emp(emp.department_id, emp.designation_id, emp.joining_date)
+    elif changed := _changed(emp):
+        was, now = changed
+        rollups.emp(*was, sign=-1)
+        rollups.emp(*now)
+    rollups.apply()
+    remember(emp)
+
+
+def emp_deleted(emp):
+    rollups = Rollups()
+    rollups.emp(emp.department_id, emp.designation_id, emp.joining_date, sign=-1)
+    rollups.apply()
+
+
+def ticket_saved(ticket, created):
+    rollups = Rollups()
+    if created:
+        rollups.ticket_opened(ticket.created_at)
+        if ticket.resolved_at:
+            rollups.ticket_resolved(ticket.created_at, ticket.resolved_at)
+    elif changed := _changed(ticket):
+        (created_at, resolved_at), now = changed
+        if resolved_at:
+            rollups.ticket_resolved(created_at, resolved_at, sign=-1)
+        if now[1]:
+            rollups.ticket_resolved(*now)
+    rollups.apply()
+    remember(ticket)
+
+
+def ticket_deleted(ticket):
+    rollups = Rollups()
+    rollups.ticket_opened(ticket.created_at, sign=-1)
+    if ticket.resolved_at:
+        rollups.ticket_resolved(ticket.created_at, ticket.resolved_at, sign=-1)
+    rollups.apply()
+
+
+# ================== Rebuild ==================
+
+def _batches(queryset, batch_size):
+    """Consecutive primary-key ranges of ``queryset``, ``batch_size`` rows each."""
+    last = None
+    while True:
+        page = queryset.order_by("pk")
+        if last is not None:
+            page = page.filter(pk__gt=last)
+        ids = list(page.values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return
+        last = ids[-1]
+        yield queryset.filter(pk__gte=ids[0], pk__lte=last).order_by()
+
+
+def rebuild_rollups(batch_size=5000):
+    """Recompute every rollup from scratch (after bulk edits that bypass signals).
+
+    Each pass aggregates one primary-key range in the database, so no query
+    scans more than ``batch_size`` rows and only the totals are kept in
+    memory. Returns the number of rollup rows written.
+    """
+    headcount, monthly = Counter(), defaultdict(lambda: [0, 0])
+    for emps in _batches(Emp.objects.all(), batch_size):
+        rows = emps.values_list("department_id", "designation_id", TruncMonth("joining_date")).annotate(n=Count("pk"))
+        for department_id, designation_id, month, n in rows:
+            headcount[department_id, designation_id] += n
+            monthly[MonthlyRollup.JOINERS, month][0] += n
+
+    for tickets in _batches(Ticket.objects.all(), batch_size):
+        for month, n in tickets.values_list(TruncMonth("created_at")).annotate(n=Count("pk")):
+            monthly[MonthlyRollup.TICKETS_OPENED, month_of(month)][0] += n
+        resolved = tickets.filter(resolved_at__isnull=False).values_list(TruncMonth("resolved_at")).annotate(
+            n=Count("pk"), total=Sum(F("resolved_at") - F("created_at")),
+        )
+        for month, n, total in resolved:
+            totals = monthly[MonthlyRollup.TICKETS_RESOLVED, month_of(month)]
+            totals[0] += n
+            totals[1] += int(total.total_seconds())
+
+    with transaction.atomic():
+        HeadcountRollup.objects.all().delete()
+        MonthlyRollup.objects.all().delete()
+        HeadcountRollup.objects.bulk_create([
+            HeadcountRollup(department_id=department_id, designation_id=designation_id, headcount=n)
+            for (department_id, designation_id), n in headcount.items()
+        ])
+        MonthlyRollup.objects.bulk_create([
+            MonthlyRollup(metric=metric, month=month, count=count, total_seconds=seconds)
+            for (metric, month), (count, seconds) in monthly.items()
+        ])
+    return len(headcount) + len(monthly)
+
+
+# ================== Reading ==================
+
+def _first_month(months):
+    today = timezone.localdate()
+    index = today.year * 12 + today.month - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _headcount_rows():
+    return HeadcountRollup.objects.filter(headcount__gt=0).values_list("department_id", "designation_id", "headcount")
+
+
+def _monthly_rows(months):
+    return MonthlyRollup.objects.filter(month__gte=_first_month(months)).values_list(
+        "metric", "month", "count", "total_seconds"
+    )
+
+
+def _report(headcount_rows, monthly_rows, departments, designations, months):
+    by_department = Counter()
+    headcount = []
+    for department_id, designation_id, n in headcount_rows:
+        department, designation = departments.get(department_id), designations.get(designation_id)
+        by_department[department.name if department else None] += n
+        headcount.append({"department": department.name if department else None,
+                          "designation": designation.name if designation else None, "count": n})
+    headcount.sort(key=lambda row: (-row["count"], row["department"] or "", row["designation"] or ""))
+
+    series = {}
+    for metric, month, count, seconds in monthly_rows:
+        series.setdefault(month, {})[metric] = (count, seconds)
+    first = _first_month(months)
+    monthly = []
+    for i in range(months):
+        index = first.year * 12 + first.month - 1 + i
+        month = date(index // 12, index % 12 + 1, 1)
+        values = series.get(month, {})
+        resolved, seconds = values.get(MonthlyRollup.TICKETS_RESOLVED, (0, 0))
+        monthly.append({
+            "month": f"{month:%Y-%m}",
+            "joiners": values.get(MonthlyRollup.JOINERS, (0, 0))[0],
+            "tickets_opened": values.get(MonthlyRollup.TICKETS_OPENED, (0, 0))[0],
+            "tickets_resolved": resolved,
+            "avg_resolution_hours": round(seconds / resolved / 3600, 1) if resolved else None,
+        })
+    return {
+        "headcount": {
+            "total": sum(by_department.values()),
+            "by_department": [{"department": name, "count": n} for name, n in by_department.most_common()],
+            "by_designation": headcount,
+        },
+        "monthly": monthly,
+    }
+
+
+def report(months=DASHBOARD_MONTHS):
+    """Headcount, monthly joiners and monthly ticket volume/resolution time.
+
+    Two queries over the rollup tables (sized by departments x designations
+    and by months), whatever the number of employees and tickets.
+    """
+    months = max(1, min(months, MAX_MONTHS))
+    return _report(list(_headcount_rows()), list(_monthly_rows(months)),
+                   DEPARTMENTS.rows(), DESIGNATIONS.rows(), months)
+
+
+async def areport(months=DASHBOARD_MONTHS):
+    months = max(1, min(months, MAX_MONTHS))
+    return _report([row async for row in _headcount_rows()], [row async for row in _monthly_rows(months)],
+                   await DEPARTMENTS.arows(), await DESIGNATIONS.arows(), months)
@@ -0,0 +1,369 @@
+"""Versioned JSON API (``/emp/api/v1/``) for HR integrations.
+
+- ``GET employees/`` and ``GET tickets/?type=ticket|guest_ticket`` list
+  records one keyset page at a time (``?after=``/``?before=`` cursors,
+  ``?limit=``). ``?fields=a,b`` picks the fields to return, and only those
+  columns are loaded (``.only()``).
+- ``POST employees/batch/`` and ``POST tickets/batch/`` take
+  ``{"create": [...], "update": [...]}``. Every record is checked first;
+  if any is invalid nothing is written and the errors come back by index,
+  otherwise the whole batch is written in one transaction with bulk
+  queries.
+
+Requests use the session of a logged-in user (send the CSRF token in
+``X-CSRFToken`` with POSTs). Bodies are encoded with orjson when it is
+installed.
+"""
+import json
+from collections import defaultdict
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DataError, IntegrityError, transaction
+from django.http import HttpResponse
+
+from .employees import (
+    EMP_FIELDS, LOOKUP_FIELDS, clean_employee, create_employees, resolve_lookups, taken, update_employees,
+)
+from .forms import EmpFilterForm, GuestSupportTicketForm, SupportTicketForm
+from .lookups import DEPARTMENTS, DESIGNATIONS
+from .models import Emp, Ticket
+from .pagination import PER_PAGE, keyset_paginate
+from .routers import use_replica
+from .tickets import TRANSITIONS, create_tickets, filter_status, set_status
+
+try:
+    import orjson
+except ImportError:  # optional: the standard library encoder
+    orjson = None
+
+
+MAX_PAGE = 200
+
+# Fields every employee may read (as on view_emp); staff also get the contact details
+EMPLOYEE_FIELDS = (
+    "emp_id", "emp_code", "f_name", "l_name", "gender", "department", "designation", "joining_date", "version",
+)
+STAFF_EMPLOYEE_FIELDS = EMPLOYEE_FIELDS + ("phone", "email", "address")
+# Fields a batch update may change
+UPDATABLE_EMPLOYEE_FIELDS = ("email", *EMP_FIELDS, *LOOKUP_FIELDS)
+
+TICKET_FIELDS = (
+    "id", "user", "email", "subject", "message", "status", "created_at", "updated_at", "resolved_at",
+)
+TICKET_TYPES = {"ticket": {"user__isnull": False}, "guest_ticket": {"user__isnull": True}}
+
+
+def _max_batch():
+    return getattr(settings, "EMP_API_MAX_BATCH", 500)
+
+
+# ================== Encoding ==================
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":")).encode()
+
+
+def loads(body):
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def api_response(data, status=200):
+    return HttpResponse(dumps(data), status=status, content_type="application/json")
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.body = {"error": message, **extra}
+
+
+def api_view(*methods, staff=False):
+    """JSON errors instead of login redirects and error pages."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                response = api_response({"error": f"Method {request.method} not allowed."}, status=405)
+                response["Allow"] = ", ".join(methods)
+                return response
+            if not request.user.is_authenticated:
+                return api_response({"error": "Authentication required."}, status=401)
+            if staff and not request.user.is_staff:
+                return api_response({"error": "Staff only."}, status=403)
+            try:
+                return view(request, *args, **kwargs)
+            except ApiError as e:
+                return api_response(e.body, status=e.status)
+        return wrapper
+    return decorator
+
+
+# ================== Query parameters ==================
+
+def _fields(request, allowed, always):
+    """The ``?fields=`` asked for (default: all ``allowed``), plus the ``always`` ones."""
+    raw = request.GET.get("fields")
+    if not raw:
+        return list(allowed)
+    fields = [name.strip() for name in raw.split(",") if name.strip()]
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(unknown)}.", allowed=list(allowed))
+    return list(dict.fromkeys([always, *fields]))
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get("limit", PER_PAGE))
+    except ValueError:
+        raise ApiError("limit must be a number.")
+    return max(1, min(limit, MAX_PAGE))
+
+
+def _page(page, serialize):
+    return api_response({
+        "data": [serialize(row) for row in page],
+        "next": page.next_cursor,
+        "previous": page.prev_cursor,
+    })
+
+
+def _batch(request):
+    try:
+        body = loads(request.body)
+    except ValueError:
+        raise ApiError("Request body must be JSON.")
+    if not isinstance(body, dict):
+        raise ApiError('Request body must be an object: {"create": [...], "update": [...]}.')
+    create, update = body.get("create") or [], body.get("update") or []
+    if not isinstance(create, list) or not isinstance(update, list):
+        raise ApiError('"create" and "update" must be lists.')
+    if len(create) + len(update) > _max_batch():
+        raise ApiError(f"At most {_max_batch()} records per batch.", status=413)
+    if not all(isinstance(record, dict) for record in create + update):
+        raise ApiError("Every record must be an object.")
+    return body, create, update
+
+
+def _id(record, name):
+    """``record[name]`` if it is an integer (JSON ``true`` is not), else None."""
+    value = record.get(name)
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+
+def _invalid(errors):
+    # errors: {"create"|"update": [(index, [messages]), ...]}
+    if any(errors.values()):
+        raise ApiError("Invalid records; nothing was written.", errors={
+            operation: [{"index": index, "errors": messages} for index, messages in failures]
+            for operation, failures in errors.items() if failures
+        })
+
+
+# ================== Employees ==================
+
+def _emp_value(emp, name):
+    if name == "department":
+        return DEPARTMENTS.get(emp.department_id).name
+    if name == "designation":
+        return DESIGNATIONS.get(emp.designation_id).name
+    return getattr(emp, name)
+
+
+def serialize_emp(emp, fields=EMPLOYEE_FIELDS):
+    return {name: _emp_value(emp, name) for name in fields}
+
+
+@api_view("GET")
+@use_replica
+def employees(request):
+    # ?fields=, ?limit=, ?after=/?before= (emp_id) and the view_emp filters
+    allowed = STAFF_EMPLOYEE_FIELDS if request.user.is_staff else EMPLOYEE_FIELDS
+    fields = _fields(request, allowed, always="emp_id")
+    filter_form = EmpFilterForm(request.GET)
+    filter_form.is_valid()
+    emps = filter_form.filter(Emp.objects.only(*fields))
+    page = keyset_paginate(emps, request.GET, key="emp_id", per_page=_limit(request))
+    return _page(page, lambda emp: serialize_emp(emp, fields))
+
+
+def _clean_updates(records):
+    """``({emp: cleaned}, errors)`` for ``[{"emp_id": ..., field: value, ...}]``."""
+    ids = [_id(record, "emp_id") for record in records]
+    emps = Emp.objects.select_for_update().in_bulk([pk for pk in ids if pk is not None])
+    taken_emails, taken_phones = taken(
+        emails={str(record["email"]).strip().lower() for record in records if record.get("email")},
+        phones={str(record["phone"]).strip() for record in records if record.get("phone")},
+        exclude_users=[emp.user_id for emp in emps.values()],
+    )
+    # Values the updated rows keep still belong to them
+    for record, pk in zip(records, ids):
+        if pk in emps:
+            if "email" not in record:
+                taken_emails.add(emps[pk].email)
+            if "phone" not in record:
+                taken_phones.add(emps[pk].phone)
+
+    changes, errors, seen = {}, [], set()
+    for index, (record, pk) in enumerate(zip(records, ids)):
+        if pk is None:
+            errors.append((index, ["emp_id: must be an integer"]))
+            continue
+        emp = emps.get(pk)
+        if emp is None:
+            errors.append((index, [f"emp_id: no employee {pk}"]))
+            continue
+        if pk in seen:
+            errors.append((index, [f"emp_id: {pk} appears more than once"]))
+            continue
+        seen.add(pk)
+        unknown = [name for name in record if name != "emp_id" and name not in UPDATABLE_EMPLOYEE_FIELDS]
+        fields = [name for name in UPDATABLE_EMPLOYEE_FIELDS if name in record]
+        cleaned, messages = clean_employee(record, taken_emails, taken_phones, fields=fields)
+        messages += [f"{name}: not an updatable field" for name in unknown]
+        if messages:
+            errors.append((index, messages))
+        else:
+            changes[emp] = cleaned
+    return changes, errors
+
+
+@api_view("POST", staff=True)
+@transaction.atomic
+def employees_batch(request):
+    """Create employees (with their user accounts) and update existing ones.
+
+    New accounts get an unusable password; the employee sets one with the
+    password-reset flow. ``"approve": true`` creates them already approved.
+    """
+    body, create, update = _batch(request)
+    changes, update_errors = _clean_updates(update)
+    taken_emails, taken_phones = taken(
+        emails={str(record.get("email") or "").strip().lower() for record in create},
+        phones={str(record.get("phone") or "").strip() for record in create},
+    )
+    taken_emails.update(cleaned["email"] for cleaned in changes.values() if "email" in cleaned)
+    taken_phones.update(cleaned["phone"] for cleaned in changes.values() if "phone" in cleaned)
+    employees, create_errors = [], []
+    for index, record in enumerate(create):
+        cleaned, messages = clean_employee(record, taken_emails, taken_phones)
+        if messages:
+            create_errors.append((index, messages))
+        employees.append(cleaned)
+    _invalid({"create": create_errors, "update": update_errors})
+
+    try:
+        updated = update_employees(changes)
+        created = []
+        if employees:
+            users = [User(username=cleaned["email"], email=cleaned["email"],
+                          first_name=cleaned["f_name"], last_name=cleaned["l_name"])
+                     for cleaned in employees]
+            for user in users:
+                user.set_unusable_password()
+            created = create_employees(users, resolve_lookups(employees), approve=bool(body.get("approve")))
+    except IntegrityError as e:
+        raise ApiError(f"Conflict with existing data: {e}", status=409)
+    except DataError as e:
+        # clean_employee applies the model fields' checks, so this is a value
+        # the database rejects beyond them (e.g. a character set it cannot store)
+        raise ApiError(f"Invalid value; nothing was written: {e}")
+    return api_response({
+        "created": [serialize_emp(emp, STAFF_EMPLOYEE_FIELDS) for emp in created],
+        "updated": [serialize_emp(emp, STAFF_EMPLOYEE_FIELDS) for emp in updated],
+    }, status=201 if created else 200)
+
+
+# ================== Tickets ==================
+
+def serialize_ticket(ticket, fields=TICKET_FIELDS):
+    return {name: ticket.user_id if name == "user" else getattr(ticket, name) for name in fields}
+
+
+@api_view("GET")
+@use_replica
+def tickets(request):
+    # ?type=ticket|guest_ticket (staff), ?status=open|in_progress|resolved, newest first
+    kind = request.GET.get("type", "ticket")
+    if kind not in TICKET_TYPES:
+        raise ApiError(f"type must be one of: {', '.join(TICKET_TYPES)}.")
+    if request.user.is_staff:
+        queryset = Ticket.objects.filter(**TICKET_TYPES[kind])
+    elif kind == "ticket":
+        queryset = Ticket.objects.filter(user=request.user)
+    else:
+        raise ApiError("Staff only.", status=403)
+    fields = _fields(request, TICKET_FIELDS, always="id")
+    queryset = filter_status(queryset, request.GET.get("status")).only(*fields)
+    page = keyset_paginate(queryset, request.GET, key="-pk", per_page=_limit(request))
+    return _page(page, lambda ticket: serialize_ticket(ticket, fields))
+
+
+def _new_ticket(request, record):
+    # Tickets for the caller; staff may also record guest tickets ({"email": ...})
+    if request.user.is_staff and record.get("email"):
+        form = GuestSupportTicketForm(record)
+    else:
+        form = SupportTicketForm(record)
+    if not form.is_valid():
+        return None, [f"{name}: {' '.join(messages)}" for name, messages in form.errors.items()]
+    ticket = form.save(commit=False)
+    if isinstance(form, SupportTicketForm):
+        ticket.user = request.user
+        ticket.email = request.user.email
+    return ticket, []
+
+
+@api_view("POST")
+@transaction.atomic
+def tickets_batch(request):
+    """Open tickets and (staff only) move tickets through the status workflow.
+
+    ``update`` records are ``{"id": ..., "status": ...}``; each status
+    costs one ``set_status`` call, whatever the number of tickets.
+    """
+    _, create, update = _batch(request)
+    if update and not request.user.is_staff:
+        raise ApiError("Only staff may update tickets.", status=403)
+
+    new, create_errors = [], []
+    for index, record in enumerate(create):
+        ticket, messages = _new_ticket(request, record)
+        if messages:
+            create_errors.append((index, messages))
+        new.append(ticket)
+
+    by_status, update_errors = defaultdict(list), []
+    ids = [_id(record, "id") for record in update]
+    existing = set(
+        Ticket.objects.filter(pk__in=[pk for pk in ids if pk is not None]).values_list("pk", flat=True)
+    )
+    for index, (record, pk) in enumerate(zip(update, ids)):
+        messages = []
+        if pk is None:
+            messages.append("id: must be an integer")
+        elif pk not in existing:
+            messages.append(f"id: no ticket {pk}")
+        status = record.get("status")
+        if not isinstance(status, str) or status not in TRANSITIONS:
+            messages.append(f"status: must be one of {', '.join(TRANSITIONS)}")
+        if messages:
+            update_errors.append((index, messages))
+        else:
+            by_status[status].append(pk)
+    _invalid({"create": create_errors, "update": update_errors})
+
+    created = create_tickets(new)
+    updated = sum(set_status(Ticket.objects.filter(pk__in=pks), status) for status, pks in by_status.items())
+    return api_response({
+        "created": [serialize_ticket(ticket) for ticket in created],
+        "updated": updated,
+    }, status=201 if created else 200)
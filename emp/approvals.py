@@ -0,0 +1,39 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from .backends import auth_user_key
+
+from .models import Profile
+from .outbox import enqueue_mass_mail
+
+
+APPROVAL_SUBJECT = 'Your Account Has Been Approved'
+APPROVAL_MESSAGE = 'Hi, your account is approved. You can now login.'
+
+
+def approve_profiles(queryset):
+    """Approve every not-yet-approved profile in ``queryset``.
+
+    Uses one UPDATE for the profiles and one INSERT to queue all approval
+    mails (the worker delivers them over a single connection). Profiles
+    that were already approved are skipped, so nobody is mailed twice.
+    Returns the number of newly approved profiles.
+    """
+    with transaction.atomic():
+        pending = list(
+            queryset.filter(is_approved=False)
+            .select_for_update(of=('self',))
+            .values_list('pk', 'user_id', 'user__email')
+        )
+        if not pending:
+            return 0
+
+        Profile.objects.filter(pk__in=[pk for pk, _, _ in pending]).update(is_approved=True)
+        enqueue_mass_mail(
+            (APPROVAL_SUBJECT, APPROVAL_MESSAGE, [email]) for _, _, email in pending
+        )
+        # The UPDATE sends no signals; drop the cached auth users ourselves.
+        transaction.on_commit(
+            lambda: cache.delete_many([auth_user_key(user_id) for _, user_id, _ in pending])
+        )
+    return len(pending)
@@ -6,4 +6,8 @@ class EmpConfig(AppConfig):
     name = 'emp'
 
     def ready(self):
-        import emp.signals 
\ No newline at end of file
+        import emp.checks
+        import emp.signals
+        from emp.validators import common_passwords
+        # Decompress the common-password list at startup, not on the first registration.
+        common_passwords() 
\ No newline at end of file
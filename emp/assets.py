@@ -0,0 +1,52 @@
+"""Third-party front-end assets, pinned in one place.
+
+``manage.py vendor_assets`` copies them into ``static/vendor/``. With
+``EMP_VENDORED_STATIC`` on, the ``{% asset_css %}``/``{% asset_js %}`` tags
+(emp.templatetags.emp_assets) serve those copies through the staticfiles
+storage, which gives them hashed, pre-compressed names in production;
+otherwise the tags point at the CDN.
+"""
+CDN = "https://cdn.jsdelivr.net/npm/"
+
+
+class Asset:
+    def __init__(self, package, path, integrity=None, extra=()):
+        self.package = package      # npm "name@version"
+        self.path = path            # file inside the package
+        self.integrity = integrity  # SRI hash for the CDN copy, if known
+        self.extra = extra          # files it references (source maps, fonts)
+
+    @property
+    def cdn_url(self):
+        return f"{CDN}{self.package}/{self.path}"
+
+    @property
+    def static_path(self):
+        return self.vendored(self.path)
+
+    def vendored(self, path):
+        # static/vendor/<name>-<version>/..., no "@" to escape in URLs
+        return f"vendor/{self.package.replace('@', '-')}/{path}"
+
+    def files(self):
+        return (self.path, *self.extra)
+
+
+ASSETS = {
+    "bootstrap.css": Asset(
+        "bootstrap@5.3.7", "dist/css/bootstrap.min.css",
+        integrity="sha384-LN+7fdVzj6u52u30Kp6M/trliBMCMKTyK833zpbD+pXdCLuTusPj697FH4R/5mcr",
+        extra=("dist/css/bootstrap.min.css.map",),
+    ),
+    "bootstrap.js": Asset(
+        "bootstrap@5.3.7", "dist/js/bootstrap.bundle.min.js",
+        integrity="sha384-ndDqU0Gzau9qJ1lfW4pNLlhNTkCfHzAVBReH9diLvGRem5+R9g2FzA8ZGN954O5Q",
+        extra=("dist/js/bootstrap.bundle.min.js.map",),
+    ),
+    "bootstrap-icons.css": Asset(
+        "bootstrap-icons@1.11.3", "font/bootstrap-icons.css",
+        extra=("font/fonts/bootstrap-icons.woff2", "font/fonts/bootstrap-icons.woff"),
+    ),
+    "flatpickr.css": Asset("flatpickr@4.6.13", "dist/flatpickr.min.css"),
+    "flatpickr.js": Asset("flatpickr@4.6.13", "dist/flatpickr.min.js"),
+}
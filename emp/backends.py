@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .models import Profile
+
+
+UserModel = get_user_model()
+
+
+def auth_user_key(user_id):
+    return f"emp:auth:{user_id}"
+
+
+def invalidate_auth_user(user_id):
+    # After the commit: earlier, a concurrent request could cache the old
+    # (e.g. still active, still approved) user again
+    transaction.on_commit(lambda: cache.delete(auth_user_key(user_id)))
+
+
+def _timeout():
+    return getattr(settings, "EMP_CACHE_TIMEOUT", 3600)
+
+
+def _fields(instance, exclude=()):
+    return {field.attname: getattr(instance, field.attname)
+            for field in instance._meta.concrete_fields if field.attname not in exclude}
+
+
+def _pack(user):
+    """What ``get_user`` caches: the user and profile fields without the
+    password hash, plus the session hashes the password is needed for."""
+    try:
+        profile = _fields(user.profile)
+    except Profile.DoesNotExist:
+        profile = None
+    return {
+        "user": _fields(user, exclude=("password",)),
+        "profile": profile,
+        "session_hash": user.get_session_auth_hash(),
+        "fallback_hashes": list(user.get_session_auth_fallback_hash()),
+    }
+
+
+def _unpack(data, db):
+    # ``password`` stays deferred: reading it queries the database, and a
+    # save() of this instance only writes the loaded fields.
+    user = UserModel.from_db(db, list(data["user"]), list(data["user"].values()))
+    user.get_session_auth_hash = lambda: data["session_hash"]
+    user.get_session_auth_fallback_hash = lambda: iter(data["fallback_hashes"])
+    if data["profile"] is not None:
+        profile = Profile.from_db(db, list(data["profile"]), list(data["profile"].values()))
+        UserModel._meta.get_field("profile").set_cached_value(user, profile)
+        Profile._meta.get_field("user").set_cached_value(profile, user)
+    return user
+
+
+class ProfileModelBackend(ModelBackend):
+    """ModelBackend that loads ``user.profile`` in the same query as the user.
+
+    ``login_user`` checks ``Profile.is_approved`` without another query, and
+    the per-request user lookup (``get_user``) is served from the cache; the
+    signals in emp/signals.py drop the entry when the User or Profile changes.
+    The cache never holds the password hash (see ``_pack``). A miss reads
+    the primary even in a replica-routed view: a lagging replica could
+    otherwise put a deactivated or unapproved user back in the cache.
+    """
+
+    def _users(self):
+        return UserModel._default_manager.select_related("profile")
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return
+        try:
+            user = self._users().get(**{UserModel.USERNAME_FIELD: username})
+        except UserModel.DoesNotExist:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user.
+            UserModel().set_password(password)
+        else:
+            if user.check_password(password) and self.user_can_authenticate(user):
+                return user
+
+    def get_user(self, user_id):
+        key = auth_user_key(user_id)
+        data = cache.get(key)
+        if data is None:
+            try:
+                user = self._users().using(DEFAULT_DB_ALIAS).get(pk=user_id)
+            except UserModel.DoesNotExist:
+                return None
+            cache.set(key, _pack(user), _timeout())
+        else:
+            user = _unpack(data, DEFAULT_DB_ALIAS)
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        key = auth_user_key(user_id)
+        data = await cache.aget(key)
+        if data is None:
+            try:
+                user = await self._users().using(DEFAULT_DB_ALIAS).aget(pk=user_id)
+            except UserModel.DoesNotExist:
+                return None
+            await cache.aset(key, _pack(user), _timeout())
+        else:
+            user = _unpack(data, DEFAULT_DB_ALIAS)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Sum
+
+from .models import Emp, HeadcountRollup
+
+
+HEADCOUNT_KEY = "emp:headcount"
+DEPARTMENT_COUNTS_KEY = "emp:department_counts"
+_NO_EMP = False  # cached marker for "this user has no Emp record"
+
+# Cache misses read the primary, even in views routed to a replica: a lagging
+# replica would otherwise put old values back in the cache for EMP_CACHE_TIMEOUT.
+
+
+def _timeout():
+    return getattr(settings, "EMP_CACHE_TIMEOUT", 3600)
+
+
+def user_emp_key(user_id):
+    return f"emp:user:{user_id}"
+
+
+def get_headcount():
+    """Total number of employees, cached until an Emp is saved or deleted."""
+    total = cache.get(HEADCOUNT_KEY)
+    if total is None:
+        total = Emp.objects.using(DEFAULT_DB_ALIAS).count()
+        cache.set(HEADCOUNT_KEY, total, _timeout())
+    return total
+
+
+def get_department_counts():
+    """``{department id: headcount}``, cached like ``get_headcount``."""
+    counts = cache.get(DEPARTMENT_COUNTS_KEY)
+    if counts is None:
+        counts = dict(_department_counts())
+        cache.set(DEPARTMENT_COUNTS_KEY, counts, _timeout())
+    return counts
+
+
+def _department_counts():
+    # From the analytics rollups: rows per (department, designation), not per employee
+    rollups = HeadcountRollup.objects.using(DEFAULT_DB_ALIAS).order_by()
+    return rollups.values_list("department_id").annotate(total=Sum("headcount"))
+
+
+def get_user_emp(user):
+    """The Emp record linked to ``user`` (or ``None``), cached per user."""
+    key = user_emp_key(user.pk)
+    emp = cache.get(key)
+    if emp is None:
+        emp = Emp.objects.using(DEFAULT_DB_ALIAS).filter(user=user).first() or _NO_EMP
+        cache.set(key, emp, _timeout())
+    return emp or None
+
+
+async def aget_headcount():
+    total = await cache.aget(HEADCOUNT_KEY)
+    if total is None:
+        total = await Emp.objects.using(DEFAULT_DB_ALIAS).acount()
+        await cache.aset(HEADCOUNT_KEY, total, _timeout())
+    return total
+
+
+async def aget_department_counts():
+    counts = await cache.aget(DEPARTMENT_COUNTS_KEY)
+    if counts is None:
+        counts = {department: total async for department, total in _department_counts()}
+        await cache.aset(DEPARTMENT_COUNTS_KEY, counts, _timeout())
+    return counts
+
+
+async def aget_user_emp(user):
+    key = user_emp_key(user.pk)
+    emp = await cache.aget(key)
+    if emp is None:
+        emp = await Emp.objects.using(DEFAULT_DB_ALIAS).filter(user=user).afirst() or _NO_EMP
+        await cache.aset(key, emp, _timeout())
+    return emp or None
+
+
+def invalidate_emp_cache(user_ids=()):
+    """Drop the cached aggregates and the given users' Emp records once the
+    current transaction commits.
+
+    Dropping them earlier would let a concurrent reader cache the old rows
+    again, for EMP_CACHE_TIMEOUT, before the change is visible to it.
+    """
+    keys = [HEADCOUNT_KEY, DEPARTMENT_COUNTS_KEY] + [user_emp_key(pk) for pk in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.checks import Error, Tags, Warning, register
+
+from .assets import ASSETS
+from .versions import process_local_cache
+
+
+@register(Tags.staticfiles)
+def vendored_assets_check(app_configs, **kwargs):
+    """With EMP_VENDORED_STATIC on, every pinned asset must be in static/vendor/."""
+    if not getattr(settings, "EMP_VENDORED_STATIC", False):
+        return []
+    missing = [
+        asset.vendored(path)
+        for asset in ASSETS.values()
+        for path in asset.files()
+        if not finders.find(asset.vendored(path))
+    ]
+    if not missing:
+        return []
+    return [Warning(
+        f"{len(missing)} vendored asset file(s) are missing, e.g. {missing[0]}.",
+        hint="Run `manage.py vendor_assets`, or set EMP_VENDORED_STATIC=False to use the CDN.",
+        id="emp.W001",
+    )]
+
+
+@register(Tags.caches)
+def conditional_get_cache_check(app_configs, **kwargs):
+    """Data versions (emp.versions) only work in a cache every process shares."""
+    if not getattr(settings, "EMP_CONDITIONAL_GET", False) or not process_local_cache():
+        return []
+    return [Error(
+        "EMP_CONDITIONAL_GET is on, but the default cache is local to each process: a process "
+        "that missed a change would keep answering 304 Not Modified for the old page.",
+        hint="Set CACHE_URL to Redis or memcached, or EMP_CONDITIONAL_GET=False. "
+             "With a single server process, add emp.E001 to SILENCED_SYSTEM_CHECKS.",
+        id="emp.E001",
+    )]
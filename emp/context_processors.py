@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from .tickets import ALL, get_counts
+from .versions import get_versions, page_resources
+
+
+def _ticket_counts(user):
+    if not user.is_authenticated:
+        return {}
+    mine = ("ticket", str(user.pk))
+    if not user.is_staff:
+        return {"mine": get_counts(mine)[mine]}
+    employee, guest = ("ticket", ALL), ("guest_ticket", ALL)
+    counts = get_counts(mine, employee, guest)
+    return {
+        "mine": counts[mine],
+        "employee": counts[employee],
+        "guest": counts[guest],
+        "open_total": counts[employee]["open"] + counts[guest]["open"],
+    }
+
+
+def _ticket_counts_version(user):
+    versions = get_versions(page_resources(user, ()))
+    return ".".join(str(versions[key]) for key in sorted(versions))
+
+
+def ticket_counts(request):
+    """``ticket_counts`` for the navbar badge and admin dashboard.
+
+    Read from TicketCounter (one query, only if a template uses it).
+    ``ticket_counts_version`` changes whenever those counts may have
+    (emp.versions) and costs a cache lookup, not a query: the navbar
+    fragment is keyed on it.
+    """
+    user = getattr(request, "user", None)
+    if user is None:
+        return {}
+    return {
+        "ticket_counts": SimpleLazyObject(lambda: _ticket_counts(user)),
+        "ticket_counts_version": SimpleLazyObject(lambda: _ticket_counts_version(user)),
+    }
+
+
+def fragment_cache(request):
+    """``fragment_timeout``: seconds for the template fragment caches (0 = off)."""
+    return {"fragment_timeout": settings.EMP_FRAGMENT_CACHE_TIMEOUT}
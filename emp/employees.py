@@ -0,0 +1,166 @@
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .analytics import Rollups
+from .cache import invalidate_emp_cache
+from .lookups import DEPARTMENTS, DESIGNATIONS, normalize
+from .models import Emp, Profile
+from .search import index_instances
+from .sequences import allocate_emp_codes
+from .versions import DIRECTORY, bump
+
+
+# Validating and writing employees in bulk, shared by `manage.py
+# import_employees` and the batch endpoints of the JSON API (emp.api).
+
+EMP_FIELDS = (
+    "f_name", "l_name", "gender", "phone", "address", "joining_date",
+)
+# Names of Department/Designation rows, created on first use
+LOOKUP_FIELDS = ("department", "designation")
+
+
+def taken(emails=(), phones=(), exclude_users=()):
+    """The ``emails`` and ``phones`` already used by a User or Emp, in three queries.
+
+    Rows of ``exclude_users`` (user ids) do not count, so an update may
+    keep its own values.
+    """
+    users = User.objects.exclude(pk__in=exclude_users)
+    emps = Emp.objects.exclude(user_id__in=exclude_users)
+    taken_emails = set(users.filter(username__in=emails).values_list("username", flat=True))
+    taken_emails.update(emps.filter(email__in=emails).values_list("email", flat=True))
+    taken_phones = set(emps.filter(phone__in=phones).values_list("phone", flat=True))
+    return taken_emails, taken_phones
+
+
+def clean_field(name, value):
+    """Validate one Emp field from untrusted input; lookups stay normalized names."""
+    if value is not None and not isinstance(value, str):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValidationError("Enter a text value.")
+        value = str(value)  # e.g. a phone number written as a JSON number
+    if name in LOOKUP_FIELDS:
+        value = normalize(value if isinstance(value, str) else "")
+        if not value:
+            raise ValidationError("This field cannot be blank.")
+        if len(value) > 50:
+            raise ValidationError("Ensure this value has at most 50 characters.")
+        return value
+    value = value.strip() if isinstance(value, str) else value
+    if name == "email":
+        value = (value or "").lower()
+    # The model field's own validation, max_length included (a longer value
+    # would fail the whole INSERT instead of this row)
+    return Emp._meta.get_field(name).clean(value, None)
+
+
+def clean_employee(row, taken_emails, taken_phones, fields=("email", *EMP_FIELDS, *LOOKUP_FIELDS)):
+    """``(cleaned, errors)`` for one input row.
+
+    A valid row's email and phone are added to the taken sets, so later
+    rows of the same batch cannot reuse them.
+    """
+    cleaned, errors = {}, []
+    for name in fields:
+        try:
+            cleaned[name] = clean_field(name, row.get(name))
+        except ValidationError as e:
+            errors.append(f"{name}: {' '.join(e.messages)}")
+    if cleaned.get("email") in taken_emails:
+        errors.append(f"email {cleaned['email']} already exists")
+    if cleaned.get("phone") in taken_phones:
+        errors.append(f"phone {cleaned['phone']} already exists")
+    if not errors:
+        if "email" in cleaned:
+            taken_emails.add(cleaned["email"])
+        if "phone" in cleaned:
+            taken_phones.add(cleaned["phone"])
+    return cleaned, errors
+
+
+def resolve_lookups(employees):
+    """Swap the department/designation names in cleaned rows for their rows,
+    inserting any new names in one query per table."""
+    named = [cleaned for cleaned in employees if "department" in cleaned or "designation" in cleaned]
+    if not named:
+        return employees
+    departments = DEPARTMENTS.ensure({cleaned["department"] for cleaned in named if "department" in cleaned})
+    designations = DESIGNATIONS.ensure(
+        {cleaned["designation"] for cleaned in named if "designation" in cleaned},
+        defaults={cleaned["designation"]: {"department": departments[cleaned["department"]]}
+                  for cleaned in named if "designation" in cleaned and "department" in cleaned},
+    )
+    for cleaned in named:
+        if "department" in cleaned:
+            cleaned["department"] = departments[cleaned["department"]]
+        if "designation" in cleaned:
+            cleaned["designation"] = designations[cleaned["designation"]]
+    return employees
+
+
+def create_employees(users, employees, approve=False):
+    """Insert ``users`` (unsaved), their profiles and Emp rows from ``employees``
+    (cleaned rows with resolved lookups) in one transaction.
+
+    bulk_create skips the post_save signals, so profiles, emp_codes, search
+    documents, analytics rollups and the directory version are done here
+    in bulk instead of per row. Returns the new Emp rows.
+    """
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+        if any(user.pk is None for user in users):  # e.g. MySQL returns no ids
+            ids = dict(User.objects.filter(username__in=[u.username for u in users])
+                       .values_list("username", "pk"))
+            for user in users:
+                user.pk = ids[user.username]
+
+        Profile.objects.bulk_create(
+            [Profile(user=user, is_approved=approve) for user in users]
+        )
+        codes = allocate_emp_codes(len(users))
+        Emp.objects.bulk_create([
+            Emp(user=user, emp_code=code, **cleaned)
+            for user, code, cleaned in zip(users, codes, employees)
+        ])
+        emps = list(Emp.objects.filter(user__in=users).order_by("emp_id"))
+        index_instances(emps)
+        rollups = Rollups()
+        for cleaned in employees:
+            rollups.emp(cleaned["department"].pk, cleaned["designation"].pk, cleaned["joining_date"])
+        rollups.apply()
+        bump(DIRECTORY)
+
+    invalidate_emp_cache()
+    return emps
+
+
+def update_employees(changes):
+    """Apply ``{emp: cleaned changes}`` to loaded Emp rows with one bulk UPDATE.
+
+    Like ``create_employees`` this does the signal work in bulk: versions,
+    search documents, analytics rollups and caches.
+    """
+    if not changes:
+        return []
+    resolve_lookups(list(changes.values()))
+    rollups = Rollups()
+    fields = {"version"}
+    with transaction.atomic():
+        for emp, cleaned in changes.items():
+            was = (emp.department_id, emp.designation_id, emp.joining_date)
+            for name, value in cleaned.items():
+                setattr(emp, name, value)
+            fields.update(cleaned)
+            emp.version += 1
+            rollups.emp(*was, sign=-1)
+            rollups.emp(emp.department_id, emp.designation_id, emp.joining_date)
+        emps = list(changes)
+        Emp.objects.bulk_update(emps, sorted(fields))
+        index_instances(emps)
+        rollups.apply()
+        bump(DIRECTORY)
+
+    invalidate_emp_cache([emp.user_id for emp in emps])
+    return emps
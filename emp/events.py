@@ -0,0 +1,289 @@
+"""Server-sent ticket events (``/emp/events/tickets/``).
+
+Pages that list tickets (help_support, the staff inbox, the admin
+changelist) hold one EventSource connection and hear about new tickets
+and status changes, instead of re-rendering the whole page on a timer.
+
+Ticket changes are published once their transaction commits (the post_save
+signal for single saves; ``set_status`` and ``create_tickets`` for bulk
+ones) to the ticket's owner and to staff. The channels are the
+``emp.versions`` ticket resources. An in-process ``EventBus`` fans each
+event out to the connections of this process; its backend carries events
+between processes:
+
+- ``LocalBackend``: this process only (a single ASGI server process);
+- ``RedisBackend``: every process publishes to, and listens on, one Redis
+  channel (``EMP_EVENTS_REDIS_URL``).
+
+Delivery is best effort. A client that may have missed events (a full
+queue, a lost Redis connection, a reconnect after changes) gets a
+``resync`` event and reloads the page.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Ticket
+from .versions import aget_versions, ticket_resources
+
+try:
+    import redis
+    import redis.asyncio
+except ImportError:  # optional: only RedisBackend needs it
+    redis = None
+
+logger = logging.getLogger("emp.events")
+
+# Event types
+CREATED = "created"  # a new ticket
+STATUS = "status"  # a ticket moved to another status
+RESYNC = "resync"  # events may have been missed: reload the page
+
+STATUS_LABELS = dict(Ticket.STATUS_CHOICES)
+
+
+def _now():
+    return time.time_ns() // 1000
+
+
+def frame(event, data, event_id=None):
+    """One ``text/event-stream`` message."""
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {event}", f"data: {json.dumps(data, separators=(',', ':'))}"]
+    return "\n".join(lines) + "\n\n"
+
+
+# ================== Bus ==================
+
+class Subscription:
+    """One connection's queue of frames: filled from any thread, read on its event loop."""
+
+    def __init__(self, bus, channels):
+        self.bus = bus
+        self.channels = channels
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(getattr(settings, "EMP_EVENTS_QUEUE_SIZE", 100))
+        self.lagged = False
+
+    def put(self, message):
+        # Runs on self.loop
+        if message is None or self.queue.full():
+            self.lagged = True  # frames were dropped: the client resyncs instead
+        else:
+            self.queue.put_nowait(message)
+
+    async def get(self, timeout):
+        """The next frame, or None after ``timeout`` seconds without one."""
+        if self.lagged:
+            self.lagged = False
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            return frame(RESYNC, {}, _now())
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """Fans frames out to this process's subscriptions; the backend carries
+    published frames to every process (``deliver``)."""
+
+    def __init__(self, backend_class):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)  # channel -> subscriptions
+        self.backend = backend_class(self)
+
+    def subscribe(self, channels):
+        """Subscribe the calling coroutine's event loop to ``channels``."""
+        subscription = Subscription(self, tuple(channels))
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions[channel].add(subscription)
+        self.backend.listen(subscription.loop)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscriptions = self._subscriptions.get(channel)
+                if subscriptions is not None:
+                    subscriptions.discard(subscription)
+                    if not subscriptions:
+                        del self._subscriptions[channel]
+
+    def publish(self, messages):
+        """Send ``[(channels, frame), ...]`` to subscribers in every process."""
+        if messages:
+            self.backend.publish(messages)
+
+    def deliver(self, messages):
+        """Queue each frame once for every local subscription of any of its channels."""
+        for channels, message in messages:
+            with self._lock:
+                subscriptions = set().union(*(self._subscriptions.get(channel, ()) for channel in channels))
+            for subscription in subscriptions:
+                self._put(subscription, message)
+
+    def resync_all(self):
+        """Tell every local subscription it may have missed events."""
+        with self._lock:
+            subscriptions = set().union(*self._subscriptions.values())
+        for subscription in subscriptions:
+            self._put(subscription, None)
+
+    def _put(self, subscription, message):
+        try:
+            subscription.loop.call_soon_threadsafe(subscription.put, message)
+        except RuntimeError:  # its event loop is closed
+            self.unsubscribe(subscription)
+
+
+# ================== Backends ==================
+
+class LocalBackend:
+    """Delivers within this process only: enough for one ASGI server process."""
+
+    def __init__(self, bus):
+        self.bus = bus
+
+    def publish(self, messages):
+        self.bus.deliver(messages)
+
+    def listen(self, loop):
+        pass
+
+
+class RedisBackend:
+    """Publishes every batch of events as one message on one Redis channel;
+    each process keeps one subscriber connection and delivers locally."""
+
+    CHANNEL = "emp:events"
+
+    def __init__(self, bus):
+        if redis is None:
+            raise ImproperlyConfigured("emp.events.RedisBackend requires the redis package.")
+        self.url = getattr(settings, "EMP_EVENTS_REDIS_URL", None)
+        if not self.url:
+            raise ImproperlyConfigured("emp.events.RedisBackend requires EMP_EVENTS_REDIS_URL.")
+        self.bus = bus
+        self.client = redis.Redis.from_url(self.url)
+        self._listener = None
+
+    def publish(self, messages):
+        try:
+            self.client.publish(self.CHANNEL, json.dumps(messages))
+        except redis.RedisError:
+            # The change itself is committed; clients catch up on their next reload
+            logger.warning("Could not publish %d ticket event(s)", len(messages), exc_info=True)
+
+    def listen(self, loop):
+        # One subscriber task per process, started by the first connection
+        if self._listener is None or self._listener.done():
+            self._listener = loop.create_task(self._listen())
+
+    async def _listen(self):
+        delay = 1
+        while True:
+            client = redis.asyncio.Redis.from_url(self.url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.CHANNEL)
+                    delay = 1
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.bus.deliver(json.loads(message["data"]))
+            except redis.RedisError:
+                logger.warning("Lost the Redis event subscription; retrying in %ds", delay, exc_info=True)
+                self.bus.resync_all()  # whatever was published meanwhile is gone
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+            finally:
+                await client.aclose()
+
+
+_bus = None
+
+
+def get_bus():
+    """The process's bus, with ``EMP_EVENTS_BACKEND`` (a dotted path), else
+    RedisBackend when ``EMP_EVENTS_REDIS_URL`` is set, else LocalBackend."""
+    global _bus
+    if _bus is None:
+        path = getattr(settings, "EMP_EVENTS_BACKEND", None)
+        if path:
+            backend_class = import_string(path)
+        elif getattr(settings, "EMP_EVENTS_REDIS_URL", None):
+            backend_class = RedisBackend
+        else:
+            backend_class = LocalBackend
+        _bus = EventBus(backend_class)
+    return _bus
+
+
+# ================== Publishing ==================
+
+def publish_tickets(event, rows):
+    """Publish ``event`` for each ``(pk, user_id, status, subject)`` to the
+    ticket's owner and to staff, once the current transaction commits."""
+    rows = list(rows)
+    if rows:
+        transaction.on_commit(lambda: _publish(event, rows))
+
+
+def _publish(event, rows):
+    now = _now()
+    get_bus().publish([
+        (ticket_resources([user_id]), frame(event, {
+            "id": pk,
+            "kind": "ticket" if user_id is not None else "guest_ticket",
+            "user": user_id,
+            "status": status,
+            "label": STATUS_LABELS.get(status, status),
+            "subject": subject,
+        }, now + i))
+        for i, (pk, user_id, status, subject) in enumerate(rows)
+    ])
+
+
+def ticket_rows(tickets):
+    return [(ticket.pk, ticket.user_id, ticket.status, ticket.subject) for ticket in tickets]
+
+
+# ================== Streaming ==================
+
+async def stream(channels, last_event_id=None):
+    """Frames for ``channels`` until ``EMP_EVENTS_MAX_AGE`` seconds pass.
+
+    Idle connections get a heartbeat every ``EMP_EVENTS_HEARTBEAT`` seconds
+    (proxies keep the connection open). Every heartbeat carries an id, so
+    a reconnecting client reports how current it is. If any of its
+    channels' data versions is newer, it gets a ``resync``.
+    """
+    heartbeat = getattr(settings, "EMP_EVENTS_HEARTBEAT", 15)
+    subscription = get_bus().subscribe(channels)
+    try:
+        if last_event_id is not None:
+            versions = await aget_versions(channels)
+            if max(versions.values(), default=0) > last_event_id:
+                yield frame(RESYNC, {}, _now())
+        yield f"retry: {getattr(settings, 'EMP_EVENTS_RETRY_MS', 5000)}\nid: {_now()}\n\n"
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + getattr(settings, "EMP_EVENTS_MAX_AGE", 300)
+        while (remaining := deadline - loop.time()) > 0:
+            message = await subscription.get(min(heartbeat, remaining))
+            yield message if message is not None else f"id: {_now()}\n: keepalive\n\n"
+    finally:
+        subscription.close()
@@ -0,0 +1,50 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Emp
+
+
+EXPORT_FIELDS = (
+    'emp_code', 'f_name', 'l_name', 'gender', 'phone', 'email',
+    'address', 'department', 'designation', 'joining_date',
+)
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+# values_list() columns behind EXPORT_FIELDS (names via a join on the lookup tables' primary keys)
+EXPORT_COLUMNS = tuple(
+    f'{field}__name' if field in ('department', 'designation') else field for field in EXPORT_FIELDS
+)
+CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """File-like object whose write() just hands the line back to csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset=None, fmt='csv', chunk_size=CHUNK_SIZE):
+    """Yield the employees in ``queryset`` as CSV or JSON Lines text chunks.
+
+    Rows are fetched with a server-side ``.iterator()`` in ``chunk_size``
+    batches, so memory use does not depend on the size of the table.
+    """
+    if queryset is None:
+        queryset = Emp.objects.all()
+    rows = queryset.order_by('emp_id').values_list(*EXPORT_COLUMNS).iterator(chunk_size=chunk_size)
+
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(EXPORT_FIELDS)
+        for row in rows:
+            yield writer.writerow(row)
+    elif fmt == 'jsonl':
+        encoder = DjangoJSONEncoder()
+        for row in rows:
+            yield encoder.encode(dict(zip(EXPORT_FIELDS, row))) + '\n'
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
@@ -1,7 +1,8 @@
 from django import forms
 from django.contrib.auth.forms import PasswordResetForm
 from django.contrib.auth.models import User
-from .models import SupportTicket, GuestSupportTicket
+from .lookups import DEPARTMENTS, DESIGNATIONS
+from .models import Ticket
 
 
 class CustomPasswordResetForm(PasswordResetForm):
@@ -15,12 +16,70 @@ class CustomPasswordResetForm(PasswordResetForm):
 
 class SupportTicketForm(forms.ModelForm):
     class Meta:
-        model = SupportTicket
+        model = Ticket
         fields = ["subject", "message"]
 
 
 class GuestSupportTicketForm(forms.ModelForm):
     class Meta:
-        model = GuestSupportTicket
+        model = Ticket
         fields = ["email", "subject", "message"]
 
+
+
+class LookupChoiceField(forms.ModelChoiceField):
+    """A ModelChoiceField over a lookup table (emp.lookups): the chosen row
+    comes from the in-memory snapshot, and only an id missing from it costs
+    a query (one primary key lookup, which rejects unknown ids)."""
+
+    def __init__(self, table, **kwargs):
+        self.table = table
+        super().__init__(table.model.objects.all(), **kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            row = self.table.rows().get(int(value))
+        except (TypeError, ValueError):
+            raise forms.ValidationError(self.error_messages["invalid_choice"], code="invalid_choice")
+        return row or super().to_python(value)
+
+
+class EmpLookupForm(forms.Form):
+    """The department and designation chosen in the add/update forms."""
+    department = LookupChoiceField(DEPARTMENTS)
+    designation = LookupChoiceField(DESIGNATIONS)
+
+    def clean(self):
+        data = super().clean()
+        department, designation = data.get("department"), data.get("designation")
+        if department and designation and designation.department_id not in (None, department.pk):
+            raise forms.ValidationError("This designation belongs to another department.")
+        return data
+
+
+class EmpFilterForm(forms.Form):
+    department = forms.CharField(max_length=50, required=False)
+    designation = forms.CharField(max_length=50, required=False)
+    joined_from = forms.DateField(required=False)
+    joined_to = forms.DateField(required=False)
+
+    def filter(self, queryset, departments=None, designations=None):
+        """Apply the cleaned filters to an Emp queryset (in the database).
+
+        Department/designation names are resolved through the lookup tables
+        (``departments``/``designations`` snapshots, loaded if not given), so
+        the query filters on the indexed id columns.
+        """
+        data = self.cleaned_data
+        for field, table, rows in (("department", DEPARTMENTS, departments),
+                                   ("designation", DESIGNATIONS, designations)):
+            if data.get(field):
+                row = (rows or table.rows()).find(data[field])
+                queryset = queryset.filter(**{field: row}) if row else queryset.none()
+        if data.get("joined_from"):
+            queryset = queryset.filter(joining_date__gte=data["joined_from"])
+        if data.get("joined_to"):
+            queryset = queryset.filter(joining_date__lte=data["joined_to"])
+        return queryset
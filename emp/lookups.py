@@ -0,0 +1,152 @@
+import time
+
+from django.conf import settings
+
+from .models import Department, Designation, Emp
+
+
+def normalize(name):
+    """Collapse whitespace; lookups compare the result case-insensitively."""
+    return " ".join((name or "").split())
+
+
+def _timeout():
+    return getattr(settings, "EMP_LOOKUP_TIMEOUT", 300)
+
+
+class Rows:
+    """An immutable snapshot of a lookup table.
+
+    ``after_miss`` marks a snapshot loaded because an id was missing from
+    the previous one (see ``LookupTable.get``).
+    """
+
+    def __init__(self, objects, after_miss=False):
+        self.all = sorted(objects, key=lambda obj: obj.name.casefold())
+        self.by_id = {obj.pk: obj for obj in objects}
+        self.by_name = {obj.name.casefold(): obj for obj in objects}
+        self.loaded_at = time.monotonic()
+        self.after_miss = after_miss
+
+    def get(self, pk):
+        return self.by_id.get(pk)
+
+    def find(self, name):
+        return self.by_name.get(normalize(name).casefold())
+
+
+class LookupTable:
+    """Every row of a small table, loaded once per process.
+
+    emp.signals drops the snapshot when a row is saved or deleted here;
+    ``EMP_LOOKUP_TIMEOUT`` seconds bounds how long other processes keep
+    serving an older one.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._rows = None
+
+    def _stale(self, rows):
+        return rows is None or time.monotonic() - rows.loaded_at > _timeout()
+
+    def _queryset(self):
+        return self.model.objects.order_by()
+
+    def rows(self, reload=False):
+        rows = self._rows
+        if reload or self._stale(rows):
+            rows = self._rows = Rows(list(self._queryset()))
+        return rows
+
+    async def arows(self, reload=False):
+        rows = self._rows
+        if reload or self._stale(rows):
+            rows = self._rows = Rows([obj async for obj in self._queryset()])
+        return rows
+
+    def get(self, pk):
+        """The row with ``pk``, or None.
+
+        A miss reloads the table, for a row added by another process, but at
+        most once per snapshot: until it expires, the reloaded snapshot
+        answers misses itself, so unknown ids cannot make every call reload.
+        """
+        rows = self.rows()
+        if rows.get(pk) is None and not rows.after_miss:
+            rows = self._rows = Rows(list(self._queryset()), after_miss=True)
+        return rows.get(pk)
+
+    async def aget(self, pk):
+        rows = await self.arows()
+        if rows.get(pk) is None and not rows.after_miss:
+            rows = self._rows = Rows([obj async for obj in self._queryset()], after_miss=True)
+        return rows.get(pk)
+
+    def invalidate(self):
+        self._rows = None
+
+    def ensure(self, names, defaults=None):
+        """``{name: row}`` for ``names``, inserting the missing ones in one query.
+
+        ``defaults`` maps a name to extra field values for its new row.
+        """
+        rows = self.rows()
+        missing = {}
+        for name in names:
+            if rows.find(name) is None:
+                missing.setdefault(normalize(name).casefold(), normalize(name))
+        if missing:
+            defaults = defaults or {}
+            self.model.objects.bulk_create(
+                [self.model(name=name, **defaults.get(name, {})) for name in missing.values()],
+                ignore_conflicts=True,
+            )
+            rows = self.rows(reload=True)  # bulk_create sends no signals
+        return {name: rows.find(name) for name in names}
+
+
+DEPARTMENTS = LookupTable(Department)
+DESIGNATIONS = LookupTable(Designation)
+
+
+def invalidate_lookups():
+    DEPARTMENTS.invalidate()
+    DESIGNATIONS.invalidate()
+
+
+def _set_cached(emp, field, row):
+    # Prime the relation cache only; never touch the *_id column.
+    if row is not None:
+        Emp._meta.get_field(field).set_cached_value(emp, row)
+
+
+def attach(emps):
+    """Fill in ``department``/``designation`` on ``emps`` from the lookup tables,
+    so reading their names costs no query."""
+    for emp in emps:
+        _set_cached(emp, "department", DEPARTMENTS.get(emp.department_id))
+        _set_cached(emp, "designation", DESIGNATIONS.get(emp.designation_id))
+    return emps
+
+
+async def aattach(emps):
+    for emp in emps:
+        _set_cached(emp, "department", await DEPARTMENTS.aget(emp.department_id))
+        _set_cached(emp, "designation", await DESIGNATIONS.aget(emp.designation_id))
+    return emps
+
+
+def designation_options():
+    """``{department id: [[designation id, name], ...]}`` for the add/update dropdowns.
+
+    Designations without a department are offered under every department.
+    """
+    designations = DESIGNATIONS.rows()
+    shared = [[d.pk, d.name] for d in designations.all if d.department_id is None]
+    options = {}
+    for d in designations.all:
+        if d.department_id is not None:
+            options.setdefault(d.department_id, []).append([d.pk, d.name])
+    return {pk: options.get(pk, []) + shared for pk in DEPARTMENTS.rows().by_id}
+
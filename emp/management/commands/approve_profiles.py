@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from emp.approvals import approve_profiles
+from emp.models import Profile
+
+
+class Command(BaseCommand):
+    help = "Approve pending profiles in bulk and queue their approval emails."
+
+    def add_arguments(self, parser):
+        parser.add_argument("emails", nargs="*",
+                            help="Emails of the users to approve.")
+        parser.add_argument("--all", action="store_true",
+                            help="Approve every pending profile.")
+
+    def handle(self, *args, **options):
+        if not options["emails"] and not options["all"]:
+            raise CommandError("Pass user emails or --all.")
+
+        profiles = Profile.objects.all()
+        if not options["all"]:
+            profiles = profiles.filter(user__email__in=options["emails"])
+
+        approved = approve_profiles(profiles)
+        self.stdout.write(f"Approved {approved} profile(s).")
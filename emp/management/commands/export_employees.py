@@ -0,0 +1,38 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from emp.exports import EXPORT_FORMATS, export_rows
+from emp.forms import EmpFilterForm
+from emp.models import Emp
+
+
+class Command(BaseCommand):
+    help = "Stream the employee directory as CSV or JSON Lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="csv")
+        parser.add_argument("--output", "-o", help="File to write to (default: stdout).")
+        parser.add_argument("--department")
+        parser.add_argument("--designation")
+        parser.add_argument("--joined-from", help="YYYY-MM-DD")
+        parser.add_argument("--joined-to", help="YYYY-MM-DD")
+
+    def handle(self, *args, **options):
+        filter_form = EmpFilterForm({
+            "department": options["department"],
+            "designation": options["designation"],
+            "joined_from": options["joined_from"],
+            "joined_to": options["joined_to"],
+        })
+        if not filter_form.is_valid():
+            raise CommandError(filter_form.errors.as_text())
+        employees = filter_form.filter(Emp.objects.all())
+
+        out = open(options["output"], "w", newline="", encoding="utf-8") if options["output"] else sys.stdout
+        try:
+            for chunk in export_rows(employees, options["format"]):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout:
+                out.close()
@@ -0,0 +1,131 @@
+import csv
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from emp.employees import clean_employee, create_employees, resolve_lookups, taken
+
+
+def read_rows(path, fmt):
+    """Yield ``(line_number, dict)`` pairs without loading the whole file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise CommandError(f"Line {line_number}: {e}")
+
+
+def hash_password(password):
+    """Validate and hash one password (runs in a worker process)."""
+    if not password:
+        return make_password(None), []
+    try:
+        validate_password(password)
+    except ValidationError as e:
+        return None, e.messages
+    return make_password(password), []
+
+
+class Command(BaseCommand):
+    help = "Bulk-import users, profiles and employees from a CSV or JSON Lines file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV (with a header row) or .jsonl file.")
+        parser.add_argument("--format", choices=["csv", "jsonl"],
+                            help="Input format (default: guessed from the file extension).")
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Rows inserted per transaction.")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Processes used to hash passwords (default: CPU count).")
+        parser.add_argument("--approve", action="store_true",
+                            help="Create the profiles already approved.")
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or ("jsonl" if options["path"].endswith((".jsonl", ".ndjson")) else "csv")
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        self.imported = self.skipped = 0
+        started = time.perf_counter()
+        try:
+            rows = read_rows(options["path"], fmt)
+        except OSError as e:
+            raise CommandError(e)
+
+        with ProcessPoolExecutor(max_workers=options["workers"], initializer=django.setup) as pool:
+            while True:
+                chunk = list(islice(rows, batch_size))
+                if not chunk:
+                    break
+                self.import_chunk(chunk, pool, options["approve"])
+
+        elapsed = time.perf_counter() - started
+        rate = self.imported / elapsed if elapsed else 0
+        self.stdout.write(
+            f"Imported {self.imported} employee(s), skipped {self.skipped} "
+            f"in {elapsed:.2f}s ({rate:.0f} rows/sec)."
+        )
+
+    def reject(self, line_number, errors):
+        self.skipped += 1
+        self.stderr.write(f"Row {line_number}: {'; '.join(errors)}")
+
+    def validate_chunk(self, chunk):
+        """Clean each row and drop those clashing with the DB or each other."""
+        rows = [row for _, row in chunk if isinstance(row, dict)]
+        taken_emails, taken_phones = taken(
+            emails={str(row.get("email") or "").strip().lower() for row in rows},
+            phones={str(row.get("phone") or "").strip() for row in rows},
+        )
+        valid = []
+        for line_number, row in chunk:
+            if not isinstance(row, dict):  # a JSON Lines value that is not an object
+                self.reject(line_number, [f"expected an object, got {type(row).__name__}"])
+                continue
+            if not isinstance(row.get("password") or "", str):
+                self.reject(line_number, ["password: Enter a text value."])
+                continue
+            cleaned, errors = clean_employee(row, taken_emails, taken_phones)
+            if errors:
+                self.reject(line_number, errors)
+                continue
+            valid.append((line_number, cleaned, row.get("password") or ""))
+        return valid
+
+    def import_chunk(self, chunk, pool, approve):
+        valid = self.validate_chunk(chunk)
+        hashes = pool.map(hash_password, [password for _, _, password in valid], chunksize=64)
+
+        users, employees = [], []
+        for (line_number, cleaned, _), (password_hash, errors) in zip(valid, hashes):
+            if errors:
+                self.reject(line_number, errors)
+                continue
+            users.append(User(
+                username=cleaned["email"], email=cleaned["email"], password=password_hash,
+                first_name=cleaned["f_name"], last_name=cleaned["l_name"],
+            ))
+            employees.append(cleaned)
+        if not users:
+            return
+
+        # Look the names up (one INSERT for any new ones), then insert everything in bulk
+        create_employees(users, resolve_lookups(employees), approve=approve)
+        self.imported += len(users)
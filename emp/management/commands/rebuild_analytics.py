@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from emp.analytics import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the analytics rollups (after bulk edits that bypass signals)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000,
+                            help="Rows aggregated per pass.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        total = rebuild_rollups(batch_size=options["batch_size"])
+        self.stdout.write(f"Rebuilt {total} analytics rollup row(s).")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from emp.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search documents for employees and tickets."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        total = rebuild_index(chunk_size=options["chunk_size"])
+        self.stdout.write(f"Indexed {total} document(s).")
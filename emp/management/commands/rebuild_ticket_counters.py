@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from emp.tickets import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "Recount the open/resolved ticket counters (after bulk edits that bypass signals)."
+
+    def handle(self, *args, **options):
+        total = rebuild_counters()
+        self.stdout.write(f"Rebuilt {total} ticket counter(s).")
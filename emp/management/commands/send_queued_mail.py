@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from emp.outbox import send_queued_mail
+
+
+class Command(BaseCommand):
+    help = "Deliver mail queued in the outbox over one pooled email connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100,
+                            help="Maximum number of mails delivered per pass.")
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep polling the outbox instead of exiting after one drain.")
+        parser.add_argument("--interval", type=float, default=5.0,
+                            help="Seconds to sleep between polls when the outbox is empty (with --loop).")
+
+    def handle(self, *args, **options):
+        while True:
+            total_sent = total_failed = 0
+            while True:
+                sent, failed = send_queued_mail(limit=options["batch_size"])
+                total_sent += sent
+                total_failed += failed
+                if sent + failed < options["batch_size"]:
+                    break
+
+            if total_sent or total_failed or not options["loop"]:
+                self.stdout.write(f"Sent {total_sent} mail(s), {total_failed} failed.")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
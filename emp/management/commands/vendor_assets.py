@@ -0,0 +1,45 @@
+import base64
+import hashlib
+from pathlib import Path
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from emp.assets import ASSETS, CDN
+
+
+def matches_integrity(content, integrity):
+    algorithm, _, expected = integrity.partition("-")
+    digest = base64.b64encode(hashlib.new(algorithm, content).digest()).decode()
+    return digest == expected
+
+
+class Command(BaseCommand):
+    help = "Download the pinned front-end assets (emp/assets.py) into static/vendor/."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Download files that already exist.")
+        parser.add_argument("--timeout", type=int, default=30, help="Seconds per download.")
+
+    def handle(self, *args, **options):
+        root = Path(settings.STATICFILES_DIRS[0])
+        fetched = 0
+        for name, asset in ASSETS.items():
+            for path in asset.files():
+                target = root / asset.vendored(path)
+                if target.exists() and not options["force"]:
+                    continue
+                url = f"{CDN}{asset.package}/{path}"
+                try:
+                    with urlopen(url, timeout=options["timeout"]) as response:
+                        content = response.read()
+                except OSError as exc:
+                    raise CommandError(f"Could not download {url}: {exc}")
+                if path == asset.path and asset.integrity and not matches_integrity(content, asset.integrity):
+                    raise CommandError(f"{url} does not match the pinned integrity hash for {name}.")
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_bytes(content)
+                fetched += 1
+                self.stdout.write(f"Fetched {asset.vendored(path)}")
+        self.stdout.write(f"Downloaded {fetched} file(s).")
@@ -0,0 +1,154 @@
+import json
+import logging
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import Template
+
+
+logger = logging.getLogger("emp.profiling")
+
+_current = ContextVar("emp_request_profile", default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    """A view ran more queries (or took longer) than its EMP_QUERY_BUDGETS entry."""
+
+
+class RequestProfile:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+
+
+def _profile_query(execute, sql, params, many, context):
+    # Execute wrapper installed on every connection; it only measures while
+    # a request is being profiled. The ContextVar follows the request into
+    # sync_to_async threads, whose connections are not the event loop's.
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.queries += 1
+        profile.db_time += time.perf_counter() - started
+
+
+def _install_query_wrapper(connection, **kwargs):
+    if _profile_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_profile_query)
+
+
+def _timed_render(render):
+    def wrapper(self, *args, **kwargs):
+        profile = _current.get()
+        if profile is None:
+            return render(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            profile.template_time += time.perf_counter() - started
+    wrapper.profiled = True
+    return wrapper
+
+
+def _budget_for(url_name):
+    budget = getattr(settings, "EMP_QUERY_BUDGETS", {}).get(url_name)
+    if budget is None:
+        return None, None
+    if isinstance(budget, dict):
+        return budget.get("queries"), budget.get("ms")
+    return budget, None
+
+
+class QueryProfilingMiddleware:
+    """Record query count, DB time, template time and total latency per request.
+
+    The figures go into a ``Server-Timing`` header, ``X-DB-Queries`` and a
+    JSON line on the ``emp.profiling`` logger. Requests whose URL name
+    appears in ``EMP_QUERY_BUDGETS`` are checked against their budget, and
+    with ``EMP_QUERY_BUDGETS_STRICT`` an overrun raises
+    ``QueryBudgetExceeded`` so it fails the test that made the request.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        if not getattr(Template.render, "profiled", False):
+            Template.render = _timed_render(Template.render)
+        connection_created.connect(_install_query_wrapper)
+        for alias in connections:
+            _install_query_wrapper(connections[alias])
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        profile = RequestProfile()
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        profile = RequestProfile()
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile, time.perf_counter() - started)
+
+    def finish(self, request, response, profile, total):
+        url_name = request.resolver_match.url_name if request.resolver_match else None
+        response["X-DB-Queries"] = str(profile.queries)
+        response["Server-Timing"] = (
+            f"db;dur={profile.db_time * 1000:.1f};desc=\"{profile.queries} queries\", "
+            f"tpl;dur={profile.template_time * 1000:.1f}, "
+            f"total;dur={total * 1000:.1f}"
+        )
+        logger.info(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "url_name": url_name,
+            "status": response.status_code,
+            "queries": profile.queries,
+            "db_ms": round(profile.db_time * 1000, 2),
+            "template_ms": round(profile.template_time * 1000, 2),
+            "total_ms": round(total * 1000, 2),
+        }))
+
+        self.check_budget(url_name, profile, total)
+        return response
+
+    def check_budget(self, url_name, profile, total):
+        max_queries, max_ms = _budget_for(url_name)
+        problems = []
+        if max_queries is not None and profile.queries > max_queries:
+            problems.append(f"{profile.queries} queries (budget {max_queries})")
+        if max_ms is not None and total * 1000 > max_ms:
+            problems.append(f"{total * 1000:.0f}ms (budget {max_ms}ms)")
+        if not problems:
+            return
+
+        message = f"View '{url_name}' exceeded its budget: {', '.join(problems)}"
+        if getattr(settings, "EMP_QUERY_BUDGETS_STRICT", False):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:15
+
+from django.db import migrations, models
+
+
+def seed_emp_code_sequence(apps, schema_editor):
+    # Start the counter after the highest numeric code already handed out.
+    Emp = apps.get_model('emp', 'Emp')
+    Sequence = apps.get_model('emp', 'Sequence')
+    last_num = 0
+    for code in Emp.objects.exclude(emp_code__isnull=True).values_list('emp_code', flat=True).iterator():
+        try:
+            last_num = max(last_num, int(code.replace('EMP', '')))
+        except ValueError:
+            continue
+    Sequence.objects.update_or_create(name='emp_code', defaults={'last_value': last_num})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sequence',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('last_value', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_emp_code_sequence, migrations.RunPython.noop),
+    ]
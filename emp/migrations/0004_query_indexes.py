@@ -0,0 +1,55 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emp', '0003_outboundemail'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emp',
+            index=models.Index(fields=['department', 'emp_id'], name='emp_department_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emp',
+            index=models.Index(fields=['designation', 'emp_id'], name='emp_designation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emp',
+            index=models.Index(fields=['department', 'designation'], name='emp_dept_desig_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emp',
+            index=models.Index(fields=['joining_date', 'emp_id'], name='emp_joining_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='guestsupportticket',
+            index=models.Index(fields=['email', '-created_at'], name='guest_email_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='guestsupportticket',
+            index=models.Index(fields=['is_resolved', '-created_at'], name='guest_resolved_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='guestsupportticket',
+            index=models.Index(condition=models.Q(('is_resolved', False)), fields=['-created_at'], name='guest_open_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='supportticket',
+            index=models.Index(fields=['user', '-created_at'], name='ticket_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='supportticket',
+            index=models.Index(fields=['is_resolved', '-created_at'], name='ticket_resolved_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='supportticket',
+            index=models.Index(condition=models.Q(('is_resolved', False)), fields=['-created_at'], name='ticket_open_created_idx'),
+        ),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:26
+
+from django.db import migrations, models
+
+
+# Native full-text index on emp_searchdocument.body, per database vendor.
+FULLTEXT_SQL = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE emp_searchdocument_fts USING fts5("
+        "body, content='emp_searchdocument', content_rowid='id')",
+        "CREATE TRIGGER emp_searchdocument_ai AFTER INSERT ON emp_searchdocument BEGIN "
+        "INSERT INTO emp_searchdocument_fts(rowid, body) VALUES (new.id, new.body); END",
+        "CREATE TRIGGER emp_searchdocument_ad AFTER DELETE ON emp_searchdocument BEGIN "
+        "INSERT INTO emp_searchdocument_fts(emp_searchdocument_fts, rowid, body) "
+        "VALUES ('delete', old.id, old.body); END",
+        "CREATE TRIGGER emp_searchdocument_au AFTER UPDATE ON emp_searchdocument BEGIN "
+        "INSERT INTO emp_searchdocument_fts(emp_searchdocument_fts, rowid, body) "
+        "VALUES ('delete', old.id, old.body); "
+        "INSERT INTO emp_searchdocument_fts(rowid, body) VALUES (new.id, new.body); END",
+    ],
+    'postgresql': [
+        "CREATE INDEX emp_searchdocument_tsv ON emp_searchdocument "
+        "USING gin (to_tsvector('simple', body))",
+    ],
+    'mysql': [
+        "ALTER TABLE emp_searchdocument ADD FULLTEXT INDEX emp_searchdocument_ft (body)",
+    ],
+}
+
+DROP_FULLTEXT_SQL = {
+    'sqlite': [
+        "DROP TRIGGER IF EXISTS emp_searchdocument_ai",
+        "DROP TRIGGER IF EXISTS emp_searchdocument_ad",
+        "DROP TRIGGER IF EXISTS emp_searchdocument_au",
+        "DROP TABLE IF EXISTS emp_searchdocument_fts",
+    ],
+    'postgresql': ["DROP INDEX IF EXISTS emp_searchdocument_tsv"],
+    'mysql': ["ALTER TABLE emp_searchdocument DROP INDEX emp_searchdocument_ft"],
+}
+
+
+def create_fulltext_index(apps, schema_editor):
+    for sql in FULLTEXT_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    for sql in DROP_FULLTEXT_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def index_existing_rows(apps, schema_editor):
+    # Documents for the rows that predate the index (the triggers/indexes
+    # above pick them up); later rows are indexed by emp.signals.
+    SearchDocument = apps.get_model('emp', 'SearchDocument')
+    sources = [
+        ('emp', apps.get_model('emp', 'Emp').objects.all(),
+         lambda e: [e.emp_code, e.f_name, e.l_name, e.email, e.department, e.designation]),
+        ('ticket', apps.get_model('emp', 'SupportTicket').objects.select_related('user'),
+         lambda t: [t.subject, t.message, t.user.email]),
+        ('guest_ticket', apps.get_model('emp', 'GuestSupportTicket').objects.all(),
+         lambda t: [t.subject, t.message, t.email]),
+    ]
+    batch = []
+    for kind, rows, text in sources:
+        for row in rows.order_by('pk').iterator(chunk_size=1000):
+            body = " ".join(str(value) for value in text(row) if value)
+            batch.append(SearchDocument(kind=kind, object_id=row.pk, body=body))
+            if len(batch) >= 1000:
+                SearchDocument.objects.bulk_create(batch)
+                batch = []
+    SearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emp', '0004_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('body', models.TextField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='search_document_unique')],
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(index_existing_rows, migrations.RunPython.noop),
+    ]
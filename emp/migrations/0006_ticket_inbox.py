@@ -0,0 +1,59 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:43
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_existing_tickets(apps, schema_editor):
+    TicketCounter = apps.get_model('emp', 'TicketCounter')
+    counters = {}
+    for model_name, kind, owner_field in [('SupportTicket', 'ticket', 'user_id'),
+                                          ('GuestSupportTicket', 'guest_ticket', 'email')]:
+        model = apps.get_model('emp', model_name)
+        rows = model.objects.order_by().values_list(owner_field, 'is_resolved').annotate(n=Count('pk'))
+        for owner, resolved, n in rows:
+            for key in (str(owner).lower(), '*'):
+                if (kind, key) not in counters:
+                    counters[kind, key] = TicketCounter(kind=kind, owner=key)
+                field = 'resolved_count' if resolved else 'open_count'
+                setattr(counters[kind, key], field, getattr(counters[kind, key], field) + n)
+    TicketCounter.objects.bulk_create(counters.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emp', '0005_searchdocument'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('owner', models.CharField(max_length=254)),
+                ('open_count', models.IntegerField(default=0)),
+                ('resolved_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='guestsupportticket',
+            index=models.Index(fields=['is_resolved', '-id'], name='guest_status_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='supportticket',
+            index=models.Index(fields=['user', 'is_resolved', '-id'], name='ticket_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='supportticket',
+            index=models.Index(fields=['is_resolved', '-id'], name='ticket_status_id_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='ticketcounter',
+            constraint=models.UniqueConstraint(fields=('kind', 'owner'), name='ticket_counter_unique'),
+        ),
+        migrations.RunPython(count_existing_tickets, migrations.RunPython.noop),
+    ]
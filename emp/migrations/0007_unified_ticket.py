@@ -0,0 +1,120 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:46
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_tickets(apps, schema_editor):
+    # Employee and guest tickets become Ticket rows (user empty for guests).
+    # Counters are keyed by user id / guest email, so they stay valid; the
+    # search documents point at the old ids and are rewritten. The old models
+    # did not record when a ticket was resolved: resolved ones get resolved_at
+    # = created_at, so they count in the rollups without a made-up duration.
+    SupportTicket = apps.get_model('emp', 'SupportTicket')
+    GuestSupportTicket = apps.get_model('emp', 'GuestSupportTicket')
+    Ticket = apps.get_model('emp', 'Ticket')
+    SearchDocument = apps.get_model('emp', 'SearchDocument')
+
+    def status(ticket):
+        return 'resolved' if ticket.is_resolved else 'open'
+
+    def resolved_at(ticket):
+        return ticket.created_at if ticket.is_resolved else None
+
+    def copy(rows, make, kind, batch_size=1000):
+        batch = []
+        for row in rows:
+            batch.append(make(row))
+            if len(batch) >= batch_size:
+                index(Ticket.objects.bulk_create(batch), kind)
+                batch = []
+        index(Ticket.objects.bulk_create(batch), kind)
+
+    def index(tickets, kind):
+        SearchDocument.objects.bulk_create([
+            SearchDocument(kind=kind, object_id=t.pk,
+                           body=" ".join(value for value in (t.subject, t.message, t.email) if value))
+            for t in tickets
+        ])
+
+    SearchDocument.objects.filter(kind__in=['ticket', 'guest_ticket']).delete()
+    copy(
+        SupportTicket.objects.select_related('user').order_by('pk').iterator(chunk_size=1000),
+        lambda t: Ticket(user_id=t.user_id, email=t.user.email, subject=t.subject, message=t.message,
+                         status=status(t), created_at=t.created_at, resolved_at=resolved_at(t)),
+        'ticket',
+    )
+    copy(
+        GuestSupportTicket.objects.order_by('pk').iterator(chunk_size=1000),
+        lambda t: Ticket(email=t.email, subject=t.subject, message=t.message,
+                         status=status(t), created_at=t.created_at, resolved_at=resolved_at(t)),
+        'guest_ticket',
+    )
+
+
+def copy_tickets_back(apps, schema_editor):
+    SupportTicket = apps.get_model('emp', 'SupportTicket')
+    GuestSupportTicket = apps.get_model('emp', 'GuestSupportTicket')
+    Ticket = apps.get_model('emp', 'Ticket')
+    SearchDocument = apps.get_model('emp', 'SearchDocument')
+    SearchDocument.objects.filter(kind__in=['ticket', 'guest_ticket']).delete()
+    for ticket in Ticket.objects.order_by('pk').iterator(chunk_size=1000):
+        fields = dict(subject=ticket.subject, message=ticket.message,
+                      is_resolved=ticket.status == 'resolved')
+        if ticket.user_id:
+            old = SupportTicket.objects.create(user_id=ticket.user_id, **fields)
+        else:
+            old = GuestSupportTicket.objects.create(email=ticket.email, **fields)
+        # created_at is auto_now_add on the old models
+        type(old).objects.filter(pk=old.pk).update(created_at=ticket.created_at)
+    # (search documents are restored by manage.py rebuild_search_index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emp', '0006_ticket_inbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ticket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254)),
+                ('subject', models.CharField(max_length=200)),
+                ('message', models.TextField()),
+                ('status', models.CharField(choices=[('open', 'Open'), ('in_progress', 'In progress'), ('resolved', 'Resolved')], default='open', max_length=12)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('resolved_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(copy_tickets, copy_tickets_back),
+        migrations.DeleteModel(
+            name='GuestSupportTicket',
+        ),
+        migrations.DeleteModel(
+            name='SupportTicket',
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['user', 'status', '-id'], name='ticket_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['status', '-id'], name='ticket_status_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('status', 'resolved'), _negated=True), fields=['-created_at'], name='ticket_unresolved_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['email', '-created_at'], name='ticket_email_created_idx'),
+        ),
+    ]
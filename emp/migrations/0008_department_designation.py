@@ -0,0 +1,150 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:05
+
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+# The options add_emp.html/update_emp.html used to hard-code
+KNOWN = {
+    "Human Resources": ["HR Executive", "HR Manager", "HR Assistant", "Recruitment Specialist", "Training Coordinator"],
+    "Information Technology": ["Software Developer", "Backend Developer", "Frontend Developer", "Full Stack Developer",
+                               "DevOps Engineer", "QA Tester", "System Administrator", "IT Support Engineer"],
+    "Design and Creative": ["UI/UX Designer", "Graphic Designer", "Creative Director", "Product Designer"],
+    "Interns": ["HR Intern", "Developer Intern", "Marketing Intern", "Finance Intern", "Admin Intern"],
+    "Administration": ["Admin Executive", "Office Manager", "Receptionist", "Clerk"],
+    "Customer Support": ["Customer Support Executive", "Call Center Agent", "Technical Support Executive",
+                         "Customer Relationship Manager"],
+    "Sales and Marketing": ["Sales Executive", "Sales Manager", "Marketing Executive", "Digital Marketing Specialist",
+                            "SEO Specialist", "Business Development Executive"],
+    "Management": ["Team Lead", "Project Manager", "Product Manager", "General Manager", "CEO", "COO", "CTO"],
+    "Finance": ["Accountant", "Senior Accountant", "Finance Manager", "Billing Executive", "Payroll Executive"],
+}
+
+
+def normalize(name):
+    return " ".join((name or "").split())[:50] or "Unassigned"
+
+
+def fill_lookups(apps, schema_editor):
+    # One row per distinct name, ignoring case and stray whitespace; the
+    # most common spelling wins (the form's spelling for the known ones).
+    Emp = apps.get_model('emp', 'Emp')
+    Department = apps.get_model('emp', 'Department')
+    Designation = apps.get_model('emp', 'Designation')
+
+    def spellings(column):
+        counts = {}
+        for raw, n in Emp.objects.order_by().values_list(column).annotate(n=Count('pk')):
+            name = normalize(raw)
+            counts.setdefault(name.casefold(), Counter())[name] += n
+        return {key: variants.most_common(1)[0][0] for key, variants in counts.items()}
+
+    departments = spellings('department')
+    departments.update({name.casefold(): name for name in KNOWN})
+    Department.objects.bulk_create([Department(name=name) for name in departments.values()])
+    lookup_names = {'department': dict(Department.objects.values_list('pk', 'name'))}
+    department_ids = {name.casefold(): pk for pk, name in lookup_names['department'].items()}
+
+    # A designation belongs to the department most of its employees are in
+    usual_department = {}
+    pairs = Emp.objects.order_by().values_list('designation', 'department').annotate(n=Count('pk'))
+    for designation, department, n in sorted(pairs, key=lambda row: row[2]):
+        usual_department[normalize(designation).casefold()] = normalize(department).casefold()
+    for department, names in KNOWN.items():
+        for name in names:
+            usual_department[name.casefold()] = department.casefold()
+
+    designations = spellings('designation')
+    designations.update({name.casefold(): name for names in KNOWN.values() for name in names})
+    Designation.objects.bulk_create([
+        Designation(name=name, department_id=department_ids.get(usual_department.get(key)))
+        for key, name in designations.items()
+    ])
+    lookup_names['designation'] = dict(Designation.objects.values_list('pk', 'name'))
+    designation_ids = {name.casefold(): pk for pk, name in lookup_names['designation'].items()}
+
+    # One UPDATE per distinct stored string
+    renamed = Q(pk__in=[])
+    for column, ids in (('department', department_ids), ('designation', designation_ids)):
+        for raw in Emp.objects.order_by().values_list(column, flat=True).distinct():
+            pk = ids[normalize(raw).casefold()]
+            Emp.objects.filter(**{column: raw}).update(**{f'{column}_ref_id': pk})
+            if raw != lookup_names[column][pk]:
+                renamed |= Q(**{column: raw})
+    reindex(apps, Emp.objects.filter(renamed), lookup_names)
+
+
+def reindex(apps, emps, lookup_names, batch_size=1000):
+    # The employees' search documents (emp.search) hold the old strings, e.g.
+    # "finance " where the row now points at "Finance": rewrite them.
+    SearchDocument = apps.get_model('emp', 'SearchDocument')
+    rows = emps.order_by('pk').values_list(
+        'pk', 'emp_code', 'f_name', 'l_name', 'email', 'department_ref_id', 'designation_ref_id')
+    batch = []
+    for pk, *text, department, designation in rows.iterator(chunk_size=batch_size):
+        text += [lookup_names['department'][department], lookup_names['designation'][designation]]
+        batch.append(SearchDocument(kind='emp', object_id=pk, body=" ".join(str(value) for value in text if value)))
+        if len(batch) >= batch_size:
+            write_documents(SearchDocument, batch)
+            batch = []
+    write_documents(SearchDocument, batch)
+
+
+def write_documents(SearchDocument, documents):
+    SearchDocument.objects.filter(kind='emp', object_id__in=[d.object_id for d in documents]).delete()
+    SearchDocument.objects.bulk_create(documents)
+
+
+def fill_strings(apps, schema_editor):
+    Emp = apps.get_model('emp', 'Emp')
+    Department = apps.get_model('emp', 'Department')
+    Designation = apps.get_model('emp', 'Designation')
+    for pk, name in Department.objects.values_list('pk', 'name'):
+        Emp.objects.filter(department_ref_id=pk).update(department=name)
+    for pk, name in Designation.objects.values_list('pk', 'name'):
+        Emp.objects.filter(designation_ref_id=pk).update(designation=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emp', '0007_unified_ticket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Department',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Designation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='designations', to='emp.department')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='emp',
+            name='department_ref',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='emp.department'),
+        ),
+        migrations.AddField(
+            model_name='emp',
+            name='designation_ref',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='emp.designation'),
+        ),
+        migrations.RunPython(fill_lookups, fill_strings),
+    ]
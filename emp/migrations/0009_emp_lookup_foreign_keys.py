@@ -0,0 +1,80 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Kept apart from 0008 so the data copy commits before the table is
+    # altered (Postgres refuses ALTER TABLE with pending FK checks). The
+    # string columns get a default first so that unapplying this migration
+    # can add them back to a populated table; 0008 then fills them in.
+
+    dependencies = [
+        ('emp', '0008_department_designation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='emp',
+            name='department',
+            field=models.CharField(default='', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='emp',
+            name='designation',
+            field=models.CharField(default='', max_length=50),
+        ),
+        migrations.RemoveIndex(
+            model_name='emp',
+            name='emp_department_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='emp',
+            name='emp_designation_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='emp',
+            name='emp_dept_desig_idx',
+        ),
+        migrations.RemoveField(
+            model_name='emp',
+            name='department',
+        ),
+        migrations.RemoveField(
+            model_name='emp',
+            name='designation',
+        ),
+        migrations.RenameField(
+            model_name='emp',
+            old_name='department_ref',
+            new_name='department',
+        ),
+        migrations.RenameField(
+            model_name='emp',
+            old_name='designation_ref',
+            new_name='designation',
+        ),
+        migrations.AlterField(
+            model_name='emp',
+            name='department',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, to='emp.department'),
+        ),
+        migrations.AlterField(
+            model_name='emp',
+            name='designation',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, to='emp.designation'),
+        ),
+        migrations.AddIndex(
+            model_name='emp',
+            index=models.Index(fields=['department', 'emp_id'], name='emp_department_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emp',
+            index=models.Index(fields=['designation', 'emp_id'], name='emp_designation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emp',
+            index=models.Index(fields=['department', 'designation'], name='emp_dept_desig_idx'),
+        ),
+    ]
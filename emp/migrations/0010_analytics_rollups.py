@@ -0,0 +1,76 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+
+def fill_rollups(apps, schema_editor):
+    # Same totals as emp.analytics.rebuild_rollups, from the historical models
+    Emp = apps.get_model('emp', 'Emp')
+    Ticket = apps.get_model('emp', 'Ticket')
+    HeadcountRollup = apps.get_model('emp', 'HeadcountRollup')
+    MonthlyRollup = apps.get_model('emp', 'MonthlyRollup')
+
+    def month(value):
+        return (timezone.localtime(value).date() if hasattr(value, 'hour') else value).replace(day=1)
+
+    HeadcountRollup.objects.bulk_create([
+        HeadcountRollup(department_id=department_id, designation_id=designation_id, headcount=n)
+        for department_id, designation_id, n in
+        Emp.objects.order_by().values_list('department_id', 'designation_id').annotate(n=Count('pk'))
+    ])
+    monthly = {}
+    for metric, rows in [
+        ('joiners', Emp.objects.order_by().values_list(TruncMonth('joining_date')).annotate(n=Count('pk'))),
+        ('tickets_opened', Ticket.objects.order_by().values_list(TruncMonth('created_at')).annotate(n=Count('pk'))),
+    ]:
+        for value, n in rows:
+            row = monthly.setdefault((metric, month(value)), MonthlyRollup(metric=metric, month=month(value)))
+            row.count += n
+    resolved = Ticket.objects.order_by().filter(resolved_at__isnull=False).values_list(
+        TruncMonth('resolved_at')).annotate(n=Count('pk'), total=Sum(F('resolved_at') - F('created_at')))
+    for value, n, total in resolved:
+        row = monthly.setdefault(('tickets_resolved', month(value)),
+                                 MonthlyRollup(metric='tickets_resolved', month=month(value)))
+        row.count += n
+        row.total_seconds += int(total.total_seconds())
+    MonthlyRollup.objects.bulk_create(monthly.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emp', '0009_emp_lookup_foreign_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('joiners', 'Joiners'), ('tickets_opened', 'Tickets opened'), ('tickets_resolved', 'Tickets resolved')], max_length=20)),
+                ('month', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('total_seconds', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('metric', 'month'), name='monthly_rollup_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='HeadcountRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('headcount', models.IntegerField(default=0)),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='emp.department')),
+                ('designation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='emp.designation')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('department', 'designation'), name='headcount_rollup_unique')],
+            },
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
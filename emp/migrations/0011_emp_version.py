@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emp', '0010_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emp',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
 
@@ -13,6 +14,42 @@ class Profile(models.Model):
     
 
 
+class Sequence(models.Model):
+    """Named counter handed out in blocks by emp.sequences."""
+    name = models.CharField(max_length=50, primary_key=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} ({self.last_value})"
+
+
+
+class Department(models.Model):
+    """Lookup table for Emp.department (cached in-process by emp.lookups)."""
+    name = models.CharField(max_length=50, unique=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
+
+class Designation(models.Model):
+    """Lookup table for Emp.designation; ``department`` groups the add/update dropdowns."""
+    name = models.CharField(max_length=50, unique=True)
+    department = models.ForeignKey(Department, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name="designations")
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
+
 class Emp(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, unique=True)  
     emp_id = models.AutoField(primary_key=True)
@@ -23,24 +60,41 @@ class Emp(models.Model):
     phone = models.CharField(max_length=15, unique=True)
     email = models.EmailField(max_length=50, unique=True)
     address = models.CharField(max_length=100)
-    department = models.CharField(max_length=50)
-    designation = models.CharField(max_length=50)
+    # Not db_index: the composite indexes in Meta lead with these columns
+    department = models.ForeignKey(Department, on_delete=models.PROTECT, db_index=False)
+    designation = models.ForeignKey(Designation, on_delete=models.PROTECT, db_index=False)
     joining_date = models.DateField()
+    # Bumped on every save; keys the cached view_emp row fragments
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        indexes = [
+            # view_emp filters + keyset order, admin list_filter
+            models.Index(fields=["department", "emp_id"], name="emp_department_idx"),
+            models.Index(fields=["designation", "emp_id"], name="emp_designation_idx"),
+            models.Index(fields=["department", "designation"], name="emp_dept_desig_idx"),
+            models.Index(fields=["joining_date", "emp_id"], name="emp_joining_date_idx"),
+        ]
 
     
     def save(self, *args, **kwargs):
         if not self.emp_code:  # Generate only when creating
-            last_emp = Emp.objects.exclude(emp_code__isnull=True).order_by('-emp_id').first()
-            if last_emp and last_emp.emp_code:
-                try:
-                    last_num = int(last_emp.emp_code.replace("EMP", ""))
-                except ValueError:
-                    last_num = 0
-                new_num = last_num + 1
-            else:
-                new_num = 1
-            self.emp_code = f"EMP{new_num:03d}"  # Format → EMP001, EMP002
+            from .sequences import next_emp_code
+            self.emp_code = next_emp_code()  # Format → EMP001, EMP002
+        reread = not self._state.adding and self._bump_version(kwargs)
         super(Emp, self).save(*args, **kwargs)
+        if reread:
+            del self.__dict__["version"]  # was an F() expression; loaded on next access
+
+    def _bump_version(self, kwargs):
+        # True if the new value is only known to the database (version was deferred)
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "version"}
+        if "version" in self.get_deferred_fields():
+            self.version = models.F("version") + 1
+            return True
+        self.version += 1
+        return False
 
 
     def __str__(self):
@@ -48,24 +102,160 @@ class Emp(models.Model):
 
 
 
-class SupportTicket(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE) 
+class Ticket(models.Model):
+    """A support request from an employee (``user`` set) or a guest (``user`` empty).
+
+    ``email`` is where replies go: the employee's login email, or the
+    address the guest typed in.
+    """
+    OPEN = "open"
+    IN_PROGRESS = "in_progress"
+    RESOLVED = "resolved"
+    STATUS_CHOICES = [(OPEN, "Open"), (IN_PROGRESS, "In progress"), (RESOLVED, "Resolved")]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    email = models.EmailField()
     subject = models.CharField(max_length=200)
     message = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
-    is_resolved = models.BooleanField(default=False)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default=OPEN)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    resolved_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # help_support: a user's tickets, keyset pages by status
+            models.Index(fields=["user", "status", "-id"], name="ticket_user_status_idx"),
+            # inbox / admin changelist: by status, newest first
+            models.Index(fields=["status", "-id"], name="ticket_status_id_idx"),
+            models.Index(fields=["-created_at"], name="ticket_unresolved_created_idx",
+                         condition=~models.Q(status="resolved")),
+            models.Index(fields=["email", "-created_at"], name="ticket_email_created_idx"),
+        ]
+
+    @property
+    def is_guest(self):
+        return self.user_id is None
+
+    @property
+    def is_resolved(self):
+        return self.status == self.RESOLVED
+
+    def save(self, *args, **kwargs):
+        # Keep resolved_at in step with status for single-row saves (admin, forms);
+        # emp.tickets.set_status does the same for bulk updates. Only stamped when
+        # the ticket becomes resolved, not when an already resolved one is saved.
+        from .tickets import was
+        if self.status == self.RESOLVED and self.resolved_at is None and (
+                self._state.adding or was(self, "status") != self.RESOLVED):
+            self.resolved_at = timezone.now()
+        elif self.status != self.RESOLVED:
+            self.resolved_at = None
+        super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"{self.subject} - {self.user.email}"
+        return f"{self.subject} - {self.email}"
 
 
-class GuestSupportTicket(models.Model):
-    email = models.EmailField()  
-    subject = models.CharField(max_length=200)
-    message = models.TextField()
+class TicketCounter(models.Model):
+    """Unresolved/resolved ticket counts kept up to date by emp.tickets.
+
+    ``kind`` is "ticket" (employees) or "guest_ticket"; ``owner`` is the
+    user id or the guest's email, and the ``"*"`` row of each kind holds
+    the totals. ``open_count`` includes in-progress tickets.
+    """
+    kind = models.CharField(max_length=20)
+    owner = models.CharField(max_length=254)
+    open_count = models.IntegerField(default=0)
+    resolved_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "owner"], name="ticket_counter_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.owner} ({self.open_count} open, {self.resolved_count} resolved)"
+
+
+
+class HeadcountRollup(models.Model):
+    """Employees per (department, designation), kept up to date by emp.analytics."""
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name="+")
+    designation = models.ForeignKey(Designation, on_delete=models.CASCADE, related_name="+")
+    headcount = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["department", "designation"], name="headcount_rollup_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.department_id}/{self.designation_id}: {self.headcount}"
+
+
+class MonthlyRollup(models.Model):
+    """A per-month total kept up to date by emp.analytics.
+
+    ``month`` is the first day of the month. ``total_seconds`` is only used
+    by ``tickets_resolved``: the summed time from opening to resolution.
+    """
+    JOINERS = "joiners"
+    TICKETS_OPENED = "tickets_opened"
+    TICKETS_RESOLVED = "tickets_resolved"
+    METRIC_CHOICES = [(JOINERS, "Joiners"), (TICKETS_OPENED, "Tickets opened"),
+                      (TICKETS_RESOLVED, "Tickets resolved")]
+
+    metric = models.CharField(max_length=20, choices=METRIC_CHOICES)
+    month = models.DateField()
+    count = models.IntegerField(default=0)
+    total_seconds = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["metric", "month"], name="monthly_rollup_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} {self.month:%Y-%m}: {self.count}"
+
+
+
+class OutboundEmail(models.Model):
+    """Mail queued by emp.outbox and delivered by ``manage.py send_queued_mail``."""
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = [(PENDING, "Pending"), (SENT, "Sent"), (FAILED, "Failed")]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    is_resolved = models.BooleanField(default=False)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
 
     def __str__(self):
-        return f"{self.subject} - {self.email}"
+        return f"{self.subject} -> {', '.join(self.recipients)}"
+
 
+class SearchDocument(models.Model):
+    """Flattened text of an Emp/Ticket row, indexed by the emp.search backend."""
+    kind = models.CharField(max_length=20)
+    object_id = models.PositiveBigIntegerField()
+    body = models.TextField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"], name="search_document_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id}"
@@ -0,0 +1,137 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+
+def enqueue_mail(subject, message, recipient_list, from_email=None):
+    """Queue a mail instead of talking to SMTP inside the request.
+
+    The row is written in the caller's transaction, so a mail queued from a
+    save inside ``transaction.atomic()`` is rolled back with it. Signal
+    handlers get no transaction of their own: callers saving in autocommit
+    would commit the save and the mail separately, which is why the
+    ticket views (``emp.tickets.save_ticket``), the admin and the bulk
+    helpers all save in one. With ``EMAIL_OUTBOX_DISPATCH_ON_COMMIT`` the
+    queued mail is also delivered right after that transaction commits
+    (handy for development and the locmem backend in tests); otherwise
+    ``manage.py send_queued_mail`` delivers it.
+    """
+    recipients = [address for address in recipient_list if address]
+    if not recipients:
+        return None
+
+    email = OutboundEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=recipients,
+    )
+    if getattr(settings, "EMAIL_OUTBOX_DISPATCH_ON_COMMIT", False):
+        transaction.on_commit(lambda: send_queued_mail(ids=[email.pk]))
+    return email
+
+
+def enqueue_mass_mail(datatuple, from_email=None):
+    """Queue many mails with one INSERT.
+
+    ``datatuple`` holds ``(subject, message, recipient_list)`` tuples, like
+    ``send_mass_mail``; the worker later delivers them over one connection.
+    """
+    from_email = from_email or settings.DEFAULT_FROM_EMAIL
+    emails = []
+    for subject, message, recipient_list in datatuple:
+        recipients = [address for address in recipient_list if address]
+        if recipients:
+            emails.append(OutboundEmail(
+                subject=subject, body=message, from_email=from_email, recipients=recipients,
+            ))
+    emails = OutboundEmail.objects.bulk_create(emails)
+
+    if emails and getattr(settings, "EMAIL_OUTBOX_DISPATCH_ON_COMMIT", False):
+        ids = [email.pk for email in emails]
+        if None in ids:  # backend can't return primary keys from bulk inserts
+            ids = None
+        transaction.on_commit(lambda: send_queued_mail(limit=len(emails), ids=ids))
+    return emails
+
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2*base, 4*base, ... capped."""
+    base = getattr(settings, "EMAIL_OUTBOX_RETRY_BASE_SECONDS", 60)
+    cap = getattr(settings, "EMAIL_OUTBOX_RETRY_MAX_SECONDS", 3600)
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), cap))
+
+
+def send_queued_mail(limit=100, ids=None, connection=None):
+    """Deliver due queued mail over a single backend connection.
+
+    Returns ``(sent, failed)`` for this pass. Failed deliveries are retried
+    with backoff until ``EMAIL_OUTBOX_MAX_ATTEMPTS`` is reached, then marked
+    as failed for good.
+
+    The batch is claimed in a short transaction that moves its
+    ``next_attempt_at`` past ``EMAIL_OUTBOX_CLAIM_SECONDS``, so parallel
+    workers skip it (and it comes due again if this one dies). Delivery
+    then runs outside any transaction: no row or database lock is held
+    while the mail server is slow.
+    """
+    max_attempts = getattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 5)
+    now = timezone.now()
+    sent = failed = 0
+
+    with transaction.atomic():
+        queued = OutboundEmail.objects.filter(status=OutboundEmail.PENDING, next_attempt_at__lte=now)
+        if ids is not None:
+            queued = queued.filter(pk__in=ids)
+        # Parallel workers skip rows another worker is claiming right now.
+        batch = list(queued.select_for_update(skip_locked=True).order_by("next_attempt_at", "pk")[:limit])
+        if not batch:
+            return sent, failed
+        claimed_until = now + timedelta(seconds=getattr(settings, "EMAIL_OUTBOX_CLAIM_SECONDS", 600))
+        OutboundEmail.objects.filter(pk__in=[email.pk for email in batch]).update(next_attempt_at=claimed_until)
+
+    own_connection = connection is None
+    connection = connection or get_connection()
+    try:
+        connection.open()
+        open_error = None
+    except Exception as e:
+        open_error = e
+
+    for email in batch:
+        email.attempts += 1
+        try:
+            if open_error is not None:
+                raise open_error
+            EmailMessage(
+                subject=email.subject,
+                body=email.body,
+                from_email=email.from_email,
+                to=email.recipients,
+                connection=connection,
+            ).send()
+        except Exception as e:
+            failed += 1
+            email.last_error = str(e)
+            if email.attempts >= max_attempts:
+                email.status = OutboundEmail.FAILED
+            else:
+                email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+        else:
+            sent += 1
+            email.status = OutboundEmail.SENT
+            email.sent_at = timezone.now()
+            email.last_error = ""
+
+    if own_connection and open_error is None:
+        connection.close()
+
+    OutboundEmail.objects.bulk_update(
+        batch, ["status", "attempts", "last_error", "next_attempt_at", "sent_at"]
+    )
+    return sent, failed
@@ -0,0 +1,105 @@
+from django.core.exceptions import ValidationError
+
+
+PER_PAGE = 50
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset.
+
+    ``next_cursor`` / ``prev_cursor`` are the key values to pass back as
+    ``?after=`` / ``?before=`` (``None`` when there is nothing in that
+    direction).
+    """
+
+    def __init__(self, object_list, next_cursor=None, prev_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+
+def _parse_cursor(field, raw):
+    if raw in (None, ""):
+        return None
+    try:
+        return field.to_python(raw)
+    except (ValidationError, TypeError, ValueError):
+        return None
+
+
+class _KeysetQuery:
+    """The ``LIMIT n+1`` query for one page, plus how to turn its rows into a page."""
+
+    def __init__(self, queryset, params, key, per_page):
+        self.per_page = per_page
+        descending = key.startswith("-")
+        self.name = name = key.lstrip("-")
+        opts = queryset.model._meta
+        field = opts.pk if name == "pk" else opts.get_field(name)
+
+        after = _parse_cursor(field, params.get("after"))
+        before = _parse_cursor(field, params.get("before"))
+        self.backwards = before is not None
+        self.after = after
+
+        if self.backwards:
+            # Walk backwards from the cursor, then flip the rows back around.
+            lookup = "gt" if descending else "lt"
+            reverse_key = name if descending else f"-{name}"
+            self.queryset = (
+                queryset.filter(**{f"{name}__{lookup}": before})
+                .order_by(reverse_key)[:per_page + 1]
+            )
+        else:
+            if after is not None:
+                lookup = "lt" if descending else "gt"
+                queryset = queryset.filter(**{f"{name}__{lookup}": after})
+            self.queryset = queryset.order_by(key)[:per_page + 1]
+
+    def page(self, rows):
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if self.backwards:
+            rows = rows[::-1]
+            has_previous, has_next = more, True
+        else:
+            has_previous, has_next = self.after is not None, more
+
+        if not rows:
+            return KeysetPage(rows)
+        return KeysetPage(
+            rows,
+            next_cursor=getattr(rows[-1], self.name) if has_next else None,
+            prev_cursor=getattr(rows[0], self.name) if has_previous else None,
+        )
+
+
+def keyset_paginate(queryset, params, key="pk", per_page=PER_PAGE):
+    """Slice ``queryset`` with a ``WHERE key > cursor LIMIT n`` query.
+
+    ``key`` must be a unique, indexed column (prefix with ``-`` for
+    descending order). Unlike OFFSET pagination the cost of a page does not
+    grow with how deep into the result set it is.
+    """
+    query = _KeysetQuery(queryset, params, key, per_page)
+    return query.page(list(query.queryset))
+
+
+async def akeyset_paginate(queryset, params, key="pk", per_page=PER_PAGE):
+    """Async version of ``keyset_paginate`` (for async views)."""
+    query = _KeysetQuery(queryset, params, key, per_page)
+    return query.page([row async for row in query.queryset])
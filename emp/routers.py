@@ -0,0 +1,83 @@
+import itertools
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+
+
+PIN_COOKIE = "emp_db_pin"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# True while a replica-safe view handles a request that isn't pinned to the primary
+_replica_ok = ContextVar("emp_replica_ok", default=False)
+_next_replica = itertools.count()
+
+
+def use_replica(view):
+    """Mark a read-only view whose queries may be served by a read replica.
+
+    Apply it innermost; ``functools.wraps`` carries the mark to outer decorators.
+    """
+    view.use_replica = True
+    return view
+
+
+class PrimaryReplicaRouter:
+    """Send reads of replica-safe requests to ``DATABASE_REPLICAS``, all else to 'default'.
+
+    With no replicas configured every query goes to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            # Follow relations on the database the instance was loaded from.
+            return instance._state.db
+        replicas = getattr(settings, "DATABASE_REPLICAS", [])
+        if replicas and _replica_ok.get():
+            return replicas[next(_next_replica) % len(replicas)]
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # replicas hold the same data as the primary
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """Decide per request whether reads may go to a replica (read-your-writes).
+
+    Safe requests to views marked with ``use_replica`` (and admin
+    changelists) read from replicas. Any unsafe request pins the client to
+    the primary for ``DATABASE_REPLICA_PIN_SECONDS`` with a cookie, so the
+    user sees their own writes despite replication lag.
+    """
+
+    def process_request(self, request):
+        _replica_ok.set(False)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES:
+            return None
+        match = request.resolver_match
+        admin_changelist = (
+            match is not None and match.namespace == "admin"
+            and (match.url_name or "").endswith("_changelist")
+        )
+        if getattr(view_func, "use_replica", False) or admin_changelist:
+            _replica_ok.set(True)
+        return None
+
+    def process_response(self, request, response):
+        # A sync request runs in its thread's own context: clear the flag, or
+        # code that runs in that thread after the request (a test, a worker)
+        # would keep reading the replicas
+        _replica_ok.set(False)
+        if request.method not in SAFE_METHODS and getattr(settings, "DATABASE_REPLICAS", []):
+            response.set_cookie(
+                PIN_COOKIE, "1",
+                max_age=getattr(settings, "DATABASE_REPLICA_PIN_SECONDS", 5),
+                httponly=True, samesite="Lax",
+            )
+        return response
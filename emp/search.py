@@ -0,0 +1,200 @@
+import re
+
+from django.conf import settings
+from django.db import connection, connections, router
+from django.utils.module_loading import import_string
+
+from .lookups import DEPARTMENTS, DESIGNATIONS
+from .models import Emp, Ticket, SearchDocument
+
+
+TOKEN = re.compile(r"\w+", re.UNICODE)
+MAX_RESULTS = 50
+
+
+def _emp_text(emp):
+    # Names come from the in-process lookup tables, not a query per employee
+    department = DEPARTMENTS.get(emp.department_id)
+    designation = DESIGNATIONS.get(emp.designation_id)
+    return [emp.emp_code, emp.f_name, emp.l_name, emp.email, department, designation]
+
+
+def _ticket_text(ticket):
+    return [ticket.subject, ticket.message, ticket.email]
+
+
+def _ticket_kind(ticket):
+    return "guest_ticket" if ticket.is_guest else "ticket"
+
+
+# model -> (document kinds, kind of an instance, text extractor)
+SEARCHABLE = {
+    Emp: (("emp",), lambda emp: "emp", _emp_text),
+    Ticket: (("ticket", "guest_ticket"), _ticket_kind, _ticket_text),
+}
+
+
+def tokenize(query):
+    return TOKEN.findall(query.lower())[:10]
+
+
+# ================== Backends ==================
+
+class SearchBackend:
+    """Ranks SearchDocument rows for a query; subclasses use native full-text SQL."""
+
+    def __init__(self):
+        self.table = SearchDocument._meta.db_table
+
+    def search(self, kinds, tokens, limit):
+        """Return object ids of documents of ``kinds`` matching all ``tokens``, best first."""
+        raise NotImplementedError
+
+    @staticmethod
+    def _in(kinds):
+        return ", ".join(["%s"] * len(kinds))
+
+    def _fetch_ids(self, sql, params):
+        # Raw SQL skips the database routers: ask them, like the ORM would
+        with connections[router.db_for_read(SearchDocument)].cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+
+class LikeSearchBackend(SearchBackend):
+    """Fallback for databases without full-text support: LIKE over one column."""
+
+    def search(self, kinds, tokens, limit):
+        documents = SearchDocument.objects.filter(kind__in=kinds)
+        for token in tokens:
+            documents = documents.filter(body__icontains=token)
+        return list(documents.order_by("-object_id").values_list("object_id", flat=True)[:limit])
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """FTS5 external-content table kept in sync by triggers (see migration 0005)."""
+
+    def search(self, kinds, tokens, limit):
+        match = " ".join(f'"{token}"*' for token in tokens)
+        return self._fetch_ids(
+            f"SELECT d.object_id FROM {self.table}_fts "
+            f"JOIN {self.table} d ON d.id = {self.table}_fts.rowid "
+            f"WHERE {self.table}_fts MATCH %s AND d.kind IN ({self._in(kinds)}) "
+            f"ORDER BY {self.table}_fts.rank LIMIT %s",
+            [match, *kinds, limit],
+        )
+
+
+class PostgresSearchBackend(SearchBackend):
+    """tsvector over the document body, served by a GIN expression index."""
+
+    def search(self, kinds, tokens, limit):
+        query = " & ".join(f"{token}:*" for token in tokens)
+        return self._fetch_ids(
+            f"SELECT object_id FROM {self.table} "
+            f"WHERE kind IN ({self._in(kinds)}) AND to_tsvector('simple', body) @@ to_tsquery('simple', %s) "
+            f"ORDER BY ts_rank(to_tsvector('simple', body), to_tsquery('simple', %s)) DESC LIMIT %s",
+            [*kinds, query, query, limit],
+        )
+
+
+class MySQLSearchBackend(SearchBackend):
+    """InnoDB FULLTEXT index in boolean mode."""
+
+    def search(self, kinds, tokens, limit):
+        query = " ".join(f"+{token}*" for token in tokens)
+        return self._fetch_ids(
+            f"SELECT object_id FROM {self.table} "
+            f"WHERE kind IN ({self._in(kinds)}) AND MATCH(body) AGAINST (%s IN BOOLEAN MODE) "
+            f"ORDER BY MATCH(body) AGAINST (%s IN BOOLEAN MODE) DESC LIMIT %s",
+            [*kinds, query, query, limit],
+        )
+
+
+VENDOR_BACKENDS = {
+    "sqlite": SQLiteSearchBackend,
+    "postgresql": PostgresSearchBackend,
+    "mysql": MySQLSearchBackend,
+}
+
+_backend = None
+
+
+def get_backend():
+    """The backend named by ``EMP_SEARCH_BACKEND``, else the one for the DB vendor."""
+    global _backend
+    if _backend is None:
+        path = getattr(settings, "EMP_SEARCH_BACKEND", None)
+        backend_class = import_string(path) if path else VENDOR_BACKENDS.get(connection.vendor, LikeSearchBackend)
+        _backend = backend_class()
+    return _backend
+
+
+# ================== Indexing ==================
+
+def _document(instance):
+    _, kind_of, extract = SEARCHABLE[type(instance)]
+    body = " ".join(str(value) for value in extract(instance) if value)
+    return SearchDocument(kind=kind_of(instance), object_id=instance.pk, body=body)
+
+
+def index_instances(instances):
+    """Upsert the search documents of ``instances`` (all of one model) in one query."""
+    documents = [_document(instance) for instance in instances]
+    if not documents:
+        return
+    # MySQL's ON DUPLICATE KEY UPDATE takes no conflict target (any unique key matches)
+    features = connections[router.db_for_write(SearchDocument)].features
+    target = {"unique_fields": ["kind", "object_id"]} if features.supports_update_conflicts_with_target else {}
+    SearchDocument.objects.bulk_create(documents, update_conflicts=True, update_fields=["body"], **target)
+
+
+def index_instance(instance):
+    index_instances([instance])
+
+
+def remove_document(kind, object_id):
+    SearchDocument.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def remove_instance(instance):
+    kind_of = SEARCHABLE[type(instance)][1]
+    remove_document(kind_of(instance), instance.pk)
+
+
+def rebuild_index(chunk_size=2000):
+    """Re-create every search document in chunks; returns the number indexed."""
+    total = 0
+    for model, (kinds, _, _) in SEARCHABLE.items():
+        SearchDocument.objects.filter(kind__in=kinds).delete()
+        chunk = []
+        for instance in model.objects.iterator(chunk_size=chunk_size):
+            chunk.append(instance)
+            if len(chunk) >= chunk_size:
+                index_instances(chunk)
+                total += len(chunk)
+                chunk = []
+        index_instances(chunk)
+        total += len(chunk)
+    return total
+
+
+# ================== Querying ==================
+
+def search_ids(model, query, limit=MAX_RESULTS, kinds=None):
+    """Primary keys of ``model`` rows matching ``query``, best match first.
+
+    ``kinds`` narrows the search to some of the model's document kinds
+    (e.g. only guest tickets).
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    return get_backend().search(kinds or SEARCHABLE[model][0], tokens, limit)
+
+
+def search(queryset, query, limit=MAX_RESULTS, kinds=None):
+    """Ranked list of the rows of ``queryset`` matching ``query``."""
+    ids = search_ids(queryset.model, query, limit, kinds)
+    found = queryset.in_bulk(ids)
+    return [found[pk] for pk in ids if pk in found]
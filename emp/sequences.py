@@ -0,0 +1,106 @@
+import os
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.db.models import F
+from django.db.utils import ConnectionDoesNotExist, load_backend
+
+from .models import Sequence
+
+
+EMP_CODE_SEQUENCE = "emp_code"
+SEQUENCE_DB = "emp_sequences"  # second connection to the default database, see _sequence_db
+
+
+def format_emp_code(number):
+    return f"EMP{number:03d}"  # EMP001 ... EMP999, EMP1000, ...
+
+
+def _sequence_db():
+    """Alias of this thread's second connection to the default database.
+
+    A reservation made on it commits at once, whatever transaction the
+    caller is in, so the Sequence row is locked for one UPDATE rather than
+    until the caller commits. Like the default connection it stays open
+    for the life of the thread.
+    """
+    try:
+        connections[SEQUENCE_DB]
+    except ConnectionDoesNotExist:
+        config = connections.settings[DEFAULT_DB_ALIAS]
+        connections[SEQUENCE_DB] = load_backend(config["ENGINE"]).DatabaseWrapper(config, SEQUENCE_DB)
+    return SEQUENCE_DB
+
+
+class SequenceAllocator:
+    """Hands out values of a named ``Sequence`` counter.
+
+    Values are reserved from the database in blocks of ``batch_size`` with a
+    single atomic ``UPDATE ... SET last_value = last_value + n``, so
+    concurrent workers never see the same value and most calls cost no
+    query at all. Inside a transaction the block is reserved on a separate
+    connection (``_sequence_db``) and commits on its own, so concurrent
+    creators do not queue on the counter row until each other's commit.
+    Unused values of a block are lost when the process exits or the
+    caller's transaction rolls back, which leaves gaps in the sequence but
+    never duplicates.
+    """
+
+    def __init__(self, name, batch_size=None):
+        self.name = name
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._next, self._limit = 1, 0  # empty block
+        self._pid = os.getpid()
+
+    def _reserve(self, count, using=DEFAULT_DB_ALIAS):
+        """Bump the counter by ``count`` and return the reserved range."""
+        counter = Sequence.objects.using(using).filter(name=self.name)
+        with transaction.atomic(using=using):
+            if not counter.update(last_value=F("last_value") + count):
+                Sequence.objects.using(using).get_or_create(name=self.name)
+                counter.update(last_value=F("last_value") + count)
+            last = counter.values_list("last_value", flat=True).get()
+        return last - count + 1, last
+
+    def allocate(self, count=1):
+        """Return a ``range`` of ``count`` unused sequence values."""
+        with self._lock:
+            if self._pid != os.getpid():
+                # A forked worker must not reuse its parent's block.
+                self._next, self._limit = 1, 0  # empty block
+                self._pid = os.getpid()
+
+            if self._limit - self._next + 1 < count:
+                using = DEFAULT_DB_ALIAS
+                if connection.in_atomic_block:
+                    if connection.vendor == "sqlite":
+                        # One writer at a time: the caller's transaction
+                        # already holds the write lock (myapp/db.py opens
+                        # them IMMEDIATE), which a second connection would
+                        # wait for. Reserve in it, and since that rolls back
+                        # with the caller, never cache values beyond it.
+                        first, last = self._reserve(count)
+                        return range(first, last + 1)
+                    using = _sequence_db()
+                batch_size = self.batch_size or getattr(settings, "EMP_CODE_BATCH_SIZE", 20)
+                self._next, self._limit = self._reserve(max(count, batch_size), using)
+
+            first = self._next
+            self._next += count
+            return range(first, first + count)
+
+    def next_value(self):
+        return self.allocate(1)[0]
+
+
+emp_code_sequence = SequenceAllocator(EMP_CODE_SEQUENCE)
+
+
+def next_emp_code():
+    return format_emp_code(emp_code_sequence.next_value())
+
+
+def allocate_emp_codes(count):
+    return [format_emp_code(number) for number in emp_code_sequence.allocate(count)]
@@ -1,9 +1,19 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from django.core.mail import send_mail
 from django.conf import settings
-from .models import Profile, SupportTicket, GuestSupportTicket
+from .models import Profile, Emp, Ticket, Department, Designation
+from .outbox import enqueue_mail
+from .approvals import APPROVAL_SUBJECT, APPROVAL_MESSAGE
+from . import analytics
+from .cache import invalidate_emp_cache
+from .backends import invalidate_auth_user
+from .lookups import invalidate_lookups
+from .search import index_instance, index_instances, remove_instance
+from . import events, versions
+from .tickets import (
+    ticket_saved, ticket_deleted, notify_new_ticket, notify_resolved, remember_ticket, was,
+)
 
 
 # Profile auto-create
@@ -15,78 +25,148 @@ def create_or_update_user_profile(sender, instance, created, **kwargs):
         Profile.objects.get_or_create(user=instance)
 
 
-# Approval email
+# Cached authentication user (emp.backends.ProfileModelBackend)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_auth_user_on_user_change(sender, instance, **kwargs):
+    invalidate_auth_user(instance.pk)
+
+
 @receiver(post_save, sender=Profile)
-def send_approval_email(sender, instance, **kwargs):
-    if instance.is_approved:
-        try:
-            send_mail(
-                subject='Your Account Has Been Approved',
-                message='Hi, your account is approved. You can now login.',
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[instance.user.email],
-                fail_silently=True,
-            )
-        except Exception as e:
-            print(f"Failed to send approval email: {e}")
-
-
-# Employee tickets
-@receiver(post_save, sender=SupportTicket)
-def notify_admin_on_ticket_creation(sender, instance, created, **kwargs):
-    if created:
-        send_mail(
-            subject=f"New Emp Complaint Ticket from {instance.user.email}",
-            message=f"Employee: {instance.user.get_full_name()} ({instance.user.email})\n"
-                    f"Subject: {instance.subject}\n"
-                    f"Message: {instance.message}",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[settings.ADMIN_EMAIL],
-            fail_silently=True,
-        )
+@receiver(post_delete, sender=Profile)
+def invalidate_auth_user_on_profile_change(sender, instance, **kwargs):
+    invalidate_auth_user(instance.user_id)
+
+
+# Approval email (only when is_approved flips to True, not on every save)
+@receiver(post_init, sender=Profile)
+def remember_approval_state(sender, instance, **kwargs):
+    instance._was_approved = instance.is_approved if instance.pk else False
 
 
-@receiver(post_save, sender=SupportTicket)
-def notify_employee_on_ticket_resolve(sender, instance, created, **kwargs):
-    if not created and instance.is_resolved:
-        send_mail(
-            subject="Your Problem is Resolved",
-            message=f"Hello {instance.user.first_name},\n\n"
-                    f"Your Problem has been resolved:\n\n"
-                    f"Subject: {instance.subject}\n"
-                    f"Message: {instance.message}\n\n"
-                    "Thank you for reaching out.",
+@receiver(post_save, sender=Profile)
+def send_approval_email(sender, instance, **kwargs):
+    if instance.is_approved and not instance._was_approved:
+        enqueue_mail(
+            subject=APPROVAL_SUBJECT,
+            message=APPROVAL_MESSAGE,
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[instance.user.email],
-            fail_silently=True,
         )
+    instance._was_approved = instance.is_approved
+
+
+# Analytics rollups (emp.analytics), updated before the cached aggregates are dropped
+@receiver(post_init, sender=Emp)
+@receiver(post_init, sender=Ticket)
+def remember_rollup_fields(sender, instance, **kwargs):
+    analytics.remember(instance)
+
+
+@receiver(post_save, sender=Emp)
+def update_emp_rollups(sender, instance, created, **kwargs):
+    analytics.emp_saved(instance, created)
+
+
+@receiver(post_delete, sender=Emp)
+def remove_emp_rollups(sender, instance, **kwargs):
+    analytics.emp_deleted(instance)
+
+
+@receiver(post_save, sender=Ticket)
+def update_ticket_rollups(sender, instance, created, **kwargs):
+    analytics.ticket_saved(instance, created)
+
+
+@receiver(post_delete, sender=Ticket)
+def remove_ticket_rollups(sender, instance, **kwargs):
+    analytics.ticket_deleted(instance)
+
 
+# Cached headcount / per-user Emp lookups
+@receiver(post_save, sender=Emp)
+@receiver(post_delete, sender=Emp)
+def invalidate_emp_cache_on_change(sender, instance, **kwargs):
+    invalidate_emp_cache([instance.user_id])
 
-# Guest tickets
-@receiver(post_save, sender=GuestSupportTicket)
-def notify_admin_on_guest_ticket_creation(sender, instance, created, **kwargs):
+
+# Data versions for conditional GETs (emp.versions)
+@receiver(post_save, sender=Emp)
+@receiver(post_delete, sender=Emp)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+@receiver(post_save, sender=Designation)
+@receiver(post_delete, sender=Designation)
+def bump_directory_version(sender, instance, **kwargs):
+    versions.bump(versions.DIRECTORY)
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def bump_ticket_versions(sender, instance, **kwargs):
+    # The previous owner's list changes too when a ticket is reassigned
+    versions.bump(*versions.ticket_resources([instance.user_id, was(instance, "user_id")]))
+
+
+# In-process Department/Designation lookup tables (emp.lookups)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+@receiver(post_save, sender=Designation)
+@receiver(post_delete, sender=Designation)
+def invalidate_lookups_on_change(sender, instance, **kwargs):
+    invalidate_lookups()
+    invalidate_emp_cache()
+
+
+@receiver(post_init, sender=Department)
+@receiver(post_init, sender=Designation)
+def remember_lookup_name(sender, instance, **kwargs):
+    instance._was_name = instance.name if instance.pk else None
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_save, sender=Designation)
+def reindex_on_rename(sender, instance, created, **kwargs):
+    # A rename changes the text of its employees' search documents
+    if not created and instance.name != instance._was_name:
+        field = "department" if sender is Department else "designation"
+        index_instances(Emp.objects.filter(**{field: instance}).iterator())
+    instance._was_name = instance.name
+
+
+# Full-text search documents
+@receiver(post_save, sender=Emp)
+@receiver(post_save, sender=Ticket)
+def update_search_document(sender, instance, **kwargs):
+    index_instance(instance)
+
+
+@receiver(post_delete, sender=Emp)
+@receiver(post_delete, sender=Ticket)
+def delete_search_document(sender, instance, **kwargs):
+    remove_instance(instance)
+
+
+# Tickets: counters, notifications and server-sent events for single-ticket saves
+# (bulk status changes go through emp.tickets.set_status instead)
+@receiver(post_init, sender=Ticket)
+def remember_ticket_state(sender, instance, **kwargs):
+    remember_ticket(instance)
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_changed(sender, instance, created, **kwargs):
+    ticket_saved(instance, created)
     if created:
-        send_mail(
-            subject=f"New Guest Complaint From {instance.email}",
-            message=f"Guest Email: {instance.email}\n"
-                    f"Subject: {instance.subject}\n"
-                    f"Message: {instance.message}",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[settings.ADMIN_EMAIL],
-            fail_silently=True,
-        )
+        notify_new_ticket(instance)
+        events.publish_tickets(events.CREATED, events.ticket_rows([instance]))
+    elif instance.status != was(instance, "status"):
+        events.publish_tickets(events.STATUS, events.ticket_rows([instance]))
+        if instance.is_resolved:
+            notify_resolved(instance)
+    remember_ticket(instance)
 
 
-@receiver(post_save, sender=GuestSupportTicket)
-def notify_guest_on_ticket_resolve(sender, instance, created, **kwargs):
-    if not created and instance.is_resolved:
-        send_mail(
-            subject="Your Problem is Resolved",
-            message=f"Hello,\n\nYour problem has been resolved:\n\n"
-                    f"Subject: {instance.subject}\n"
-                    f"Message: {instance.message}\n\n"
-                    "Thank you for reaching out.",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[instance.email],
-            fail_silently=True,
-        )
+@receiver(post_delete, sender=Ticket)
+def ticket_removed(sender, instance, **kwargs):
+    ticket_deleted(instance)
@@ -0,0 +1,47 @@
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+
+class PrecompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Hashed static file names, plus ``.gz`` (and ``.br`` if ``brotli`` is
+    installed) copies of the text assets, written once by ``collectstatic``.
+
+    The web server serves the compressed copy when the client accepts it
+    (nginx ``gzip_static``/``brotli_static``, WhiteNoise), so nothing is
+    compressed per request. A copy is only kept when it is smaller.
+    """
+
+    compress_extensions = (".css", ".js", ".map", ".svg", ".json", ".txt")
+    compress_min_size = 256
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            if not name.endswith(self.compress_extensions):
+                continue
+            for compressed in self._compress(name):
+                yield name, compressed, True
+
+    def _compress(self, name):
+        with self.open(name) as original:
+            content = original.read()
+        if len(content) < self.compress_min_size:
+            return
+        encoders = [(".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            encoders.append((".br", lambda data: brotli.compress(data, quality=11)))
+        for suffix, encode in encoders:
+            compressed = encode(content)
+            if len(compressed) < len(content):
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                yield self.save(name + suffix, ContentFile(compressed))
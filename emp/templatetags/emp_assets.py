@@ -0,0 +1,37 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from emp.assets import ASSETS
+
+register = template.Library()
+
+
+def _source(name):
+    # (url, integrity): the vendored copy through the staticfiles storage
+    # (hashed in production), or the pinned CDN file
+    asset = ASSETS[name]
+    if getattr(settings, "EMP_VENDORED_STATIC", False):
+        return static(asset.static_path), None
+    return asset.cdn_url, asset.integrity
+
+
+def _integrity(integrity):
+    if not integrity:
+        return ""
+    return format_html(' integrity="{}" crossorigin="anonymous"', integrity)
+
+
+@register.simple_tag
+def asset_css(name):
+    """``<link>`` for a stylesheet from emp.assets.ASSETS, e.g. ``{% asset_css "bootstrap.css" %}``."""
+    url, integrity = _source(name)
+    return format_html('<link href="{}" rel="stylesheet"{}>', url, _integrity(integrity))
+
+
+@register.simple_tag
+def asset_js(name):
+    """``<script>`` for a script from emp.assets.ASSETS, e.g. ``{% asset_js "bootstrap.js" %}``."""
+    url, integrity = _source(name)
+    return format_html('<script src="{}"{}></script>', url, _integrity(integrity))
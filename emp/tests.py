@@ -0,0 +1,1198 @@
+"""Tests for the emp app: ``python manage.py test emp``."""
+import asyncio
+import csv
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import date, timedelta
+from io import StringIO
+from smtplib import SMTPException
+from unittest import skipIf, skipUnless
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import DataError, connection, connections, router, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, modify_settings, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .admin import EmpAdmin
+from .analytics import rebuild_rollups, report
+from .backends import auth_user_key
+from .cache import HEADCOUNT_KEY, get_department_counts, get_headcount, get_user_emp, user_emp_key
+from .events import CREATED, RESYNC, STATUS, _publish, get_bus, stream
+from .exports import EXPORT_FIELDS, export_rows
+from .forms import EmpLookupForm
+from .lookups import DEPARTMENTS, DESIGNATIONS, invalidate_lookups
+from .middleware import QueryBudgetExceeded
+from .models import (
+    Department, Designation, Emp, HeadcountRollup, MonthlyRollup, OutboundEmail, Profile, SearchDocument, Sequence,
+    Ticket,
+)
+from .outbox import enqueue_mail, send_queued_mail
+from .routers import PIN_COOKIE, _replica_ok
+from .search import search_ids
+from .sequences import EMP_CODE_SEQUENCE, SequenceAllocator
+from .tickets import filter_status, get_counts, set_status
+from .versions import ALL_TICKETS, aget_versions, ticket_resources, user_tickets
+
+
+def make_user(email, staff=False):
+    user = User.objects.create_user(email, email, is_staff=staff)  # no password: tests use force_login
+    Profile.objects.filter(user=user).update(is_approved=True)
+    return user
+
+
+def make_emp(user, number, department, designation):
+    return Emp.objects.create(
+        user=user, f_name=f"First{number}", l_name="Last", gender="F", phone=f"90000{number:05d}",
+        email=user.email, address="Street 1", department=department, designation=designation,
+        joining_date=date(2024, 1, 1) + timedelta(days=number),
+    )
+
+
+class EmpTestCase(TestCase):
+    def setUp(self):
+        # Both outlive the rolled-back test transaction
+        cache.clear()
+        invalidate_lookups()
+
+
+# ================== Indexes ==================
+
+@skipUnless(connection.vendor == "sqlite", "query plans are checked on SQLite")
+class QueryPlanTests(EmpTestCase):
+    """The hot queries are served by the indexes in Emp.Meta / Ticket.Meta."""
+
+    def assertPlan(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(f"USING INDEX {index}", plan)
+        self.assertNotIn("TEMP B-TREE", plan)  # the index gives the order: no sort step
+
+    def test_directory_filters(self):
+        emps = Emp.objects.order_by("emp_id")
+        self.assertPlan(emps.filter(department_id=1), "emp_department_idx")
+        self.assertPlan(emps.filter(designation_id=1), "emp_designation_idx")
+        self.assertPlan(emps.filter(department_id=1, designation_id=1), "emp_dept_desig_idx")
+
+    def test_help_support_history(self):
+        tickets = Ticket.objects.filter(user_id=1).order_by("-pk")
+        self.assertPlan(filter_status(tickets, "resolved"), "ticket_user_status_idx")
+        self.assertPlan(filter_status(tickets, "in_progress"), "ticket_user_status_idx")
+        # All of a user's tickets: the user_id index, whose entries end in the pk
+        self.assertPlan(tickets, "emp_ticket_user_id_")
+
+    def test_inbox_by_status(self):
+        self.assertPlan(filter_status(Ticket.objects.order_by("-pk"), "resolved"), "ticket_status_id_idx")
+
+    def test_unresolved_tickets(self):
+        queryset = Ticket.objects.exclude(status=Ticket.RESOLVED).order_by("-created_at")
+        self.assertPlan(queryset, "ticket_unresolved_created_idx")
+
+    def test_guest_tickets_by_email(self):
+        queryset = Ticket.objects.filter(email="guest@example.com").order_by("-created_at")
+        self.assertPlan(queryset, "ticket_email_created_idx")
+
+
+# ================== Query budgets ==================
+
+@modify_settings(MIDDLEWARE={"prepend": "emp.middleware.QueryProfilingMiddleware"})
+@override_settings(EMP_QUERY_BUDGETS_STRICT=True)
+class QueryBudgetTests(EmpTestCase):
+    """Every view in EMP_QUERY_BUDGETS, profiled with strict budgets: a view
+    that runs more queries than its budget (whatever the data size) raises
+    QueryBudgetExceeded and fails the test.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        department, _ = Department.objects.get_or_create(name="Finance")
+        designation, _ = Designation.objects.get_or_create(name="Accountant", defaults={"department": department})
+        cls.user = make_user("user@example.com", staff=True)
+        for number in range(30):
+            make_emp(make_user(f"emp{number}@example.com"), number, department, designation)
+        Ticket.objects.bulk_create([
+            Ticket(user=cls.user, email=cls.user.email, subject=f"Ticket {number}", message="Help")
+            for number in range(30)
+        ])
+
+    def setUp(self):
+        super().setUp()
+        logger = logging.getLogger("emp.profiling")
+        logger.disabled = True  # one line per request
+        self.addCleanup(setattr, logger, "disabled", False)
+        self.client.force_login(self.user)
+        # The budgets are for warm session, user and lookup caches
+        with self.settings(EMP_QUERY_BUDGETS={}):
+            self.client.get(reverse("emp_home"))
+            self.client.get(reverse("help_support"))
+
+    def assertWithinBudget(self, name, params=None, status=200):
+        response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, status)
+        return response
+
+    def test_budgeted_views(self):
+        self.assertEqual(set(settings.EMP_QUERY_BUDGETS), {
+            "emp_home", "view_emp", "help_support", "ticket_inbox", "analytics", "api_employees", "api_tickets",
+        })
+        self.assertWithinBudget("emp_home")
+        self.assertWithinBudget("view_emp", {"department": "Finance"})
+        self.assertWithinBudget("help_support")
+        self.assertWithinBudget("ticket_inbox")
+        self.assertWithinBudget("analytics")
+        self.assertWithinBudget("api_employees", {"fields": "emp_code", "limit": 10})
+        self.assertWithinBudget("api_tickets")
+
+    def test_help_support_submit(self):
+        # Two of its queries are the SAVEPOINT and RELEASE of the view's atomic
+        # block inside the test's transaction
+        response = self.client.post(reverse("help_support"), {"subject": "Printer", "message": "Jammed"})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(get_counts(("ticket", str(self.user.pk)))[("ticket", str(self.user.pk))]["open"], 1)
+
+    def test_an_overrun_fails(self):
+        with self.settings(EMP_QUERY_BUDGETS={"view_emp": 0}), self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse("view_emp"))
+        with self.settings(EMP_QUERY_BUDGETS={"view_emp": {"ms": -1}}), self.assertRaisesMessage(
+                QueryBudgetExceeded, "budget -1ms"):
+            self.client.get(reverse("view_emp"))
+
+    def test_profiling_headers(self):
+        response = self.assertWithinBudget("help_support")
+        self.assertLessEqual(int(response["X-DB-Queries"]), settings.EMP_QUERY_BUDGETS["help_support"]["queries"])
+        self.assertIn("db;dur=", response["Server-Timing"])
+
+
+# ================== Sequences ==================
+
+class SequenceTests(TransactionTestCase):
+    def allocate_concurrently(self, workers=4, rounds=20):
+        values, errors = [], []
+
+        def work():
+            allocator = SequenceAllocator(EMP_CODE_SEQUENCE, batch_size=5)  # one per worker process
+            try:
+                for number in range(rounds):
+                    if number % 2:
+                        with transaction.atomic():
+                            values.extend(allocator.allocate(1))
+                    else:
+                        values.extend(allocator.allocate(2))
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=work) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return values
+
+    def test_concurrent_workers_never_share_a_value(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            # Shared-cache memory databases fail concurrent writers at once instead of waiting
+            self.skipTest("needs a database file or server")
+        values = self.allocate_concurrently()
+        self.assertEqual(len(values), 4 * 30)
+        self.assertEqual(len(set(values)), len(values))
+
+    def test_a_block_is_cached_outside_transactions(self):
+        allocator = SequenceAllocator(EMP_CODE_SEQUENCE, batch_size=10)
+        first = allocator.next_value()
+        with self.assertNumQueries(0):
+            self.assertEqual(list(allocator.allocate(3)), [first + 1, first + 2, first + 3])
+
+    @skipIf(connection.vendor == "sqlite", "SQLite reserves in the caller's transaction")
+    def test_reservations_in_a_transaction_commit_on_their_own(self):
+        allocator = SequenceAllocator(EMP_CODE_SEQUENCE, batch_size=10)
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            first = allocator.next_value()
+            raise RuntimeError
+        self.assertEqual(Sequence.objects.get(name=EMP_CODE_SEQUENCE).last_value, first + 9)
+        self.assertEqual(allocator.next_value(), first + 1)  # the rest of the block is still ours
+
+
+# ================== Lookup tables ==================
+
+class LookupTests(EmpTestCase):
+    def setUp(self):
+        super().setUp()
+        self.finance, _ = Department.objects.get_or_create(name="Finance")
+        self.accountant, _ = Designation.objects.get_or_create(name="Accountant", defaults={"department": self.finance})
+        self.other, _ = Department.objects.get_or_create(name="Administration")
+        DEPARTMENTS.rows(), DESIGNATIONS.rows()
+
+    def test_an_unknown_id_reloads_the_table_once(self):
+        with self.assertNumQueries(1):
+            self.assertIsNone(DEPARTMENTS.get(999999))
+        with self.assertNumQueries(0):
+            self.assertIsNone(DEPARTMENTS.get(999999))
+            self.assertEqual(DEPARTMENTS.get(self.finance.pk), self.finance)
+
+    def test_a_row_added_by_another_process_is_found(self):
+        department = Department.objects.bulk_create([Department(name="Research")])[0]  # no signals
+        self.assertEqual(DEPARTMENTS.get(department.pk), department)
+
+    def test_the_form_takes_known_rows_from_memory(self):
+        form = EmpLookupForm({"department": self.finance.pk, "designation": self.accountant.pk})
+        with self.assertNumQueries(0):
+            self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data, {"department": self.finance, "designation": self.accountant})
+
+    def test_the_form_rejects_unknown_and_mismatched_ids(self):
+        for department, designation in (("999999", self.accountant.pk), (self.finance.pk, "x"),
+                                         (self.other.pk, self.accountant.pk), ("", self.accountant.pk)):
+            with self.subTest(department=department, designation=designation), self.assertNumQueries(
+                    1 if department == "999999" else 0):  # one primary key lookup, never a reload
+                self.assertFalse(EmpLookupForm({"department": department, "designation": designation}).is_valid())
+
+    def test_add_emp_checks_the_chosen_ids(self):
+        self.client.force_login(make_user("user@example.com"))
+        data = {
+            "f_name": "A", "l_name": "B", "gender": "F", "phone": "9000000001", "email": "a@example.com",
+            "address": "Street 1", "department": "999999", "designation": self.accountant.pk,
+            "joining_date": "2024-01-01",
+        }
+        response = self.client.post(reverse("add_emp"), data)
+        self.assertRedirects(response, "/emp/add-emp/", fetch_redirect_response=False)
+        self.assertFalse(Emp.objects.exists())
+        response = self.client.post(reverse("add_emp"), {**data, "department": self.finance.pk})
+        self.assertRedirects(response, "/emp/view-emp/", fetch_redirect_response=False)
+        self.assertEqual(Emp.objects.get().department, self.finance)
+
+    def test_a_rename_is_seen_at_once_and_reindexed(self):
+        emp = make_emp(make_user("user@example.com"), 1, self.finance, self.accountant)
+        self.finance.name = "Accounts"
+        self.finance.save()
+        self.assertEqual(DEPARTMENTS.rows().find(" accounts "), self.finance)
+        self.assertIsNone(DEPARTMENTS.rows().find("Finance"))
+        self.assertEqual(search_ids(Emp, "accounts"), [emp.pk])
+        self.assertEqual(search_ids(Emp, "finance"), [])
+
+    def test_the_directory_filters_on_the_chosen_names(self):
+        user = make_user("user@example.com")
+        make_emp(user, 1, self.finance, self.accountant)
+        clerk, _ = Designation.objects.get_or_create(name="Clerk", defaults={"department": self.other})
+        make_emp(make_user("other@example.com"), 2, self.other, clerk)
+        self.client.force_login(user)
+        response = self.client.get(reverse("view_emp"), {"department": " finance"})
+        self.assertEqual([emp.department.name for emp in response.context["emps"]], ["Finance"])
+        response = self.client.get(reverse("view_emp"), {"designation": "Nobody"})
+        self.assertEqual(list(response.context["emps"]), [])
+
+class LookupMigrationTests(TransactionTestCase):
+    before = [("emp", "0007_unified_ticket")]
+    after = [("emp", "0009_emp_lookup_foreign_keys")]
+
+    def setUp(self):
+        self.migrate(self.before)
+        User = self.apps.get_model("auth", "User")
+        Emp = self.apps.get_model("emp", "Emp")
+        for number, (department, designation) in enumerate([
+            ("Finance", "Accountant"), ("finance ", "accountant"), ("research lab", "Lab  Tech"),
+            ("research lab", "Lab Tech"), ("Research Lab", "Accountant"),
+        ]):
+            user = User.objects.create(username=f"emp{number}@example.com")
+            Emp.objects.create(
+                user_id=user.pk, emp_code=f"EMP{number:05d}", f_name=f"First{number}", l_name="Last", gender="F",
+                phone=f"90000{number:05d}", email=user.username, address="Street 1", department=department,
+                designation=designation, joining_date=date(2024, 1, 1),
+            )
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+        invalidate_lookups()
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        self.apps = executor.loader.project_state(targets).apps
+
+    def emps(self, *fields):
+        return list(self.apps.get_model("emp", "Emp").objects.order_by("emp_code").values_list(*fields))
+
+    def test_spellings_are_merged(self):
+        self.migrate(self.after)
+        self.assertEqual(self.emps("department__name", "designation__name"), [
+            ("Finance", "Accountant"), ("Finance", "Accountant"), ("research lab", "Lab Tech"),
+            ("research lab", "Lab Tech"), ("research lab", "Accountant"),
+        ])
+        Designation = self.apps.get_model("emp", "Designation")
+        self.assertEqual(Designation.objects.get(name="Lab Tech").department.name, "research lab")
+        self.assertEqual(Designation.objects.get(name="Accountant").department.name, "Finance")
+        self.assertTrue(self.apps.get_model("emp", "Department").objects.filter(name="Customer Support").exists())
+
+    def test_renamed_employees_are_reindexed(self):
+        self.migrate(self.after)
+        SearchDocument = self.apps.get_model("emp", "SearchDocument")
+        self.assertEqual(
+            sorted(SearchDocument.objects.filter(kind="emp").values_list("body", flat=True)),
+            ["EMP00001 First1 Last emp1@example.com Finance Accountant",
+             "EMP00002 First2 Last emp2@example.com research lab Lab Tech",
+             "EMP00004 First4 Last emp4@example.com research lab Accountant"],
+        )
+
+    def test_the_migration_reverses(self):
+        self.migrate(self.after)
+        self.migrate(self.before)
+        self.assertEqual(self.emps("department", "designation"), [
+            ("Finance", "Accountant"), ("Finance", "Accountant"), ("research lab", "Lab Tech"),
+            ("research lab", "Lab Tech"), ("research lab", "Accountant"),
+        ])
+
+# ================== Caches ==================
+
+class EmpCacheTests(EmpTestCase):
+    def setUp(self):
+        super().setUp()
+        self.department, _ = Department.objects.get_or_create(name="Finance")
+        self.designation, _ = Designation.objects.get_or_create(
+            name="Accountant", defaults={"department": self.department})
+        self.user = make_user("user@example.com")
+
+    def test_counts_are_cached_until_an_employee_changes(self):
+        self.assertEqual((get_headcount(), get_department_counts()), (0, {}))
+        with self.assertNumQueries(0):
+            self.assertEqual((get_headcount(), get_department_counts()), (0, {}))
+        with self.captureOnCommitCallbacks(execute=True):
+            make_emp(self.user, 1, self.department, self.designation)
+        self.assertEqual((get_headcount(), get_department_counts()), (1, {self.department.pk: 1}))
+
+    def test_the_users_employee_record_is_cached(self):
+        self.assertIsNone(get_user_emp(self.user))
+        with self.assertNumQueries(0):  # "no record" is cached too
+            self.assertIsNone(get_user_emp(self.user))
+        with self.captureOnCommitCallbacks(execute=True):
+            emp = make_emp(self.user, 1, self.department, self.designation)
+        self.assertEqual(get_user_emp(self.user), emp)
+        with self.captureOnCommitCallbacks(execute=True):
+            emp.delete()
+        self.assertIsNone(get_user_emp(self.user))
+
+# ================== Conditional GET ==================
+
+@override_settings(EMP_CONDITIONAL_GET=True)
+class ConditionalGetTests(EmpTestCase):
+    def setUp(self):
+        super().setUp()
+        self.department, _ = Department.objects.get_or_create(name="Finance")
+        self.designation, _ = Designation.objects.get_or_create(
+            name="Accountant", defaults={"department": self.department})
+        self.user = make_user("user@example.com")
+        self.client.force_login(self.user)
+
+    def revalidate(self, etag):
+        return self.client.get(reverse("view_emp"), headers={"if-none-match": etag})
+
+    def test_unchanged_pages_are_not_modified_until_a_write(self):
+        response = self.client.get(reverse("view_emp"))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Last-Modified", response)
+        etag = response["ETag"]
+        response = self.revalidate(etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_emp(make_user("emp1@example.com"), 1, self.department, self.designation)
+        response = self.revalidate(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "First1")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_pages_with_flash_messages_are_not_revalidated(self):
+        etag = self.client.get(reverse("view_emp"))["ETag"]
+        self.client.get(reverse("update_emp"))  # no employee record yet: a warning, then view_emp
+        response = self.revalidate(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "You have not added your employee details yet.")
+        self.assertNotIn("ETag", response)
+        self.assertEqual(self.revalidate(etag).status_code, 304)  # the message has been shown
+
+    @override_settings(DATABASE_REPLICAS=["default"], DATABASE_REPLICA_PIN_SECONDS=60)
+    def test_no_validators_while_a_replica_may_lag(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            make_emp(self.user, 1, self.department, self.designation)
+        self.assertNotIn("ETag", self.client.get(reverse("view_emp")))
+        with self.settings(DATABASE_REPLICA_PIN_SECONDS=0):
+            self.assertIn("ETag", self.client.get(reverse("view_emp")))
+
+# ================== Fragment caches ==================
+
+@override_settings(EMP_FRAGMENT_CACHE_TIMEOUT=3600)
+class NavbarCacheTests(EmpTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user("user@example.com")
+        self.client.force_login(self.user)
+
+    def counter_queries(self, queries):
+        return [query for query in queries if '"emp_ticketcounter"' in query["sql"]]
+
+    def test_the_cached_navbar_costs_no_counter_query(self):
+        self.client.get(reverse("view_emp"))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("view_emp"))
+        self.assertEqual(self.counter_queries(queries), [])
+
+    def test_a_new_ticket_refreshes_the_badge(self):
+        self.assertNotContains(self.client.get(reverse("view_emp")), "badge bg-warning")
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(user=self.user, email=self.user.email, subject="s", message="m")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("view_emp"))
+        self.assertContains(response, '<span class="badge bg-warning text-dark">1</span>', html=True)
+        self.assertEqual(len(self.counter_queries(queries)), 1)
+
+# ================== Auth cache ==================
+
+class AuthCacheTests(EmpTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user("user@example.com")
+        self.client.force_login(self.user)
+
+    def test_the_user_is_cached_without_the_password(self):
+        self.client.get(reverse("help_support"))
+        data = cache.get(auth_user_key(self.user.pk))
+        self.assertNotIn("password", data["user"])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(reverse("help_support")).status_code, 200)
+        self.assertFalse([query for query in queries if '"auth_user"' in query["sql"]])
+
+    def test_a_deactivated_user_is_rejected_on_the_next_request(self):
+        self.assertEqual(self.client.get(reverse("help_support")).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        response = self.client.get(reverse("help_support"))
+        self.assertRedirects(response, f"/emp/login/?next={reverse('help_support')}", fetch_redirect_response=False)
+
+
+# ================== Read replicas ==================
+
+@skipUnless(connection.vendor == "sqlite", "the replica is a copy of a SQLite test database")
+class ReplicaRoutingTests(TransactionTestCase):
+    """Two SQLite databases: the test database is the primary, and the replica
+    is a file copied from it in setUp. Rows written after the copy exist on
+    the primary only, like changes a lagging replica has not received yet.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        fd, cls.replica_path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(fd)
+        # Not added to DATABASES, so the test runner leaves it alone
+        config = {"ENGINE": "django.db.backends.sqlite3", "NAME": cls.replica_path}
+        config = connections.configure_settings({**connections.settings, "replica_test": config})["replica_test"]
+        connections["replica_test"] = DatabaseWrapper(config, "replica_test")
+
+    @classmethod
+    def tearDownClass(cls):
+        connections["replica_test"].close()
+        del connections["replica_test"]
+        os.remove(cls.replica_path)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        invalidate_lookups()
+        self.user = make_user("user@example.com")
+        Ticket.objects.create(user=self.user, email=self.user.email, subject="Copied ticket", message="m")
+        self.client.force_login(self.user)
+
+        connections["replica_test"].close()
+        primary = connections["default"]
+        primary.ensure_connection()
+        replica = sqlite3.connect(self.replica_path)
+        primary.connection.backup(replica)
+        replica.close()
+        replicas = override_settings(DATABASE_REPLICAS=["replica_test"])
+        replicas.enable()
+        self.addCleanup(replicas.disable)
+
+        Ticket.objects.create(user=self.user, email=self.user.email, subject="Primary-only ticket", message="m")
+
+    def test_safe_requests_to_marked_views_read_a_replica(self):
+        response = self.client.get(reverse("help_support"))
+        self.assertContains(response, "Copied ticket")
+        self.assertNotContains(response, "Primary-only ticket")
+
+    def test_a_write_pins_the_client_to_the_primary(self):
+        response = self.client.post(reverse("help_support"), {"subject": "New ticket", "message": "m"})
+        self.assertIn(PIN_COOKIE, response.cookies)
+        response = self.client.get(reverse("help_support"))
+        self.assertContains(response, "New ticket")
+        self.assertContains(response, "Primary-only ticket")
+
+    def test_the_user_is_loaded_from_the_primary(self):
+        # Deactivated after the copy: the replica still has the user active
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        response = self.client.get(reverse("help_support"))
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(cache.get(auth_user_key(self.user.pk))["user"]["is_active"])
+
+    def test_caches_are_filled_from_the_primary(self):
+        department, _ = Department.objects.get_or_create(name="Finance")
+        designation, _ = Designation.objects.get_or_create(name="Accountant", defaults={"department": department})
+        emp = make_emp(self.user, 1, department, designation)  # not on the replica
+        response = self.client.get(reverse("emp_home"))
+        self.assertEqual((response.context["emp"], response.context["total_emps"]), (emp, 1))
+        self.assertEqual(response.context["department_emps"], 1)
+        self.assertEqual(cache.get(HEADCOUNT_KEY), 1)
+        self.assertEqual(cache.get(user_emp_key(self.user.pk)), emp)
+
+    def test_full_text_search_reads_the_replica_in_marked_views(self):
+        def search(replica_ok, query):
+            token = _replica_ok.set(replica_ok)  # as in a safe request to a marked view, or any other
+            try:
+                return search_ids(Ticket, query)
+            finally:
+                _replica_ok.reset(token)
+
+        self.assertEqual(search(True, "copied"), [Ticket.objects.get(subject="Copied ticket").pk])
+        self.assertEqual(search(True, "primary"), [])
+        self.assertEqual(search(False, "primary"), [Ticket.objects.get(subject="Primary-only ticket").pk])
+
+    def test_reads_after_a_request_use_the_primary(self):
+        self.client.get(reverse("help_support"))
+        self.assertEqual(router.db_for_read(Ticket), "default")
+        self.assertTrue(Ticket.objects.filter(subject="Primary-only ticket").exists())
+
+    def test_writes_and_other_queries_use_the_primary(self):
+        self.assertEqual(router.db_for_read(Ticket), "default")
+        self.assertEqual(router.db_for_write(Ticket), "default")
+        self.assertEqual(Ticket.objects.filter(subject="Primary-only ticket").count(), 1)
+
+    def test_without_replicas_everything_reads_the_primary(self):
+        with override_settings(DATABASE_REPLICAS=[]):
+            response = self.client.get(reverse("help_support"))
+            self.assertContains(response, "Primary-only ticket")
+            response = self.client.post(reverse("help_support"), {"subject": "New ticket", "message": "m"})
+            self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+# ================== Throttling ==================
+
+@override_settings(EMP_THROTTLE_RATES={
+    "login": {"ip": (5, 60), "email": (3, 900)},
+    "register": {"ip": (10, 3600), "email": (2, 3600)},
+}, PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class ThrottleTests(EmpTestCase):
+    def login(self, email, password="wrong", **extra):
+        return self.client.post(reverse("login"), {"email": email, "password": password}, **extra)
+
+    def test_a_burst_is_refused_before_any_hashing(self):
+        with patch("emp.views.authenticate", return_value=None) as authenticate:
+            responses = [self.login("victim@example.com") for _ in range(50)]
+        self.assertEqual(authenticate.call_count, 3)
+        self.assertEqual([r.status_code for r in responses].count(429), 47)
+        self.assertTrue(1 <= int(responses[-1]["Retry-After"]) <= 900)
+
+    def test_the_ip_limit_covers_every_email(self):
+        statuses = [self.login(f"user{number}@example.com").status_code for number in range(6)]
+        self.assertEqual(statuses, [200] * 5 + [429])
+        self.assertEqual(self.login("other@example.com", REMOTE_ADDR="10.0.0.2").status_code, 200)
+
+    def test_a_successful_login_resets_the_email_count(self):
+        user = make_user("user@example.com")
+        user.set_password("Secret-123")
+        user.save()
+        for _ in range(2):
+            self.login("user@example.com")
+        self.assertRedirects(self.login("user@example.com", "Secret-123"), "/emp/home/",
+                             fetch_redirect_response=False)
+        self.client.logout()
+        self.assertEqual(self.login("user@example.com", REMOTE_ADDR="10.0.0.2").status_code, 200)
+        self.assertEqual(self.login("user@example.com", REMOTE_ADDR="10.0.0.2").status_code, 200)
+
+    def test_the_window_slides(self):
+        with patch("emp.throttling.time") as clock:
+            clock.time.return_value = 9000.0  # the start of a 900s email bucket
+            for _ in range(3):
+                self.login("user@example.com")
+            self.assertEqual(self.login("user@example.com").status_code, 429)
+            clock.time.return_value += 900 + 450  # half of the last bucket still counts: 4 * 0.5 + 1 attempts
+            self.assertEqual(self.login("user@example.com", REMOTE_ADDR="10.0.0.2").status_code, 200)
+            self.assertEqual(self.login("user@example.com", REMOTE_ADDR="10.0.0.2").status_code, 429)
+            clock.time.return_value += 900
+            self.assertEqual(self.login("user@example.com", REMOTE_ADDR="10.0.0.3").status_code, 200)
+
+    def test_registration_is_throttled_before_creating_users(self):
+        data = {"email": "new@example.com", "password1": "Secret-123", "password2": "nope"}
+        for _ in range(2):
+            self.client.post(reverse("register"), data)
+        with patch("emp.views.validate_password") as validate:
+            response = self.client.post(reverse("register"), {**data, "password2": "Secret-123"})
+        self.assertEqual(response.status_code, 429)
+        validate.assert_not_called()
+        self.assertFalse(User.objects.filter(username="new@example.com").exists())
+
+    @override_settings(EMP_THROTTLE_PROXY_COUNT=1)
+    def test_the_client_ip_is_the_one_the_proxy_saw(self):
+        for number in range(5):
+            self.login(f"user{number}@example.com", HTTP_X_FORWARDED_FOR=f"1.2.3.{number}, 10.0.0.9")
+        self.assertEqual(self.login("a@example.com", HTTP_X_FORWARDED_FOR="5.6.7.8, 10.0.0.9").status_code, 429)
+        self.assertEqual(self.login("b@example.com", HTTP_X_FORWARDED_FOR="10.0.0.8").status_code, 200)
+
+# ================== Analytics ==================
+
+class AnalyticsTests(EmpTestCase):
+    def setUp(self):
+        super().setUp()
+        self.finance, _ = Department.objects.get_or_create(name="Finance")
+        self.sales, _ = Department.objects.get_or_create(name="Sales")
+        self.accountant, _ = Designation.objects.get_or_create(name="Accountant", defaults={"department": self.finance})
+        self.manager, _ = Designation.objects.get_or_create(name="Sales Manager", defaults={"department": self.sales})
+        self.staff = make_user("staff@example.com", staff=True)
+
+    def rollups(self):
+        return (
+            sorted(HeadcountRollup.objects.exclude(headcount=0).values_list(
+                "department_id", "designation_id", "headcount")),
+            sorted(MonthlyRollup.objects.exclude(count=0).values_list("metric", "month", "count", "total_seconds")),
+        )
+
+    def test_employee_changes_update_the_headcount(self):
+        emps = [make_emp(make_user(f"emp{n}@example.com"), n, self.finance, self.accountant) for n in range(3)]
+        emps[0].department, emps[0].designation = self.sales, self.manager
+        emps[0].joining_date = timezone.localdate()
+        emps[0].save()
+        emps[1].delete()
+        Emp.objects.only("emp_id").get(pk=emps[2].pk).save()  # a partial load moves nothing
+
+        headcount = report()["headcount"]
+        self.assertEqual(headcount["total"], 2)
+        self.assertEqual(headcount["by_department"], [{"department": "Finance", "count": 1},
+                                                      {"department": "Sales", "count": 1}])
+        self.assertEqual(report()["monthly"][-1]["joiners"], 1)
+        self.assertEqual(len(report(months=1000)["monthly"]), 120)
+
+    def test_ticket_volume_and_resolution_time(self):
+        opened = timezone.now() - timedelta(minutes=30)
+        tickets = [Ticket.objects.create(email="guest@example.com", subject="s", message="m", created_at=opened)
+                   for _ in range(3)]
+        for ticket in tickets[:2]:
+            ticket.status = Ticket.RESOLVED
+            ticket.save()
+        tickets[1].status = Ticket.OPEN  # reopened
+        tickets[1].save()
+        tickets[2].delete()
+
+        monthly = report()["monthly"]
+        self.assertEqual(sum(month["tickets_opened"] for month in monthly), 2)
+        self.assertEqual([month["avg_resolution_hours"] for month in monthly if month["tickets_resolved"]], [0.5])
+        self.assertEqual(monthly[-1]["month"], f"{timezone.localdate():%Y-%m}")
+
+    def test_the_rebuild_matches_the_incremental_rollups(self):
+        for n in range(5):
+            emp = make_emp(make_user(f"emp{n}@example.com"), n, self.finance if n % 2 else self.sales,
+                           self.accountant if n % 2 else self.manager)
+            Ticket.objects.create(user=emp.user, email=emp.email, subject="s", message="m",
+                                  status=Ticket.RESOLVED if n % 2 else Ticket.OPEN)
+        incremental = self.rollups()
+        HeadcountRollup.objects.update(headcount=F("headcount") + 7)
+        MonthlyRollup.objects.all().delete()
+
+        stdout = StringIO()
+        call_command("rebuild_analytics", "--batch-size", "2", stdout=stdout)
+        self.assertEqual(self.rollups(), incremental)
+        self.assertIn(f"Rebuilt {len(incremental[0]) + len(incremental[1])} analytics rollup row(s).",
+                      stdout.getvalue())
+
+    def test_reports_read_only_the_rollups(self):
+        make_emp(make_user("emp@example.com"), 1, self.finance, self.accountant)
+        DEPARTMENTS.rows(), DESIGNATIONS.rows()
+        with self.assertNumQueries(2):
+            report()
+        Emp.objects.bulk_create([Emp(user=make_user("bulk@example.com"), f_name="F", l_name="L", gender="F",
+                                     phone="9000000099", email="bulk@example.com", address="A",
+                                     department=self.finance, designation=self.accountant,
+                                     joining_date=date(2024, 1, 1))])  # bypasses the signals
+        self.assertEqual(report()["headcount"]["total"], 1)
+        rebuild_rollups()
+        self.assertEqual(report()["headcount"]["total"], 2)
+
+    def test_the_api_and_dashboard_are_for_staff(self):
+        make_emp(make_user("emp@example.com"), 1, self.finance, self.accountant)
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("analytics"), {"months": "3"})
+        self.assertEqual(response.json()["headcount"]["total"], 1)
+        self.assertEqual(len(response.json()["monthly"]), 3)
+        self.assertEqual(self.client.get(reverse("analytics"), {"months": "x"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("emp_home")).context["analytics"]["headcount"]["total"], 1)
+
+        self.client.force_login(Emp.objects.get().user)
+        self.assertEqual(self.client.get(reverse("analytics")).status_code, 302)
+        self.assertIsNone(self.client.get(reverse("emp_home")).context["analytics"])
+
+# ================== Outbox ==================
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise SMTPException("Mail server unavailable")
+
+
+class OutboxTests(EmpTestCase):
+    def test_ticket_mail_is_queued_then_sent_by_the_worker(self):
+        user = make_user("user@example.com")
+        self.client.force_login(user)
+        self.client.post(reverse("help_support"), {"subject": "Printer", "message": "Jammed"})
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(OutboundEmail.objects.filter(status=OutboundEmail.PENDING).count(), 1)
+
+        self.assertEqual(send_queued_mail(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("Printer", mail.outbox[0].subject + mail.outbox[0].body)
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.status, OutboundEmail.SENT)
+        self.assertIsNotNone(email.sent_at)
+        self.assertEqual(send_queued_mail(), (0, 0))
+
+    def test_mail_queued_in_a_rolled_back_transaction_is_dropped(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            enqueue_mail("Subject", "Body", ["to@example.com"])
+            raise RuntimeError
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    @override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2, EMAIL_OUTBOX_RETRY_BASE_SECONDS=60)
+    def test_failed_delivery_is_retried_with_backoff_then_given_up(self):
+        email = enqueue_mail("Subject", "Body", ["to@example.com"])
+        before = timezone.now()
+        self.assertEqual(send_queued_mail(connection=FailingBackend()), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutboundEmail.PENDING, 1))
+        self.assertEqual(email.last_error, "Mail server unavailable")
+        self.assertGreaterEqual(email.next_attempt_at, before + timedelta(seconds=60))
+        self.assertEqual(send_queued_mail(connection=FailingBackend()), (0, 0))  # not due yet
+
+        OutboundEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(send_queued_mail(connection=FailingBackend()), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutboundEmail.FAILED, 2))
+
+    def test_one_pass_sends_a_batch_over_one_connection(self):
+        for number in range(5):
+            enqueue_mail(f"Subject {number}", "Body", [f"to{number}@example.com"])
+        with self.assertNumQueries(5):  # claim (SELECT, UPDATE in a savepoint), then one bulk_update
+            self.assertEqual(send_queued_mail(), (5, 0))
+        self.assertEqual(len(mail.outbox), 5)
+
+    @override_settings(EMAIL_OUTBOX_DISPATCH_ON_COMMIT=True)
+    def test_dispatch_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue_mail("Subject", "Body", ["to@example.com"])
+            self.assertEqual(mail.outbox, [])
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(OutboundEmail.objects.get().status, OutboundEmail.SENT)
+
+
+# ================== Server-sent events ==================
+
+@override_settings(EMP_EVENTS_BACKEND=None, EMP_EVENTS_REDIS_URL=None)
+class TicketEventTests(EmpTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = patch("emp.events._bus", None)  # a fresh LocalBackend bus per test
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def event(message):
+        fields = dict(line.split(": ", 1) for line in message.strip().splitlines())
+        return fields["event"], json.loads(fields["data"])
+
+    async def test_events_reach_the_owner_and_staff_only(self):
+        owner = get_bus().subscribe(ticket_resources([1]))
+        staff = get_bus().subscribe([ALL_TICKETS])
+        other = get_bus().subscribe([user_tickets(2)])
+        _publish(CREATED, [(10, 1, Ticket.OPEN, "Printer")])
+        for subscription in (owner, staff):
+            self.assertEqual(self.event(await subscription.get(1)), (CREATED, {
+                "id": 10, "kind": "ticket", "user": 1, "status": "open", "label": "Open", "subject": "Printer",
+            }))
+            self.assertIsNone(await subscription.get(0.01))  # once, though on both of the owner's channels
+        self.assertIsNone(await other.get(0.01))
+        for subscription in (owner, staff, other):
+            subscription.close()
+        self.assertEqual(get_bus()._subscriptions, {})
+
+    @override_settings(EMP_EVENTS_QUEUE_SIZE=2)
+    async def test_a_full_queue_makes_the_client_resync(self):
+        subscription = get_bus().subscribe([ALL_TICKETS])
+        _publish(STATUS, [(pk, None, Ticket.RESOLVED, "s") for pk in range(3)])
+        await asyncio.sleep(0)  # the frames are queued before the client reads any
+        self.assertEqual(self.event(await subscription.get(1))[0], RESYNC)
+        self.assertIsNone(await subscription.get(0.01))  # the queued frames were dropped with it
+        subscription.close()
+
+    @override_settings(EMP_EVENTS_HEARTBEAT=0.01, EMP_EVENTS_MAX_AGE=0.05)
+    async def test_the_stream_sends_heartbeats_and_ends(self):
+        messages = [message async for message in stream([ALL_TICKETS])]
+        self.assertTrue(messages[0].startswith("retry: 5000\nid: "))
+        self.assertGreaterEqual(len(messages), 3)
+        self.assertTrue(all(message.endswith("\n: keepalive\n\n") for message in messages[1:]))
+        self.assertEqual(get_bus()._subscriptions, {})
+
+    @override_settings(EMP_EVENTS_HEARTBEAT=0.01, EMP_EVENTS_MAX_AGE=0.01)
+    async def test_a_client_behind_the_data_versions_resyncs(self):
+        versions = await aget_versions([ALL_TICKETS])
+        current = max(versions.values())
+        messages = [message async for message in stream([ALL_TICKETS], last_event_id=current - 1)]
+        self.assertEqual(self.event(messages[0])[0], RESYNC)
+        messages = [message async for message in stream([ALL_TICKETS], last_event_id=current)]
+        self.assertTrue(messages[0].startswith("retry: "))
+
+    def test_changes_are_published_after_the_commit(self):
+        user = make_user("user@example.com")
+        with patch("emp.events.get_bus") as get_bus_mock:
+            publish = get_bus_mock.return_value.publish
+            with self.captureOnCommitCallbacks(execute=True):
+                tickets = [Ticket.objects.create(user=user, email=user.email, subject=f"s{n}", message="m")
+                           for n in range(3)]
+                publish.assert_not_called()
+            self.assertEqual(publish.call_count, 3)
+
+            publish.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                set_status(Ticket.objects.filter(pk__in=[ticket.pk for ticket in tickets]), Ticket.RESOLVED)
+            (messages,), _ = publish.call_args
+            self.assertEqual(publish.call_count, 1)  # one batch
+            self.assertEqual([self.event(message)[1]["status"] for _, message in messages], ["resolved"] * 3)
+            self.assertEqual(messages[0][0], ticket_resources([user.pk]))
+
+            publish.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        Ticket.objects.create(user=user, email=user.email, subject="rolled back", message="m")
+                        raise DataError
+                except DataError:
+                    pass
+            publish.assert_not_called()
+
+    def test_the_endpoint_answers_204_under_wsgi(self):
+        self.client.force_login(make_user("user@example.com"))
+        self.assertEqual(self.client.get(reverse("ticket_events")).status_code, 204)
+
+    @override_settings(EMP_EVENTS_HEARTBEAT=0.01, EMP_EVENTS_MAX_AGE=0.02)
+    async def test_the_endpoint_streams_under_asgi(self):
+        user = await sync_to_async(make_user)("user@example.com")
+        await self.async_client.aforce_login(user)
+        response = await self.async_client.get(reverse("ticket_events"))
+        self.assertEqual((response["Content-Type"], response["Cache-Control"]), ("text/event-stream", "no-cache"))
+        messages = [message async for message in response.streaming_content]
+        self.assertTrue(messages[0].startswith(b"retry: "))
+        self.assertTrue(await Profile.objects.filter(user=user).aexists())  # the test database is still usable
+
+# ================== Tickets ==================
+
+class TicketTests(EmpTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user("user@example.com")
+        self.user_key = ("ticket", str(self.user.pk))
+        self.guest_key = ("guest_ticket", "guest@example.com")
+
+    def test_resolved_at_is_stamped_when_a_ticket_is_resolved(self):
+        ticket = Ticket.objects.create(user=self.user, email=self.user.email, subject="s", message="m")
+        self.assertIsNone(ticket.resolved_at)
+        ticket.status = Ticket.RESOLVED
+        ticket.save()
+        self.assertIsNotNone(ticket.resolved_at)
+        ticket.status = Ticket.OPEN
+        ticket.save()
+        self.assertIsNone(ticket.resolved_at)
+
+    def test_saving_an_already_resolved_ticket_keeps_resolved_at(self):
+        # e.g. a ticket copied from the old models without a resolution time
+        ticket = Ticket.objects.create(user=self.user, email=self.user.email, subject="s", message="m",
+                                       status=Ticket.RESOLVED)
+        Ticket.objects.filter(pk=ticket.pk).update(resolved_at=None)
+        ticket = Ticket.objects.get(pk=ticket.pk)
+        ticket.subject = "Renamed"
+        ticket.save()
+        ticket.refresh_from_db()
+        self.assertIsNone(ticket.resolved_at)
+
+    def test_counters_follow_a_change_of_owner(self):
+        ticket = Ticket.objects.create(email="guest@example.com", subject="s", message="m")
+        self.assertEqual(get_counts(self.guest_key)[self.guest_key]["open"], 1)
+        ticket.user = self.user
+        ticket.save()
+        counts = get_counts(self.guest_key, self.user_key)
+        self.assertEqual(counts[self.guest_key]["open"], 0)
+        self.assertEqual(counts[self.user_key]["open"], 1)
+
+    def test_a_change_of_owner_kind_moves_the_search_document(self):
+        ticket = Ticket.objects.create(email="guest@example.com", subject="Printer", message="m")
+        ticket.user = self.user
+        ticket.save()
+        documents = SearchDocument.objects.filter(object_id=ticket.pk)
+        self.assertEqual(list(documents.values_list("kind", flat=True)), ["ticket"])
+        self.assertEqual(search_ids(Ticket, "printer", kinds=["guest_ticket"]), [])
+        self.assertEqual(search_ids(Ticket, "printer"), [ticket.pk])
+
+
+# ================== Admin search ==================
+
+class AdminSearchTests(EmpTestCase):
+    def setUp(self):
+        super().setUp()
+        admin_user = make_user("admin@example.com", staff=True)
+        User.objects.filter(pk=admin_user.pk).update(is_superuser=True)
+        self.client.force_login(admin_user)
+        department, _ = Department.objects.get_or_create(name="Finance")
+        designation, _ = Designation.objects.get_or_create(name="Accountant", defaults={"department": department})
+        for number in range(3):
+            make_emp(make_user(f"emp{number}@example.com"), number, department, designation)
+
+    def search(self, term):
+        return self.client.get(reverse("admin:emp_emp_changelist"), {"q": term})
+
+    def test_the_search_box_uses_the_full_text_index(self):
+        response = self.search("emp1")
+        self.assertEqual([emp.email for emp in response.context["cl"].result_list], ["emp1@example.com"])
+        response = self.search("finance")
+        self.assertEqual(response.context["cl"].result_count, 3)
+        self.assertNotContains(response, "best matches")
+
+    def test_capped_results_say_so(self):
+        with patch.object(EmpAdmin, "search_limit", 2):
+            response = self.search("finance")
+        self.assertEqual(response.context["cl"].result_count, 2)
+        self.assertContains(response, "Only the 2 best matches for “finance” are listed")
+
+# ================== Bulk import ==================
+
+class ImportEmployeesTests(EmpTestCase):
+    def row(self, number, **fields):
+        return {
+            "email": f"emp{number}@example.com", "password": "", "f_name": f"First{number}", "l_name": "Last",
+            "gender": "F", "phone": f"90000{number:05d}", "address": "Street 1", "department": "Finance",
+            "designation": "Accountant", "joining_date": "2024-01-01", **fields,
+        }
+
+    def import_rows(self, rows):
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+            f.writelines(json.dumps(row) + "\n" for row in rows)
+        self.addCleanup(os.remove, f.name)
+        stdout, stderr = StringIO(), StringIO()
+        call_command("import_employees", f.name, "--workers", "1", stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_malformed_rows_are_rejected_and_the_rest_imported(self):
+        stdout, stderr = self.import_rows([
+            self.row(1),
+            [1, 2],
+            "just a string",
+            self.row(2, email=5),
+            self.row(3, phone=["9000000003"]),
+            self.row(4, password=12345),
+            self.row(5, email=f"{'x' * 40}@example.com"),  # over Emp.email's 50 characters
+            self.row(6, email="emp1@example.com"),  # taken by row 1
+            self.row(7, phone=9000000007),  # a number is fine for a text field
+        ])
+        self.assertIn("Imported 2 employee(s), skipped 7", stdout)
+        self.assertIn("Row 2: expected an object, got list", stderr)
+        self.assertIn("Row 5: phone", stderr)
+        self.assertIn("Row 7: email: Ensure this value has at most 50 characters", stderr)
+        self.assertEqual(
+            sorted(Emp.objects.values_list("email", "phone")),
+            [("emp1@example.com", "9000000001"), ("emp7@example.com", "9000000007")],
+        )
+        self.assertEqual(Emp.objects.get(phone="9000000001").department.name, "Finance")
+
+# ================== Export ==================
+
+class ExportTests(EmpTestCase):
+    def setUp(self):
+        super().setUp()
+        self.finance, _ = Department.objects.get_or_create(name="Finance")
+        self.sales, _ = Department.objects.get_or_create(name="Sales")
+        self.accountant, _ = Designation.objects.get_or_create(name="Accountant", defaults={"department": self.finance})
+        self.manager, _ = Designation.objects.get_or_create(name="Sales Manager", defaults={"department": self.sales})
+        self.emps = [
+            make_emp(make_user("one@example.com"), 1, self.finance, self.accountant),
+            make_emp(make_user("two@example.com"), 2, self.sales, self.manager),
+        ]
+        self.client.force_login(make_user("staff@example.com", staff=True))
+
+    def export(self, **params):
+        response = self.client.get(reverse("export_emp"), params)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_lists_every_employee_with_lookup_names(self):
+        rows = list(csv.reader(StringIO(self.export())))
+        self.assertEqual(rows[0], list(EXPORT_FIELDS))
+        self.assertEqual([(row[0], row[7], row[8]) for row in rows[1:]], [
+            (self.emps[0].emp_code, "Finance", "Accountant"),
+            (self.emps[1].emp_code, "Sales", "Sales Manager"),
+        ])
+
+    def test_jsonl_applies_the_filters(self):
+        lines = self.export(format="jsonl", department="Sales").splitlines()
+        self.assertEqual(len(lines), 1)
+        record = json.loads(lines[0])
+        self.assertEqual((record["email"], record["designation"], record["joining_date"]),
+                         ("two@example.com", "Sales Manager", "2024-01-03"))
+        self.assertEqual(self.export(format="jsonl", department="Nowhere"), "")
+        self.assertEqual(len(self.export(joined_to="2024-01-02").splitlines()), 2)  # header and one row
+
+    def test_rows_are_the_same_in_any_chunk_size(self):
+        self.assertEqual(list(export_rows(fmt="jsonl", chunk_size=1)), list(export_rows(fmt="jsonl")))
+
+    def test_only_staff_can_export(self):
+        self.client.force_login(Emp.objects.first().user)
+        response = self.client.get(reverse("export_emp"))
+        self.assertRedirects(response, "/emp/login/?next=/emp/export-emp/", fetch_redirect_response=False)
+
+    def test_the_command_writes_the_export(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "employees.csv")
+            call_command("export_employees", "--department", "Finance", "--output", path)
+            with open(path, newline="", encoding="utf-8") as f:
+                rows = list(csv.reader(f))
+        self.assertEqual([row[5] for row in rows], ["email", "one@example.com"])
+
+# ================== API ==================
+
+class ApiTests(EmpTestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = make_user("staff@example.com", staff=True)
+        self.client.force_login(self.staff)
+
+    def post(self, name, body):
+        return self.client.post(reverse(name), json.dumps(body), content_type="application/json")
+
+    def employee(self, number, **fields):
+        return {
+            "f_name": f"First{number}", "l_name": "Last", "gender": "F", "phone": f"90000{number:05d}",
+            "email": f"emp{number}@example.com", "address": "Street 1", "department": "Finance",
+            "designation": "Accountant", "joining_date": "2024-01-01", **fields,
+        }
+
+    def assertRecordErrors(self, response, operation, indexes):
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error["index"] for error in response.json()["errors"][operation]], indexes)
+
+    def test_authentication_and_staff_only_batches(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse("api_employees")).status_code, 401)
+        self.client.force_login(make_user("user@example.com"))
+        self.assertEqual(self.post("api_employees_batch", {"create": [self.employee(1)]}).status_code, 403)
+
+    def test_malformed_bodies(self):
+        response = self.client.post(reverse("api_tickets_batch"), "{", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.post("api_tickets_batch", [1, 2]).status_code, 400)
+        self.assertEqual(self.post("api_tickets_batch", {"create": {"subject": "s"}}).status_code, 400)
+        self.assertEqual(self.post("api_tickets_batch", {"update": [1]}).status_code, 400)
+        with self.settings(EMP_API_MAX_BATCH=2):
+            response = self.post("api_tickets_batch", {"update": [{}, {}, {}]})
+        self.assertEqual(response.status_code, 413)
+
+    def test_batch_creates_employees_in_a_fixed_number_of_queries(self):
+        self.post("api_employees_batch", {"create": [self.employee(0)]})  # warm the user and lookup caches
+        with CaptureQueriesContext(connection) as small:
+            response = self.post("api_employees_batch", {"create": [self.employee(n) for n in range(1, 3)]})
+        self.assertEqual(response.status_code, 201)
+        with CaptureQueriesContext(connection) as large:
+            response = self.post("api_employees_batch", {"create": [self.employee(n) for n in range(3, 23)]})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Emp.objects.count(), 23)
+        self.assertEqual(len(large), len(small))
+
+    def test_invalid_employee_records_write_nothing(self):
+        response = self.post("api_employees_batch", {"create": [
+            self.employee(1),
+            self.employee(2, email="not-an-email"),
+            self.employee(3, joining_date=["2024-01-01"]),
+            self.employee(4, phone={"number": 1}),
+            self.employee(5, email="emp1@example.com"),  # taken by record 0
+        ]})
+        self.assertRecordErrors(response, "create", [1, 2, 3, 4])
+        self.assertFalse(Emp.objects.exists())
+
+    def test_values_longer_than_their_columns_are_record_errors(self):
+        self.post("api_employees_batch", {"create": [self.employee(1)]})
+        emp = Emp.objects.get()
+        long_email = f"{'x' * 40}@example.com"
+        response = self.post("api_employees_batch", {
+            "create": [self.employee(2), self.employee(3, email=long_email), self.employee(4, f_name="x" * 101)],
+            "update": [{"emp_id": emp.pk, "email": long_email}],
+        })
+        self.assertRecordErrors(response, "create", [1, 2])
+        self.assertEqual(response.json()["errors"]["update"][0]["errors"],
+                         ["email: Ensure this value has at most 50 characters (it has 52)."])
+        self.assertEqual(Emp.objects.count(), 1)
+
+    def test_a_value_the_database_rejects_is_a_bad_request(self):
+        with patch("emp.api.create_employees", side_effect=DataError("value too long for type character varying(50)")):
+            response = self.post("api_employees_batch", {"create": [self.employee(1)]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("character varying(50)", response.json()["error"])
+        self.assertFalse(User.objects.filter(email="emp1@example.com").exists())
+
+    def test_update_ids_must_be_integers(self):
+        self.post("api_employees_batch", {"create": [self.employee(1)]})
+        emp = Emp.objects.get()
+        response = self.post("api_employees_batch", {"update": [
+            {"emp_id": [emp.pk], "f_name": "A"},
+            {"emp_id": {"id": emp.pk}, "f_name": "B"},
+            {"emp_id": True, "f_name": "C"},
+            {"emp_id": str(emp.pk), "f_name": "D"},
+            {"emp_id": emp.pk + 100, "f_name": "E"},
+            {"emp_id": emp.pk, "bogus": "F"},
+        ]})
+        self.assertRecordErrors(response, "update", [0, 1, 2, 3, 4, 5])
+        response = self.post("api_employees_batch", {"update": [{"emp_id": emp.pk, "f_name": "Zed"}]})
+        self.assertEqual(response.json()["updated"][0]["f_name"], "Zed")
+
+    def test_ticket_updates_check_ids_and_statuses(self):
+        ticket = Ticket.objects.create(user=self.staff, email=self.staff.email, subject="s", message="m")
+        response = self.post("api_tickets_batch", {"update": [
+            {"id": [ticket.pk], "status": Ticket.RESOLVED},
+            {"id": ticket.pk, "status": [Ticket.RESOLVED]},
+            {"id": ticket.pk, "status": {"status": Ticket.RESOLVED}},
+            {"id": True, "status": Ticket.RESOLVED},
+            {"id": ticket.pk, "status": "closed"},
+        ]})
+        self.assertRecordErrors(response, "update", [0, 1, 2, 3, 4])
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.status, Ticket.OPEN)
+
+        response = self.post("api_tickets_batch", {"update": [{"id": ticket.pk, "status": Ticket.RESOLVED}]})
+        self.assertEqual(response.json()["updated"], 1)
+        key = ("ticket", str(self.staff.pk))
+        self.assertEqual(get_counts(key)[key], {"open": 0, "resolved": 1})
+
+    def test_sparse_fieldsets_load_only_those_columns(self):
+        self.post("api_employees_batch", {"create": [self.employee(1)]})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("api_employees"), {"fields": "emp_code,f_name"})
+        self.assertEqual(list(response.json()["data"][0]), ["emp_id", "emp_code", "f_name"])
+        self.assertNotIn("address", queries[-1]["sql"])
+
+        response = self.client.get(reverse("api_employees"), {"fields": "salary"})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,93 @@
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+# scope -> {"ip": (limit, window seconds), "email": (limit, window seconds)}
+DEFAULT_RATES = {
+    "login": {"ip": (30, 60), "email": (10, 900)},
+    "register": {"ip": (10, 3600), "email": (3, 3600)},
+}
+
+
+def _cache():
+    return caches[getattr(settings, "EMP_THROTTLE_CACHE", "default")]
+
+
+def _rates(scope):
+    return getattr(settings, "EMP_THROTTLE_RATES", DEFAULT_RATES).get(scope, {})
+
+
+def client_ip(request):
+    """The client address, looking through ``EMP_THROTTLE_PROXY_COUNT`` reverse proxies."""
+    proxies = getattr(settings, "EMP_THROTTLE_PROXY_COUNT", 0)
+    if proxies:
+        forwarded = [ip.strip() for ip in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if ip.strip()]
+        if forwarded:
+            return forwarded[-min(proxies, len(forwarded))]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _key(scope, kind, ident, bucket):
+    # Hashed so arbitrary user input makes a short, memcached-safe key.
+    digest = hashlib.blake2b(ident.encode(), digest_size=12).hexdigest()
+    return f"throttle:{scope}:{kind}:{digest}:{bucket}"
+
+
+def _hit(cache, scope, kind, ident, limit, window, now):
+    """Count one attempt; return seconds to wait if over ``limit``, else 0.
+
+    Sliding-window counter: two fixed buckets, with the previous one
+    weighted by how much of it still overlaps the window. That is three
+    O(1) cache operations and two keys per identity, however many
+    attempts are made.
+    """
+    bucket, offset = divmod(now, window)
+    bucket = int(bucket)
+    key = _key(scope, kind, ident, bucket)
+    cache.add(key, 0, window * 2)
+    try:
+        current = cache.incr(key)
+    except ValueError:  # expired between add() and incr()
+        cache.set(key, 1, window * 2)
+        current = 1
+    previous = cache.get(_key(scope, kind, ident, bucket - 1), 0)
+    if previous * (1 - offset / window) + current <= limit:
+        return 0
+    return max(1, math.ceil(window - offset))
+
+
+def throttle(request, scope, email=None):
+    """Record an attempt at ``scope`` by this client (and ``email``).
+
+    Returns 0 when the attempt may go ahead, otherwise the number of
+    seconds to send in ``Retry-After``. Call it before any password
+    hashing so a blocked attempt costs only a few cache round-trips.
+    """
+    cache = _cache()
+    now = time.time()
+    rates = _rates(scope)
+    identities = [("ip", client_ip(request))]
+    if email:
+        identities.append(("email", email.strip().lower()))
+
+    retry_after = 0
+    for kind, ident in identities:
+        if kind in rates and ident:
+            limit, window = rates[kind]
+            retry_after = max(retry_after, _hit(cache, scope, kind, ident, limit, window, now))
+    return retry_after
+
+
+def reset(scope, email):
+    """Forget the attempts against ``email`` (e.g. after a successful login)."""
+    rate = _rates(scope).get("email")
+    if rate is None:
+        return
+    window = rate[1]
+    bucket = int(time.time() // window)
+    ident = email.strip().lower()
+    _cache().delete_many([_key(scope, "email", ident, b) for b in (bucket, bucket - 1)])
@@ -0,0 +1,271 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .analytics import Rollups, increment
+from .events import CREATED, STATUS, publish_tickets, ticket_rows
+from .models import Ticket, TicketCounter
+from .outbox import enqueue_mail, enqueue_mass_mail
+from .search import index_instances, remove_document
+from .versions import bump, ticket_resources
+
+
+ALL = "*"  # TicketCounter.owner of the per-kind totals
+
+# ?status= values accepted by the inboxes; "open" means not yet resolved
+STATUS_FILTERS = {
+    "open": ~Q(status=Ticket.RESOLVED),
+    "in_progress": Q(status=Ticket.IN_PROGRESS),
+    "resolved": Q(status=Ticket.RESOLVED),
+}
+
+# Allowed status changes (a resolved ticket may be reopened)
+TRANSITIONS = {
+    Ticket.OPEN: {Ticket.IN_PROGRESS, Ticket.RESOLVED},
+    Ticket.IN_PROGRESS: {Ticket.OPEN, Ticket.RESOLVED},
+    Ticket.RESOLVED: {Ticket.OPEN},
+}
+
+
+def filter_status(queryset, status):
+    """Narrow a ticket queryset to ``?status=open|in_progress|resolved`` (anything else: all)."""
+    if status in STATUS_FILTERS:
+        return queryset.filter(STATUS_FILTERS[status])
+    return queryset
+
+
+def counter_key(user_id, email):
+    if user_id is None:
+        return "guest_ticket", email.lower()
+    return "ticket", str(user_id)
+
+
+# ================== Notifications ==================
+
+def new_ticket_mail(ticket):
+    if ticket.is_guest:
+        subject = f"New Guest Complaint From {ticket.email}"
+        sender = f"Guest Email: {ticket.email}"
+    else:
+        subject = f"New Emp Complaint Ticket from {ticket.email}"
+        sender = f"Employee: {ticket.user.get_full_name()} ({ticket.email})"
+    return subject, f"{sender}\nSubject: {ticket.subject}\nMessage: {ticket.message}", [settings.ADMIN_EMAIL]
+
+
+def resolved_mail(subject, message, email, first_name=""):
+    greeting = f"Hello {first_name}," if first_name else "Hello,"
+    return (
+        "Your Problem is Resolved",
+        f"{greeting}\n\nYour problem has been resolved:\n\n"
+        f"Subject: {subject}\n"
+        f"Message: {message}\n\n"
+        "Thank you for reaching out.",
+        [email],
+    )
+
+
+def notify_new_ticket(ticket):
+    subject, message, recipients = new_ticket_mail(ticket)
+    enqueue_mail(subject=subject, message=message, from_email=settings.DEFAULT_FROM_EMAIL,
+                 recipient_list=recipients)
+
+
+def notify_resolved(ticket):
+    first_name = ticket.user.first_name if ticket.user_id else ""
+    subject, message, recipients = resolved_mail(ticket.subject, ticket.message, ticket.email, first_name)
+    enqueue_mail(subject=subject, message=message, from_email=settings.DEFAULT_FROM_EMAIL,
+                 recipient_list=recipients)
+
+
+# ================== Counters ==================
+
+def adjust_counters(deltas):
+    """Apply ``{(kind, owner): (open_delta, resolved_delta)}`` and the matching
+    per-kind totals with one upsert (``emp.analytics.increment``)."""
+    totals = {}
+    for (kind, _), (open_delta, resolved_delta) in deltas.items():
+        total_open, total_resolved = totals.get((kind, ALL), (0, 0))
+        totals[kind, ALL] = (total_open + open_delta, total_resolved + resolved_delta)
+    deltas = {key: delta for key, delta in {**deltas, **totals}.items() if delta != (0, 0)}
+    if deltas:
+        increment(TicketCounter, ("kind", "owner"), {
+            key: {"open_count": open_delta, "resolved_count": resolved_delta}
+            for key, (open_delta, resolved_delta) in deltas.items()
+        })
+
+
+def _delta(was_resolved, is_resolved):
+    if was_resolved == is_resolved:
+        return (0, 0)
+    return (-1, 1) if is_resolved else (1, -1)
+
+
+def _count(is_resolved, sign=1):
+    return (0, sign) if is_resolved else (sign, 0)
+
+
+def remember_ticket(ticket):
+    """Note the status and owner a Ticket is counted under (post_init, post_save).
+
+    Read from ``__dict__`` so deferred fields are never loaded: a partial
+    load saves only its loaded fields, so an unloaded one cannot change.
+    """
+    ticket._was = {name: ticket.__dict__[name] for name in ("status", "user_id", "email") if name in ticket.__dict__}
+
+
+def was(ticket, name):
+    """``name``'s value before this change."""
+    return ticket._was[name] if name in ticket._was else getattr(ticket, name)
+
+
+def ticket_saved(ticket, created):
+    key = counter_key(ticket.user_id, ticket.email)
+    if created:
+        adjust_counters({key: _count(ticket.is_resolved)})
+        return
+    was_resolved = was(ticket, "status") == Ticket.RESOLVED
+    was_key = counter_key(was(ticket, "user_id"), was(ticket, "email"))
+    if was_key == key:
+        adjust_counters({key: _delta(was_resolved, ticket.is_resolved)})
+    else:
+        # Moved to another owner (e.g. in the admin): off the old owner's counts, onto the new one's
+        adjust_counters({was_key: _count(was_resolved, sign=-1), key: _count(ticket.is_resolved)})
+        if was_key[0] != key[0]:
+            # Guest <-> employee ticket: its search document is now filed under the other kind
+            remove_document(was_key[0], ticket.pk)
+
+
+def ticket_deleted(ticket):
+    key = counter_key(was(ticket, "user_id"), was(ticket, "email"))
+    adjust_counters({key: _count(was(ticket, "status") == Ticket.RESOLVED, sign=-1)})
+
+
+def get_counts(*keys):
+    """``{(kind, owner): {"open": n, "resolved": n}}`` for each key, in one query."""
+    counts = {key: {"open": 0, "resolved": 0} for key in keys}
+    if not keys:
+        return counts
+    condition = Q()
+    for kind, owner in keys:
+        condition |= Q(kind=kind, owner=owner)
+    for kind, owner, open_count, resolved_count in TicketCounter.objects.filter(condition).values_list(
+        "kind", "owner", "open_count", "resolved_count"
+    ):
+        counts[kind, owner] = {"open": open_count, "resolved": resolved_count}
+    return counts
+
+
+def rebuild_counters():
+    """Recount every ticket from scratch (after bulk edits that bypass emp.tickets)."""
+    totals = {}
+    rows = Ticket.objects.order_by().values_list("user_id", "email", "status").annotate(n=Count("pk"))
+    for user_id, email, status, n in rows:
+        kind, owner = counter_key(user_id, email)
+        for key in ((kind, owner), (kind, ALL)):
+            if key not in totals:
+                totals[key] = TicketCounter(kind=key[0], owner=key[1])
+            if status == Ticket.RESOLVED:
+                totals[key].resolved_count += n
+            else:
+                totals[key].open_count += n
+    with transaction.atomic():
+        TicketCounter.objects.all().delete()
+        TicketCounter.objects.bulk_create(totals.values())
+        bump(*ticket_resources(int(owner) for kind, owner in totals if kind == "ticket" and owner != ALL))
+    return len(totals)
+
+
+# ================== Status workflow ==================
+
+def set_status(queryset, status):
+    """Move every ticket in ``queryset`` that may make the transition to ``status``.
+
+    One SELECT ... FOR UPDATE, one UPDATE, one counter update, one
+    analytics rollup update, one version bump (emp.versions) and one batch
+    of server-sent events (emp.events), both after the commit, and, when
+    resolving, one INSERT that queues all the notifications (the outbox
+    worker sends them over a single connection), however many tickets are
+    selected. Returns the number of tickets changed.
+    """
+    allowed_from = [current for current, targets in TRANSITIONS.items() if status in targets]
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            queryset.filter(status__in=allowed_from)
+            .select_for_update(of=("self",))
+            .values_list("pk", "user_id", "email", "status", "subject", "message", "user__first_name",
+                         "created_at", "resolved_at")
+        )
+        if not rows:
+            return 0
+
+        Ticket.objects.filter(pk__in=[row[0] for row in rows]).update(
+            status=status,
+            updated_at=now,
+            resolved_at=now if status == Ticket.RESOLVED else None,
+        )
+
+        opened, resolved = Counter(), Counter()
+        rollups = Rollups()
+        for _, user_id, email, old_status, *_, created_at, resolved_at in rows:
+            key = counter_key(user_id, email)
+            open_delta, resolved_delta = _delta(old_status == Ticket.RESOLVED, status == Ticket.RESOLVED)
+            opened[key] += open_delta
+            resolved[key] += resolved_delta
+            if resolved_at:
+                rollups.ticket_resolved(created_at, resolved_at, sign=-1)
+            if status == Ticket.RESOLVED:
+                rollups.ticket_resolved(created_at, now)
+        adjust_counters({key: (opened[key], resolved[key]) for key in opened.keys() | resolved.keys()})
+        rollups.apply()
+        bump(*ticket_resources(user_id for _, user_id, *_ in rows))
+        publish_tickets(STATUS, [(pk, user_id, status, subject) for pk, user_id, _, _, subject, *_ in rows])
+
+        if status == Ticket.RESOLVED:
+            enqueue_mass_mail(
+                resolved_mail(subject, message, email, first_name or "")
+                for _, _, email, _, subject, message, first_name, *_ in rows
+            )
+    return len(rows)
+
+
+def create_tickets(tickets):
+    """Insert unsaved tickets in bulk (the JSON API's batch endpoint).
+
+    bulk_create sends no signals, so the counters, analytics rollups,
+    search documents, data versions, server-sent events and admin
+    notifications are done here
+    with one query each, however many tickets there are.
+    """
+    if not tickets:
+        return []
+    with transaction.atomic():
+        tickets = Ticket.objects.bulk_create(tickets)
+        opened = Counter(counter_key(ticket.user_id, ticket.email) for ticket in tickets)
+        adjust_counters({key: (n, 0) for key, n in opened.items()})
+        rollups = Rollups()
+        for ticket in tickets:
+            rollups.ticket_opened(ticket.created_at)
+        rollups.apply()
+        index_instances(tickets)
+        bump(*ticket_resources(ticket.user_id for ticket in tickets))
+        publish_tickets(CREATED, ticket_rows(tickets))
+        enqueue_mass_mail(new_ticket_mail(ticket) for ticket in tickets)
+    return tickets
+
+
+def save_ticket(ticket):
+    """Save one ticket in a transaction with what its post_save handlers
+    write (counters, search document, rollups, queued mail), so a failure
+    in any of them leaves no ticket behind."""
+    with transaction.atomic():
+        ticket.save()
+    return ticket
+
+
+def resolve_tickets(queryset):
+    """Bulk "resolve selected" (admin action and the staff ticket inbox)."""
+    return set_status(queryset, Ticket.RESOLVED)
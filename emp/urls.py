@@ -1,5 +1,5 @@
 from django.urls import path
-from emp import views
+from emp import api, views
 from django.contrib.auth import views as auth_views
 from emp.views import CustomPasswordResetView
 
@@ -7,6 +7,9 @@ urlpatterns = [
     path("home/", views.emp_home, name="emp_home"),
     path("add-emp/", views.add_emp, name="add_emp"),
     path("view-emp/", views.view_emp, name="view_emp"), 
+    path("export-emp/", views.export_emp, name="export_emp"),
+    path("search/", views.search_view, name="search"),
+    path("analytics/", views.analytics_api, name="analytics"),
     path("update-emp/", views.update_emp, name="update_emp"),
     path("delete-emp/<int:emp_id>/", views.delete_emp, name="delete_emp"),
 
@@ -23,6 +26,14 @@ urlpatterns = [
    
     path("help_support/", views.help_support, name="help_support"),
     path("guest-help-support/", views.guest_help_support, name="guest_help_support"),
+    path("tickets/", views.ticket_inbox, name="ticket_inbox"),
+    path("events/tickets/", views.ticket_events, name="ticket_events"),
+
+    # JSON API for integrations (emp/api.py)
+    path("api/v1/employees/", api.employees, name="api_employees"),
+    path("api/v1/employees/batch/", api.employees_batch, name="api_employees_batch"),
+    path("api/v1/tickets/", api.tickets, name="api_tickets"),
+    path("api/v1/tickets/batch/", api.tickets_batch, name="api_tickets_batch"),
 ]
 
 
@@ -1,14 +1,121 @@
+import functools
+import gzip
+import hashlib
+import os
+import string
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import password_validation
+from django.contrib.auth.password_validation import CommonPasswordValidator
 from django.core.exceptions import ValidationError
-import re
+
+
+# The policy's character classes: (flag, message, code)
+UPPERCASE, NUMBER, SPECIAL = 1, 2, 4
+CHARACTER_RULES = (
+    (UPPERCASE, "Password must contain at least one uppercase letter.", "password_no_upper"),
+    (NUMBER, "Password must contain at least one number.", "password_no_number"),
+    (SPECIAL, "Password must contain at least one special character.", "password_no_special"),
+)
+ALL_CLASSES = UPPERCASE | NUMBER | SPECIAL
+
+
+_UPPERCASE_CHARS = frozenset(string.ascii_uppercase)
+_DIGIT_CHARS = frozenset(string.digits)
+_PLAIN_CHARS = frozenset(string.ascii_letters + string.digits)
+
+
+def character_classes(password):
+    """Bit set of the classes present in ``password``.
+
+    ``set()`` walks the password once in C; the three class checks then
+    run over the distinct characters only.
+    """
+    chars = set(password)
+    found = 0
+    if not chars.isdisjoint(_UPPERCASE_CHARS):
+        found |= UPPERCASE
+    if not chars.isdisjoint(_DIGIT_CHARS):
+        found |= NUMBER
+    if not chars <= _PLAIN_CHARS:
+        found |= SPECIAL
+    return found
+
 
 class CustomPasswordValidator:
     def validate(self, password, user=None):
-        if not re.search(r'[A-Z]', password):
-            raise ValidationError("Password must contain at least one uppercase letter.")
-        if not re.search(r'[0-9]', password):
-            raise ValidationError("Password must contain at least one number.")
-        if not re.search(r'[^A-Za-z0-9]', password):
-            raise ValidationError("Password must contain at least one special character.")
+        found = character_classes(password)
+        errors = [
+            ValidationError(message, code=code)
+            for flag, message, code in CHARACTER_RULES
+            if not found & flag
+        ]
+        if errors:
+            raise ValidationError(errors)
 
     def get_help_text(self):
         return "Your password must contain at least one uppercase, one number, and one special character."
+
+
+@functools.cache
+def common_passwords(path=None):
+    """Frozenset of a (possibly gzipped) common-password list, read once per process."""
+    path = path or Path(password_validation.__file__).resolve().parent / "common-passwords.txt.gz"
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    return frozenset(map(str.strip, lines))
+
+
+class CommonPasswordIndexValidator(CommonPasswordValidator):
+    """Django's CommonPasswordValidator over a shared, preloaded frozenset.
+
+    The list is decompressed once per process (EmpConfig.ready warms it)
+    rather than by every validator instance.
+    """
+
+    def __init__(self, password_list_path=None):
+        self.passwords = common_passwords(str(password_list_path) if password_list_path else None)
+
+
+class BreachedPasswordValidator:
+    """Reject passwords found in a local copy of a breached-password corpus.
+
+    ``EMP_BREACHED_PASSWORDS_DIR`` holds k-anonymity range files in the
+    Have I Been Pwned layout: one file per 5-hex-digit SHA-1 prefix (e.g.
+    ``21BD1``) with ``SUFFIX:COUNT`` lines. Only the one small file for the
+    password's prefix is read. Without the setting the validator does nothing.
+    """
+
+    def __init__(self, min_count=1):
+        self.min_count = min_count
+
+    def breach_count(self, password):
+        directory = getattr(settings, "EMP_BREACHED_PASSWORDS_DIR", None)
+        if not directory:
+            return 0
+        digest = hashlib.sha1(password.encode("utf-8")).hexdigest().upper()
+        prefix, suffix = digest[:5], digest[5:]
+        try:
+            with open(os.path.join(directory, prefix), encoding="ascii") as f:
+                for line in f:
+                    if line.startswith(suffix):
+                        _, _, count = line.partition(":")
+                        return int(count or 1)
+        except FileNotFoundError:
+            pass
+        return 0
+
+    def validate(self, password, user=None):
+        if self.breach_count(password) >= self.min_count:
+            raise ValidationError(
+                "This password has appeared in a data breach. Please choose another.",
+                code="password_breached",
+            )
+
+    def get_help_text(self):
+        return "Your password can’t be one that has appeared in a known data breach."
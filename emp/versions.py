@@ -0,0 +1,176 @@
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+
+# Resources whose version a page can depend on
+DIRECTORY = "directory"  # every Emp, Department and Designation
+ALL_TICKETS = "tickets"  # every ticket (the staff badge and inbox)
+
+
+def user_tickets(user_id):
+    return f"tickets:{user_id}"
+
+
+def version_key(resource):
+    return f"emp:version:{resource}"
+
+
+def _now():
+    return time.time_ns() // 1000
+
+
+# ================== Bumping ==================
+
+def _bump(resources):
+    now = _now()
+    for resource in resources:
+        key = version_key(resource)
+        if cache.add(key, now, None):
+            continue
+        # incr is atomic in every backend, so concurrent bumps can only move a
+        # version forward; the step brings it up to "now" (see get_versions)
+        current = cache.get(key)
+        try:
+            cache.incr(key, max(1, now - (current or now)))
+        except ValueError:  # evicted since the add
+            cache.add(key, now, None)
+
+
+def bump(*resources):
+    """Move the versions of ``resources`` forward once the current transaction commits.
+
+    A version is the time of the last change in microseconds, kept
+    increasing. Bumping only after the commit means no reader can pair the
+    new version with the old data.
+    """
+    resources = {resource for resource in resources if resource}
+    if resources:
+        transaction.on_commit(lambda: _bump(resources))
+
+
+def process_local_cache():
+    """True if each server process has its own cache (locmem), so a bump in
+    one process is never seen by the others."""
+    return isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache)
+
+
+def ticket_resources(user_ids):
+    return [ALL_TICKETS, *(user_tickets(pk) for pk in set(user_ids) if pk is not None)]
+
+
+# ================== Reading ==================
+
+# An evicted (or never bumped) version restarts at "now": newer than any
+# ETag handed out before, so nobody gets a stale 304.
+
+def get_versions(resources):
+    keys = [version_key(resource) for resource in resources]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _now(), None)
+            versions[key] = cache.get(key) or _now()
+    return versions
+
+
+async def aget_versions(resources):
+    keys = [version_key(resource) for resource in resources]
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, _now(), None)
+            versions[key] = await cache.aget(key) or _now()
+    return versions
+
+
+def page_resources(user, resources):
+    """``resources`` plus what the navbar shows: the user's own ticket badge
+    and, for staff, the open-ticket total."""
+    resources = list(resources)
+    if user.is_authenticated:
+        resources.append(user_tickets(user.pk))
+        if user.is_staff:
+            resources.append(ALL_TICKETS)
+    return resources
+
+
+def enabled():
+    return getattr(settings, "EMP_CONDITIONAL_GET", True)
+
+
+def etag_for(request, user, versions):
+    """The ETag of a page, or None if it must not be revalidated right now.
+
+    There is no Last-Modified: at HTTP's one-second resolution two changes
+    within the same second would look alike, and a client that fetched
+    between them would keep getting 304 for the older page.
+    """
+    if not versions or len(getattr(request, "_messages", ())):
+        return None  # flash messages are shown once, never from a cached copy
+    if getattr(settings, "DATABASE_REPLICAS", []):
+        # A replica may not have the newest change yet; no validators until it must
+        if _now() - max(versions.values()) < getattr(settings, "DATABASE_REPLICA_PIN_SECONDS", 5) * 1_000_000:
+            return None
+    identity = (
+        sorted(versions.items()),
+        user.pk, user.is_staff, user.first_name, user.username,
+        request.META.get("CSRF_COOKIE"),  # the page embeds a token for this secret
+    )
+    return quote_etag(hashlib.md5(repr(identity).encode(), usedforsecurity=False).hexdigest())
+
+
+def _set_etag(response, etag):
+    if response.status_code in (200, 304):
+        response.headers["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_page(*resources):
+    """Answer ``If-None-Match`` with 304 from the data versions.
+
+    ``resources`` are the versioned data the page shows; the navbar's are
+    added (see ``page_resources``). The check is one cache lookup and no
+    queries, so a client polling an unchanged page costs almost nothing.
+    Put it inside ``login_required`` and outside ``use_replica``. Off
+    unless ``EMP_CONDITIONAL_GET``: the versions must live in a cache shared
+    by every server process (see emp.checks).
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            async def wrapper(request, *args, **kwargs):
+                if request.method not in ("GET", "HEAD") or not enabled():
+                    return await view(request, *args, **kwargs)
+                user = await request.auser()
+                etag = etag_for(request, user, await aget_versions(page_resources(user, resources)))
+                if etag is None:
+                    return await view(request, *args, **kwargs)
+                response = get_conditional_response(request, etag=etag)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return _set_etag(response, etag)
+
+            markcoroutinefunction(wrapper)
+        else:
+            def wrapper(request, *args, **kwargs):
+                if request.method not in ("GET", "HEAD") or not enabled():
+                    return view(request, *args, **kwargs)
+                etag = etag_for(request, request.user, get_versions(page_resources(request.user, resources)))
+                if etag is None:
+                    return view(request, *args, **kwargs)
+                response = get_conditional_response(request, etag=etag)
+                if response is None:
+                    response = view(request, *args, **kwargs)
+                return _set_etag(response, etag)
+
+        return wraps(view)(wrapper)
+    return decorator
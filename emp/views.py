@@ -1,46 +1,96 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
-from django.contrib.auth.decorators import login_required
+from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import User
 from django.contrib import messages
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from django.contrib.auth.views import PasswordResetView
 from django.urls import reverse_lazy
-
-from .models import Emp, Profile, SupportTicket, GuestSupportTicket
-from .forms import CustomPasswordResetForm, SupportTicketForm, GuestSupportTicketForm
+from django.http import HttpResponse, StreamingHttpResponse, JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+from django.db.models import Q
+from asgiref.sync import sync_to_async
+
+from .models import Emp, Profile, Ticket
+from .forms import CustomPasswordResetForm, SupportTicketForm, GuestSupportTicketForm, EmpFilterForm, EmpLookupForm
+from .pagination import akeyset_paginate, keyset_paginate
+from .analytics import areport, report, DASHBOARD_MONTHS
+from .cache import aget_headcount, aget_department_counts, aget_user_emp
+from .exports import EXPORT_FORMATS, export_rows
+from .search import search, tokenize, MAX_RESULTS
+from .lookups import DEPARTMENTS, DESIGNATIONS, aattach, attach, designation_options
+from .routers import use_replica
+from .throttling import throttle, reset as reset_throttle
+from .tickets import filter_status, resolve_tickets, save_ticket
+from .versions import ALL_TICKETS, DIRECTORY, conditional_page, page_resources
+from .events import stream
 import re
 
 
+NON_LETTERS = re.compile(r'[^a-zA-Z]')
+TICKETS_PER_PAGE = 20
+
+
+# Async views render through sync_to_async: template context processors
+# (auth, messages) still read the session/user synchronously.
+arender = sync_to_async(render)
+asave_ticket = sync_to_async(save_ticket)  # the ticket and its signal writes in one transaction
+
+
+async def _auser(request):
+    # Load the user with the async ORM once and reuse it for request.user
+    user = await request.auser()
+    request.user = user
+    return user
+
+
 
 
 # ================== EMPLOYEE VIEWS ==================
 
 
-def emp_home(request):
+def _emp_form_context(**context):
+    # Dropdown options for add_emp/update_emp, from the in-process lookup tables
+    context.update(departments=DEPARTMENTS.rows().all, designation_options=designation_options())
+    return context
+
+
+@use_replica
+async def emp_home(request):
     emp = None
     email_name = "Guest"
+    user = await _auser(request)
 
-    if request.user.is_authenticated:
-        # fetch employee linked to this user if exists
-        emp = Emp.objects.filter(user=request.user).first()
+    if user.is_authenticated:
+        # fetch employee linked to this user if exists (cached)
+        emp = await aget_user_emp(user)
+        if emp:
+            await aattach([emp])
 
         # Always take from login email (User model)
-        if request.user.email:
-            raw_email_name = request.user.email.split("@")[0]
+        if user.email:
+            raw_email_name = user.email.split("@")[0]
         else:
-            raw_email_name = request.user.username
+            raw_email_name = user.username
 
         # Remove digits, keep only letters
-        email_name = re.sub(r'[^a-zA-Z]', '', raw_email_name)
+        email_name = NON_LETTERS.sub('', raw_email_name)
 
-    total_emps = Emp.objects.count()
+    # Cached counts, invalidated by the Emp post_save/post_delete signals
+    total_emps = await aget_headcount()
+    department_emps = (await aget_department_counts()).get(emp.department_id, 0) if emp else 0
 
-    return render(request, 'emp/home.html', {
+    # Management dashboard, read from the analytics rollups only
+    analytics = await areport() if user.is_staff else None
+
+    return await arender(request, 'emp/home.html', {
         'emp': emp,
         'total_emps': total_emps,
-        'email_name': email_name
+        'department_emps': department_emps,
+        'email_name': email_name,
+        'analytics': analytics,
     })
 
 
@@ -52,18 +102,6 @@ def add_emp(request):
         return redirect('/emp/view-emp/')
 
     if request.method == 'POST':
-        # Generate emp_code safely
-        last_emp = Emp.objects.exclude(emp_code__isnull=True).order_by('-emp_code').first()
-        if last_emp and last_emp.emp_code:
-            try:
-                last_num = int(last_emp.emp_code.replace("EMP", ""))
-            except ValueError:
-                last_num = 0
-        else:
-            last_num = 0
-
-        new_code = f"EMP{last_num + 1:03d}"
-
         # Collect form data
         f_name = request.POST.get('f_name')
         l_name = request.POST.get('l_name')
@@ -80,15 +118,20 @@ def add_emp(request):
             messages.warning(request, "Please fill all required fields.")
             return redirect('/emp/add-emp/')
 
+        lookups = EmpLookupForm(request.POST)
+        if not lookups.is_valid():
+            messages.warning(request, "Please choose a department and one of its designations.")
+            return redirect('/emp/add-emp/')
+        department, designation = lookups.cleaned_data["department"], lookups.cleaned_data["designation"]
+
         # Extra safety check again (in case of race condition)
         if Emp.objects.filter(user=request.user).exists():
             messages.warning(request, "Your details are already saved.")
             return redirect('/emp/view-emp/')
 
-        # Create Employee
+        # Create Employee (emp_code is allocated in Emp.save())
         Emp.objects.create(
             user=request.user,
-            emp_code=new_code,
             f_name=f_name,
             l_name=l_name,
             gender=gender,
@@ -103,14 +146,51 @@ def add_emp(request):
         messages.success(request, "Employee added successfully.")
         return redirect('/emp/view-emp/')
 
-    return render(request, 'emp/add_emp.html')
+    return render(request, 'emp/add_emp.html', _emp_form_context())
 
 
 
 @login_required(login_url='/emp/login/')
-def view_emp(request):
-    emps = Emp.objects.all()  # Show all employees to everyone(Not Guests)
-    return render(request, 'emp/view_emp.html', {'emps': emps})
+@conditional_page(DIRECTORY)  # polling clients get a 304 until an employee changes
+@use_replica
+async def view_emp(request):
+    # Show all employees to everyone(Not Guests), one keyset page at a time
+    await _auser(request)
+    departments, designations = await DEPARTMENTS.arows(), await DESIGNATIONS.arows()
+    filter_form = EmpFilterForm(request.GET)
+    emps = Emp.objects.only(
+        'emp_id', 'emp_code', 'f_name', 'l_name', 'gender',
+        'department', 'designation', 'joining_date', 'version',
+    )
+    filter_form.is_valid()  # invalid fields are simply left out of cleaned_data
+    emps = filter_form.filter(emps, departments, designations)
+
+    page = await akeyset_paginate(emps, request.GET, key='emp_id')
+    await aattach(page)  # department/designation names without a join
+    return await arender(request, 'emp/view_emp.html', {
+        'emps': page,
+        'page': page,
+        'filter_form': filter_form,
+        'departments': departments.all,
+        'designations': designations.all,
+    })
+
+
+@user_passes_test(lambda user: user.is_staff, login_url='/emp/login/')
+@use_replica
+def export_emp(request):
+    # Streams the (filtered) directory as CSV/JSONL for payroll and audit (staff only)
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        fmt = 'csv'
+
+    filter_form = EmpFilterForm(request.GET)
+    filter_form.is_valid()
+    emps = filter_form.filter(Emp.objects.all())
+
+    response = StreamingHttpResponse(export_rows(emps, fmt), content_type=EXPORT_FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="employees.{fmt}"'
+    return response
 
 
 @login_required(login_url='/emp/login/')
@@ -134,8 +214,11 @@ def update_emp(request):
             emp.phone = request.POST.get("phone")
             emp.email = request.POST.get("email")
             emp.address = request.POST.get("address")
-            emp.department = request.POST.get("department")
-            emp.designation = request.POST.get("designation")
+            lookups = EmpLookupForm(request.POST)
+            if not lookups.is_valid():
+                messages.error(request, "Please choose a department and one of its designations.")
+                return redirect("/emp/update-emp/")
+            emp.department, emp.designation = lookups.cleaned_data["department"], lookups.cleaned_data["designation"]
 
             # Prevent duplicate email for other employees
             if Emp.objects.exclude(pk=emp.pk).filter(email=emp.email).exists():
@@ -146,7 +229,7 @@ def update_emp(request):
             messages.success(request, "Your details have been updated successfully.")
             return redirect("/emp/view-emp/")
 
-    return render(request, "emp/update_emp.html", {"emp": emp})
+    return render(request, "emp/update_emp.html", _emp_form_context(emp=emp))
 
 
 
@@ -165,14 +248,90 @@ def delete_emp(request, emp_id):
 
 
 
+# ================== ANALYTICS ==================
+
+@user_passes_test(lambda user: user.is_staff, login_url='/emp/login/')
+@use_replica
+def analytics_api(request):
+    # Headcount, joiners and ticket volume/resolution time per month: ?months=1..120
+    try:
+        months = int(request.GET.get('months', DASHBOARD_MONTHS))
+    except ValueError:
+        return JsonResponse({'error': 'months must be a number.'}, status=400)
+    return JsonResponse(report(months))
+
+
+# ================== SEARCH ==================
+
+@login_required(login_url='/emp/login/')
+@use_replica
+def search_view(request):
+    # Ranked full-text search: ?q=<terms>&type=emp|ticket|guest_ticket
+    query = request.GET.get('q', '').strip()
+    kind = request.GET.get('type', 'emp')
+
+    if kind == 'emp':
+        emps = attach(search(Emp.objects.all(), query))
+        results = [{
+            'emp_code': e.emp_code,
+            'name': f"{e.f_name} {e.l_name}",
+            'department': e.department.name,
+            'designation': e.designation.name,
+        } for e in emps]
+
+    elif kind == 'ticket':
+        if request.user.is_staff:
+            tickets = search(Ticket.objects.all(), query, kinds=['ticket'])
+        else:
+            # A user's own tickets are few; filter them directly via the (user, status, id) index
+            tickets = Ticket.objects.filter(user=request.user).order_by('-pk')
+            for term in tokenize(query) or ['']:
+                tickets = tickets.filter(Q(subject__icontains=term) | Q(message__icontains=term))
+            tickets = tickets[:MAX_RESULTS]
+        results = [{
+            'id': t.id,
+            'subject': t.subject,
+            'created_at': t.created_at,
+            'status': t.status,
+            'is_resolved': t.is_resolved,
+        } for t in tickets]
+
+    elif kind == 'guest_ticket' and request.user.is_staff:
+        results = [{
+            'id': t.id,
+            'email': t.email,
+            'subject': t.subject,
+            'created_at': t.created_at,
+            'status': t.status,
+            'is_resolved': t.is_resolved,
+        } for t in search(Ticket.objects.all(), query, kinds=['guest_ticket'])]
+
+    else:
+        return JsonResponse({'error': 'Unknown search type.'}, status=400)
+
+    return JsonResponse({'query': query, 'type': kind, 'results': results})
+
+
 # ================== AUTH VIEWS ==================
 
+def _throttled(request, template, retry_after):
+    # Cheap refusal: no password hashing and no queries.
+    messages.error(request, "Too many attempts. Please try again later.")
+    response = render(request, template, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
 def register_user(request):
     if request.method == 'POST':
         email = request.POST.get('email')
         password1 = request.POST.get('password1')
         password2 = request.POST.get('password2')
 
+        retry_after = throttle(request, 'register', email)
+        if retry_after:
+            return _throttled(request, 'emp/register.html', retry_after)
+
         # Check password match
         if password1 != password2:
             messages.error(request, "Passwords do not match")
@@ -217,11 +376,16 @@ def login_user(request):
         email = request.POST.get('email')
         password = request.POST.get('password')
 
+        retry_after = throttle(request, 'login', email)
+        if retry_after:
+            return _throttled(request, 'emp/login.html', retry_after)
+
         user = authenticate(request, username=email, password=password)
 
         if user is not None:
             try:
-                profile = Profile.objects.get(user=user)
+                # loaded with the user by emp.backends.ProfileModelBackend
+                profile = user.profile
             except Profile.DoesNotExist:
                 messages.error(request, "No profile found. Contact admin.")
                 return redirect('/emp/login/')
@@ -233,6 +397,7 @@ def login_user(request):
 
             # If approved, allow login
             login(request, user)
+            reset_throttle('login', email)
             return redirect('/emp/home/')
         else:
             messages.error(request, "Invalid email or password.")
@@ -256,32 +421,84 @@ def logout_user(request):
 
 # ================== Support Ticket ==================
 
-def help_support(request):
+@login_required(login_url='/emp/login/')
+@conditional_page()  # the user's own tickets (always part of a page's version)
+@use_replica  # only the GET history; submitting a ticket is a POST
+async def help_support(request):
+    user = await _auser(request)
+
     if request.method == "POST":
         form = SupportTicketForm(request.POST)
         if form.is_valid():
             ticket = form.save(commit=False)
-            ticket.user = request.user  # always logged-in user
-            ticket.save()
+            ticket.user = user  # always logged-in user
+            ticket.email = user.email
+            await asave_ticket(ticket)  # admin mail is queued in the outbox, not sent here
             messages.success(request, "✅ Your support request has been submitted!")
             return redirect("help_support")
     else:
         form = SupportTicketForm()
 
-    tickets = SupportTicket.objects.filter(user=request.user).order_by("-created_at")
-    return render(request, "emp/help_support.html", {"form": form, "tickets": tickets})
+    # Newest first, one keyset page at a time; the open/resolved totals come
+    # from the ticket counters (ticket_counts context processor).
+    status = request.GET.get("status")
+    tickets = filter_status(Ticket.objects.filter(user=user), status)
+    page = await akeyset_paginate(tickets, request.GET, key="-pk", per_page=TICKETS_PER_PAGE)
+    return await arender(request, "emp/help_support.html", {"form": form, "page": page, "status": status})
+
 
+async def guest_help_support(request):
+    await _auser(request)
 
-def guest_help_support(request):
     if request.method == "POST":
         form = GuestSupportTicketForm(request.POST)
         if form.is_valid():
-            form.save()
+            await asave_ticket(form.save(commit=False))
             messages.success(request, "✅ Your support request has been submitted!")
             return redirect("guest_help_support")
     else:
         form = GuestSupportTicketForm()
 
-    return render(request, "emp/guest_help_support.html", {"form": form})
-    
+    return await arender(request, "emp/guest_help_support.html", {"form": form})
+
 
+@user_passes_test(lambda user: user.is_staff, login_url='/emp/login/')
+@conditional_page(ALL_TICKETS)
+@use_replica  # the listing; "resolve selected" is a POST
+def ticket_inbox(request):
+    # Staff triage of employee (?type=ticket) and guest (?type=guest_ticket) tickets
+    if request.method == 'POST':
+        ids = [pk for pk in request.POST.getlist('ticket') if pk.isdigit()]
+        resolved = resolve_tickets(Ticket.objects.filter(pk__in=ids))
+        messages.success(request, f"Resolved {resolved} ticket(s); notifications queued.")
+        return redirect(request.get_full_path())
+
+    kind = request.GET.get('type')
+    if kind == 'guest_ticket':
+        tickets = Ticket.objects.filter(user__isnull=True)
+    else:
+        kind = 'ticket'
+        tickets = Ticket.objects.filter(user__isnull=False)
+
+    status = request.GET.get('status')
+    page = keyset_paginate(filter_status(tickets, status), request.GET, key='-pk', per_page=TICKETS_PER_PAGE)
+    return render(request, 'emp/ticket_inbox.html', {'page': page, 'kind': kind, 'status': status})
+
+
+@login_required(login_url='/emp/login/')
+async def ticket_events(request):
+    # Server-sent events for the user's tickets (staff: every ticket), see emp/events.py
+    if not isinstance(request, ASGIRequest):
+        # A WSGI worker would be tied up per client; 204 stops EventSource reconnecting
+        return HttpResponse(status=204)
+    user = await _auser(request)
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    last_event_id = int(last_event_id) if last_event_id.isdigit() else None
+
+    await sync_to_async(connections.close_all)()  # no DB connection held for the life of the stream
+    response = StreamingHttpResponse(
+        stream(page_resources(user, []), last_event_id), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: pass each event on at once
+    return response
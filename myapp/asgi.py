@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myapp.settings')
+# Tells myapp/db.py to default to pooled, not persistent, connections
+os.environ.setdefault('DJANGO_ASGI', '1')
 
 application = get_asgi_application()
@@ -13,6 +13,8 @@ import os
 from pathlib import Path
 import environ
 
+from myapp.db import database_config, replica_configs
+
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -30,9 +32,17 @@ environ.Env.read_env(os.path.join(BASE_DIR, ".env"))
 SECRET_KEY = os.environ.get("SECRET_KEY", "django-insecure-your-secret-key")
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = env.bool('DEBUG', default=True)
+
+# Production rendering profile: templates compiled once per process (cached
+# loader), hashed + pre-compressed static files and the vendored front-end
+# assets. On by default whenever DEBUG is off.
+EMP_PRODUCTION_RENDERING = env.bool('EMP_PRODUCTION_RENDERING', default=not DEBUG)
 
-ALLOWED_HOSTS = []
+# Host names this site serves, e.g. ALLOWED_HOSTS=emp.example.com,.example.com.
+# The default is what Django allows under DEBUG, so a local DEBUG=False run
+# (the production rendering profile) is not answered with 400 Bad Request.
+ALLOWED_HOSTS = env.list('ALLOWED_HOSTS', default=['.localhost', '127.0.0.1', '[::1]'])
 
 
 # Application definition
@@ -49,6 +59,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'emp.routers.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -57,6 +68,38 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Opt-in per-request query/latency profiling (see emp/middleware.py)
+EMP_PROFILING = env.bool('EMP_PROFILING', default=False)
+if EMP_PROFILING:
+    MIDDLEWARE.insert(0, 'emp.middleware.QueryProfilingMiddleware')
+
+# Per-URL-name budgets: a max query count, or {"queries": n, "ms": n}
+EMP_QUERY_BUDGETS = {
+    'emp_home': 5,
+    'view_emp': 3,
+    # a submit: the ticket, one upsert each for its rollup, search document and
+    # counters, and the queued mail (see emp.analytics.increment); one spare for
+    # a cold session/user cache
+    'help_support': {'queries': 7, 'ms': 500},
+    'ticket_inbox': 4,
+    'analytics': 3,  # two rollup reads, whatever the table sizes
+    'api_employees': 2,  # one keyset page, lookups from memory
+    'api_tickets': 2,
+}
+# Raise QueryBudgetExceeded instead of logging a warning (turn on for the test suite)
+EMP_QUERY_BUDGETS_STRICT = env.bool('EMP_QUERY_BUDGETS_STRICT', default=False)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'emp.profiling': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 ROOT_URLCONF = 'myapp.urls'
 
 TEMPLATES = [
@@ -69,23 +112,113 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'emp.context_processors.ticket_counts',
+                'emp.context_processors.fragment_cache',
             ],
         },
     },
 ]
 
+if EMP_PRODUCTION_RENDERING:
+    # Django already caches compiled templates when DEBUG is off; spelled
+    # out so the profile does not depend on DEBUG.
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
+# Seconds the navbar and view_emp row fragments stay cached (0 = off). Rows
+# are keyed by Emp.version, so edits show up at once either way.
+EMP_FRAGMENT_CACHE_TIMEOUT = env.int('EMP_FRAGMENT_CACHE_TIMEOUT', default=3600 if EMP_PRODUCTION_RENDERING else 0)
+
 WSGI_APPLICATION = 'myapp.wsgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Configured from DATABASE_URL (defaults to the local SQLite file), with
+# persistent/pooled connections and SQLite WAL tuning; see myapp/db.py
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(env, env('DATABASE_URL', default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}")),
+}
+
+# Optional read replicas (DATABASE_REPLICA_URLS=url1,url2). Views marked with
+# emp.routers.use_replica read from them; everything else uses 'default'.
+DATABASES.update(replica_configs(env))
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['emp.routers.PrimaryReplicaRouter']
+
+# After a write (any unsafe request), read from the primary for this many seconds
+DATABASE_REPLICA_PIN_SECONDS = env.int('DATABASE_REPLICA_PIN_SECONDS', default=5)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# e.g. CACHE_URL=redis://127.0.0.1:6379/1 or pymemcache://127.0.0.1:11211
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# Answer conditional GETs from data versions kept in the cache (emp/versions.py).
+# The versions must be shared by every server process, so this is off with the
+# per-process locmem default (see the emp.E001 check).
+EMP_CONDITIONAL_GET = env.bool(
+    'EMP_CONDITIONAL_GET',
+    default=CACHES['default']['BACKEND'] != 'django.core.cache.backends.locmem.LocMemCache',
+)
+
+# Seconds the cached headcount / per-user Emp lookups live (signals invalidate them sooner)
+EMP_CACHE_TIMEOUT = env.int('EMP_CACHE_TIMEOUT', default=3600)
+
+# Seconds a process keeps its in-memory Department/Designation tables (emp.lookups);
+# saves in the same process drop them at once, other processes catch up after this
+EMP_LOOKUP_TIMEOUT = env.int('EMP_LOOKUP_TIMEOUT', default=300)
+
+
+# Most records one JSON API batch request may create/update (emp/api.py)
+EMP_API_MAX_BATCH = env.int('EMP_API_MAX_BATCH', default=500)
+
+
+# Server-sent ticket events (emp/events.py; served under ASGI only). The
+# default bus reaches the clients of one server process; with several
+# processes set EMP_EVENTS_REDIS_URL (needs the redis package), or name a
+# backend class in EMP_EVENTS_BACKEND.
+EMP_EVENTS_REDIS_URL = env('EMP_EVENTS_REDIS_URL', default=None)
+EMP_EVENTS_BACKEND = env('EMP_EVENTS_BACKEND', default=None)
+EMP_EVENTS_HEARTBEAT = env.int('EMP_EVENTS_HEARTBEAT', default=15)  # seconds between keepalives
+EMP_EVENTS_MAX_AGE = env.int('EMP_EVENTS_MAX_AGE', default=300)  # then the client reconnects
+
+
+# Full-text search backend (dotted path); by default picked from the database vendor:
+# SQLite FTS5, Postgres tsvector or MySQL FULLTEXT (see emp/search.py)
+EMP_SEARCH_BACKEND = env('EMP_SEARCH_BACKEND', default=None)
+
+
+# Sessions and authentication
+# Sessions are read from the cache and written through to the database;
+# the authenticated user (with its Profile) is cached by the auth backend,
+# so a steady-state logged-in request needs no queries for either.
+
+SESSION_ENGINE = env('SESSION_ENGINE', default='django.contrib.sessions.backends.cached_db')
+
+AUTHENTICATION_BACKENDS = ['emp.backends.ProfileModelBackend']
+
+# Login/registration throttling (emp/throttling.py): sliding-window counters per
+# client IP and per email, checked before any password hashing.
+EMP_THROTTLE_RATES = {
+    # scope: {identity: (max attempts, window seconds)}
+    'login': {'ip': (env.int('LOGIN_THROTTLE_IP', default=30), 60),
+              'email': (env.int('LOGIN_THROTTLE_EMAIL', default=10), 900)},
+    'register': {'ip': (10, 3600), 'email': (3, 3600)},
 }
+# Number of reverse proxies in front of the app that append to X-Forwarded-For
+EMP_THROTTLE_PROXY_COUNT = env.int('EMP_THROTTLE_PROXY_COUNT', default=0)
 
 
 # Password validation
@@ -102,7 +235,8 @@ AUTH_PASSWORD_VALIDATORS = [
         }
     },
     {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+        # Django's list, loaded once into a shared frozenset
+        'NAME': 'emp.validators.CommonPasswordIndexValidator',
     },
     {
         'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
@@ -110,8 +244,16 @@ AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "emp.validators.CustomPasswordValidator"
     },  # <--- Your custom one
+    {
+        # No-op unless EMP_BREACHED_PASSWORDS_DIR is set
+        "NAME": "emp.validators.BreachedPasswordValidator"
+    },
 ]
 
+# Directory of k-anonymity range files (SHA-1 prefix -> "SUFFIX:COUNT" lines),
+# e.g. downloaded with the Have I Been Pwned downloader; checked locally.
+EMP_BREACHED_PASSWORDS_DIR = env('EMP_BREACHED_PASSWORDS_DIR', default=None)
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -129,6 +271,19 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = env('STATIC_ROOT', default=str(BASE_DIR / 'staticfiles'))
+STATICFILES_DIRS = [BASE_DIR / 'static']
+
+# Serve Bootstrap & co. from static/vendor/ (fetch them with
+# `manage.py vendor_assets`) instead of the CDN; see emp/assets.py
+EMP_VENDORED_STATIC = env.bool('EMP_VENDORED_STATIC', default=EMP_PRODUCTION_RENDERING)
+
+if EMP_PRODUCTION_RENDERING:
+    # Content-hashed names (cacheable forever) plus .gz/.br copies, written by collectstatic
+    STORAGES = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'emp.storage.PrecompressedManifestStaticFilesStorage'},
+    }
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -136,6 +291,10 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# Employee codes are reserved from the database in blocks of this size per worker
+EMP_CODE_BATCH_SIZE = env.int("EMP_CODE_BATCH_SIZE", default=20)
+
+
 # Email settings
 EMAIL_BACKEND = env("EMAIL_BACKEND", default="django.core.mail.backends.smtp.EmailBackend")
 EMAIL_HOST = env("EMAIL_HOST", default="smtp.gmail.com")
@@ -147,6 +306,14 @@ EMAIL_HOST_PASSWORD = env("EMAIL_HOST_PASSWORD")
 # Default "from" email for outgoing mails
 DEFAULT_FROM_EMAIL = f"Emp Management <{EMAIL_HOST_USER}>"
 
+# Outbound mail queue (delivered by `manage.py send_queued_mail`)
+EMAIL_OUTBOX_DISPATCH_ON_COMMIT = env.bool("EMAIL_OUTBOX_DISPATCH_ON_COMMIT", default=False)
+EMAIL_OUTBOX_MAX_ATTEMPTS = env.int("EMAIL_OUTBOX_MAX_ATTEMPTS", default=5)
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = env.int("EMAIL_OUTBOX_RETRY_BASE_SECONDS", default=60)
+EMAIL_OUTBOX_RETRY_MAX_SECONDS = env.int("EMAIL_OUTBOX_RETRY_MAX_SECONDS", default=3600)
+# How long a worker owns the batch it claimed; unfinished mail is retried after this
+EMAIL_OUTBOX_CLAIM_SECONDS = env.int("EMAIL_OUTBOX_CLAIM_SECONDS", default=600)
+
 # Admin email for support system
 ADMIN_EMAIL = env("ADMIN_EMAIL", default=EMAIL_HOST_USER)
 
@@ -0,0 +1,68 @@
+// Live ticket updates over server-sent events (emp/events.py).
+// Status badges marked data-ticket-status="<id>" change in place; changes the
+// page cannot show (a new ticket, a ticket not on it) bring up a reload notice.
+(function () {
+  "use strict";
+  var script = document.currentScript;
+  if (!window.EventSource || !script) return;
+
+  var kind = script.dataset.kind || "";  // the kind of ticket listed ("": any)
+  var BADGES = {open: "bg-warning text-dark", in_progress: "bg-info text-dark", resolved: "bg-success"};
+  var created = 0, changed = false, stale = false, notice = null;
+
+  function showNotice() {
+    if (!notice) {
+      notice = document.createElement("div");
+      notice.setAttribute("role", "status");
+      notice.style.cssText = "position:fixed;right:1rem;bottom:1rem;z-index:1080;padding:.75rem 1rem;" +
+        "border-radius:.5rem;background:#0d6efd;color:#fff;box-shadow:0 .5rem 1rem rgba(0,0,0,.3)";
+      document.body.appendChild(notice);
+    }
+    var text = stale ? "This page is out of date." :
+      created ? created + (created === 1 ? " new ticket." : " new tickets.") : "Tickets have changed.";
+    notice.textContent = text + " ";
+    var link = document.createElement("a");
+    link.href = window.location.href;
+    link.textContent = "Reload";
+    link.style.cssText = "color:#fff;font-weight:bold";
+    notice.appendChild(link);
+  }
+
+  function listed(ticket) {
+    return !kind || ticket.kind === kind;
+  }
+
+  function badges(ticket) {
+    return document.querySelectorAll('[data-ticket-status="' + ticket.id + '"]');
+  }
+
+  var source = new EventSource(script.dataset.url);
+
+  source.addEventListener("created", function (event) {
+    var ticket = JSON.parse(event.data);
+    if (listed(ticket) && !badges(ticket).length) {  // not already on the page
+      created += 1;
+      showNotice();
+    }
+  });
+
+  source.addEventListener("status", function (event) {
+    var ticket = JSON.parse(event.data);
+    var found = badges(ticket);
+    found.forEach(function (badge) {
+      badge.className = "badge rounded-pill " + (BADGES[ticket.status] || "bg-secondary");
+      badge.textContent = ticket.label;
+    });
+    var box = document.querySelector('input[name="ticket"][value="' + ticket.id + '"]');
+    if (box) box.disabled = ticket.status === "resolved";
+    if (!found.length && listed(ticket)) {
+      changed = true;
+      showNotice();
+    }
+  });
+
+  source.addEventListener("resync", function () {
+    stale = true;
+    showNotice();
+  });
+})();